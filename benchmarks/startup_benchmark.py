@@ -0,0 +1,234 @@
+"""
+Startup benchmark for the GUI.
+
+Measures what stands between `python main.py` and the first window frame:
+- an import-time breakdown of the modules loaded before the window appears
+  (`python -X importtime`), repeated in fresh interpreters and summarized by
+  the median run;
+- the time to the first frame: a fresh interpreter builds MainWindow and
+  returns from its first update(). This needs a display and is skipped without one.
+
+Tabs other than the first are built on first selection, so the NumPy/SciPy/
+scikit-image stack must not be imported during startup; any module from
+HEAVY_MODULES showing up is reported as a regression. Timings are compared
+against the committed baseline (startup_benchmark_baseline.json).
+
+Usage (from the repository root):
+    python benchmarks/startup_benchmark.py                    # breakdown, compare with the baseline
+    python benchmarks/startup_benchmark.py --top 30           # show more modules
+    python benchmarks/startup_benchmark.py --check            # exit with status 1 on regressions
+    python benchmarks/startup_benchmark.py --update-baseline  # rewrite the baseline from this run
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.normpath(os.path.join(BENCHMARK_DIR, os.pardir, 'src'))
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, 'startup_benchmark_baseline.json')
+
+# Imported before the first frame: the window and the tab that is visible at startup
+STARTUP_IMPORTS = ('tkinter', 'gui.main_window', 'gui.tabs.converter_tab')
+# Packages that only the SVG work needs; importing any of them at startup is a regression
+HEAVY_MODULES = ('numpy', 'scipy', 'sklearn', 'skimage', 'svgwrite', 'imageio')
+DEFAULT_REPEAT = 5
+DEFAULT_TOP = 15
+# Flagged when this much slower than the baseline (and at least MIN_REGRESSION_MS slower:
+# startup times are small enough for scheduler noise to matter)
+TIME_REGRESSION = 1.30
+MIN_REGRESSION_MS = 20.0
+FIRST_FRAME_TIMEOUT = 60
+
+
+def _child_env():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = SRC_DIR + os.pathsep + env.get('PYTHONPATH', '')
+    return env
+
+
+def parse_importtime(stderr):
+    """
+    Parses `python -X importtime` output.
+
+    Returns:
+        list: (module, self_ms, cumulative_ms, depth) per import, in output order.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            self_ms, cumulative_ms = int(self_us) / 1000, int(cumulative_us) / 1000
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        entries.append((name.strip(), self_ms, cumulative_ms, depth))
+    return entries
+
+
+def measure_imports():
+    """Imports STARTUP_IMPORTS in a fresh interpreter with -X importtime."""
+    code = "import " + ", ".join(STARTUP_IMPORTS)
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=SRC_DIR, env=_child_env(),
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing the GUI failed:\n{completed.stderr[-2000:]}")
+    entries = parse_importtime(completed.stderr)
+    return {
+        'total_ms': round(sum(cumulative for _, _, cumulative, depth in entries if depth == 0), 1),
+        'entries': entries,
+    }
+
+
+def first_frame_child():
+    """Child process: builds the main window, draws it once and reports."""
+    import tkinter as tk
+    try:
+        from ttkthemes import ThemedTk
+        root = ThemedTk(theme="equilux")
+    except ImportError:
+        root = tk.Tk()
+    from gui.main_window import MainWindow
+    MainWindow(root)
+    root.update()
+    print('frame', flush=True)
+    root.destroy()
+
+
+def measure_first_frame():
+    """
+    Wall time from launching a fresh interpreter to the first drawn window frame.
+
+    Returns:
+        float: Milliseconds, or None when there is no display.
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--first-frame-child'], cwd=SRC_DIR,
+                               env=_child_env(), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    _, stderr = process.communicate(timeout=FIRST_FRAME_TIMEOUT)
+    if line.strip() == 'frame':
+        return round(elapsed_ms, 1)
+    if 'TclError' in stderr and ('display' in stderr.lower() or 'DISPLAY' in stderr):
+        return None
+    raise RuntimeError(f"The first-frame run failed:\n{stderr[-2000:]}")
+
+
+def summarize(runs, top):
+    """Median totals plus the top modules (by self time) of the median run."""
+    totals = [run['total_ms'] for run in runs]
+    median_run = sorted(runs, key=lambda run: run['total_ms'])[len(runs) // 2]
+    by_self = sorted(median_run['entries'], key=lambda entry: entry[1], reverse=True)[:top]
+    heavy = sorted({name.split('.')[0] for name, _, _, _ in median_run['entries']
+                    if name.split('.')[0] in HEAVY_MODULES})
+    return {
+        'import_ms': round(statistics.median(totals), 1),
+        'import_ms_min': min(totals),
+        'modules': len(median_run['entries']),
+        'heavy_modules': heavy,
+        'top_modules': [{'module': name, 'self_ms': round(self_ms, 2), 'cumulative_ms': round(cumulative_ms, 2)}
+                        for name, self_ms, cumulative_ms, _ in by_self],
+    }
+
+
+def compare(result, baseline):
+    """
+    Compares a summary with the baseline.
+
+    Returns:
+        list: (metric, verdict, detail) tuples; verdicts are 'ok', 'slower',
+            'faster', 'heavy-import' and 'skipped'.
+    """
+    rows = []
+    if result['heavy_modules']:
+        rows.append(('imports', 'heavy-import', "imported at startup: " + ", ".join(result['heavy_modules'])))
+    for metric in ('import_ms', 'first_frame_ms'):
+        value, base = result.get(metric), baseline.get(metric)
+        if value is None or base is None:
+            rows.append((metric, 'skipped', "no measurement" if value is None else "not in the baseline"))
+            continue
+        ratio = value / base if base else 1.0
+        detail = f"{base:.1f} -> {value:.1f} ms (x{ratio:.2f})"
+        if ratio > TIME_REGRESSION and value - base > MIN_REGRESSION_MS:
+            rows.append((metric, 'slower', detail))
+        elif ratio < 1 / TIME_REGRESSION:
+            rows.append((metric, 'faster', detail))
+        else:
+            rows.append((metric, 'ok', detail))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GUI startup and compare with the committed baseline.")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="Fresh interpreters per measurement.")
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help="Modules listed in the breakdown.")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true', help="Write this run's results as the new baseline.")
+    parser.add_argument('--check', action='store_true', help="Exit with status 1 on any regression.")
+    parser.add_argument('--results', help="Also write this run's results to a JSON file.")
+    # Internal: the first-frame child process
+    parser.add_argument('--first-frame-child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.first_frame_child:
+        sys.path.insert(0, SRC_DIR)
+        first_frame_child()
+        return
+
+    measure_imports() # Warm-up: writes the .pyc files so compilation does not count
+    result = summarize([measure_imports() for _ in range(max(1, args.repeat))], args.top)
+    frames = [measure_first_frame() for _ in range(max(1, args.repeat))]
+    result['first_frame_ms'] = None if None in frames else statistics.median(frames)
+
+    print(f"Startup imports ({', '.join(STARTUP_IMPORTS)}): median {result['import_ms']:.1f} ms, "
+          f"min {result['import_ms_min']:.1f} ms, {result['modules']} modules")
+    print(f"{'module':<40} {'self ms':>9} {'cumul. ms':>10}")
+    for entry in result['top_modules']:
+        print(f"{entry['module']:<40} {entry['self_ms']:9.2f} {entry['cumulative_ms']:10.2f}")
+    if result['first_frame_ms'] is None:
+        print("Time to first frame: skipped (no display)")
+    else:
+        print(f"Time to first frame: median {result['first_frame_ms']:.1f} ms")
+
+    if args.results:
+        with open(args.results, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+    if args.update_baseline:
+        baseline = {
+            'machine': {'platform': platform.platform(), 'python': platform.python_version(), 'cpus': os.cpu_count()},
+            'import_ms': result['import_ms'],
+            'first_frame_ms': result['first_frame_ms'],
+            'modules': result['modules'],
+        }
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one.")
+        return
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\nCompared with baseline recorded on {baseline['machine']['platform']} "
+          f"(Python {baseline['machine']['python']}); timings are only comparable on similar machines.")
+    rows = compare(result, baseline)
+    for metric, verdict, detail in rows:
+        print(f"{metric:<16} {verdict:<14} {detail}")
+    regressions = [row for row in rows if row[1] in ('slower', 'heavy-import')]
+    if args.check and regressions:
+        print(f"{len(regressions)} regression(s).")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
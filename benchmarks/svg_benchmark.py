@@ -0,0 +1,270 @@
+"""
+Benchmark suite for the SVG converter.
+
+Generates test images (flat-color logos, smooth gradients and noisy photos) at
+the requested sizes, sweeps n_colors, tolerance and simplify_tolerance, and
+runs every case in a fresh interpreter so the reported peak RSS belongs to that
+conversion only. Each case records its per-stage timings, peak memory, path
+and node counts and the size of the SVG it wrote. The results are compared
+against the committed baseline (svg_benchmark_baseline.json).
+
+Usage (from the repository root):
+    python benchmarks/svg_benchmark.py                        # default suite, compare with the baseline
+    python benchmarks/svg_benchmark.py --sizes 1 4 16 50 --kinds photo
+    python benchmarks/svg_benchmark.py --check                # exit with status 1 on regressions
+    python benchmarks/svg_benchmark.py --update-baseline      # rewrite the baseline from this run
+    python benchmarks/svg_benchmark.py --profile-dir prof     # one cProfile .prof file per case
+    python benchmarks/svg_benchmark.py --py-spy-dir prof      # py-spy speedscope profiles (needs py-spy)
+
+cProfile output opens with `python -m pstats`, snakeviz or similar viewers;
+py-spy output is speedscope JSON (https://www.speedscope.app).
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCHMARK_DIR, os.pardir, 'src')
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, 'svg_benchmark_baseline.json')
+
+IMAGE_KINDS = ('logo', 'gradient', 'photo')
+DEFAULT_SIZES = (0.25, 1.0) # Megapixels; pass e.g. --sizes 1 4 16 50 for the large-image sweep
+DEFAULT_N_COLORS = (4, 8)
+DEFAULT_TOLERANCES = (0.2,)
+DEFAULT_SIMPLIFY_TOLERANCES = (0.5, 2.0)
+# A case is flagged when it is this much slower / bigger than its baseline
+TIME_REGRESSION = 1.30
+MEMORY_REGRESSION = 1.20
+
+
+def peak_rss_bytes():
+    """Returns the peak resident set size of the current process, or None if unavailable."""
+    try:
+        import resource
+    except ImportError: # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def make_test_image(path, kind, megapixels):
+    """Writes a deterministic 4:3 RGB test image of the given kind and size."""
+    import numpy as np
+    from PIL import Image
+
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    rng = np.random.RandomState(0)
+    yy, xx = np.ogrid[:height, :width]
+    v, u = yy / height, xx / width
+
+    if kind == 'logo':
+        # A handful of flat colors with straight, round and diagonal edges
+        img = np.empty((height, width, 3), dtype=np.uint8)
+        img[:] = (245, 245, 240)
+        img[height // 8:height * 7 // 8, width // 10:width * 9 // 10] = (20, 40, 120)
+        disc = (v - 0.45) ** 2 + ((u - 0.35) * 4 / 3) ** 2
+        img[disc < 0.06] = (230, 180, 30)
+        img[(disc < 0.03) & (disc > 0.015)] = (200, 30, 30)
+        img[np.abs((v - 0.2) - (u - 0.55)) < 0.05] = (30, 170, 90)
+        for i in range(5): # Bars standing in for lettering
+            left = int(width * (0.6 + 0.06 * i))
+            img[int(height * 0.6):int(height * 0.8), left:left + width // 40] = (245, 245, 240)
+    elif kind == 'gradient':
+        # Smooth linear and radial gradients: every band edge is a long, gently curving contour
+        radial = np.sqrt((v - 0.5) ** 2 + (u - 0.5) ** 2)
+        img = np.stack(np.broadcast_arrays(u * 255, v * 255, np.clip(1 - radial * 1.5, 0, 1) * 255), axis=-1)
+        img = img.astype(np.uint8)
+    elif kind == 'photo':
+        # Low-frequency "scene" plus sensor noise: many small speckle regions
+        scene = np.zeros((height, width, 3), dtype=np.float32)
+        for _ in range(12):
+            cy, cx, radius = rng.rand(), rng.rand(), 0.05 + rng.rand() * 0.3
+            blob = np.exp(-((v - cy) ** 2 + (u - cx) ** 2) / (2 * radius ** 2)).astype(np.float32)
+            scene += blob[..., None] * rng.rand(3).astype(np.float32) * 160
+        scene += 40 + (u * 60).astype(np.float32)[..., None]
+        scene += rng.normal(0, 10, size=scene.shape).astype(np.float32)
+        img = np.clip(scene, 0, 255).astype(np.uint8)
+    else:
+        raise ValueError(f"Unknown image kind {kind!r}; expected one of {IMAGE_KINDS}.")
+    Image.fromarray(img).save(path)
+    return width, height
+
+
+def case_id(kind, megapixels, options):
+    return (f"{kind}-{megapixels:g}mp-n{options['n_colors']}"
+            f"-t{options['tolerance']:g}-s{options['simplify_tolerance']:g}")
+
+
+def run_single(image_path, output_path, options, profile_path=None):
+    """Runs one conversion in this process and prints a JSON result line."""
+    sys.path.insert(0, SRC_DIR)
+    from core import svg_converter
+    from core.svg_instrumentation import Instrumentation
+
+    instrumentation = Instrumentation()
+    if profile_path:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.runcall(svg_converter.convert_image_to_svg, image_path, output_path, options=options,
+                         instrumentation=instrumentation)
+        profiler.dump_stats(profile_path)
+    else:
+        svg_converter.convert_image_to_svg(image_path, output_path, options=options, instrumentation=instrumentation)
+
+    stats = instrumentation.stats
+    result = {
+        'seconds': round(stats.wall_seconds, 3),
+        'cpu_seconds': round(stats.cpu_seconds, 3),
+        'stages': {stage.name: round(stage.wall_seconds, 3) for stage in stats.stages},
+        'peak_rss_mb': None,
+        'paths': stats.counts.get('paths'),
+        'nodes': stats.counts.get('nodes'),
+        'output_bytes': os.path.getsize(output_path),
+    }
+    peak = peak_rss_bytes()
+    if peak is not None:
+        result['peak_rss_mb'] = round(peak / (1024 * 1024), 1)
+    print(json.dumps(result))
+
+
+def run_case(image_path, output_path, options, profile_path=None, py_spy_path=None):
+    """Runs one case in a fresh interpreter (optionally under py-spy) and returns its result dict."""
+    command = [sys.executable, __file__, '--image', image_path, '--output', output_path, '--single', json.dumps(options)]
+    if profile_path:
+        command += ['--profile-path', profile_path]
+    if py_spy_path:
+        command = ['py-spy', 'record', '--format', 'speedscope', '--output', py_spy_path, '--'] + command
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {'error': completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'failed'}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline):
+    """
+    Compares results with baseline results case by case.
+
+    Returns:
+        list: (case, verdict, detail) tuples; verdicts are 'ok', 'new', 'failed',
+            'slower', 'faster', 'more-memory' and 'output-changed'.
+    """
+    rows = []
+    for case, result in results.items():
+        base = baseline.get(case)
+        if 'error' in result:
+            rows.append((case, 'failed', result['error']))
+            continue
+        if base is None:
+            rows.append((case, 'new', f"{result['seconds']:.2f} s"))
+            continue
+        ratio = result['seconds'] / base['seconds'] if base['seconds'] else 1.0
+        detail = f"{base['seconds']:.2f} -> {result['seconds']:.2f} s (x{ratio:.2f})"
+        if result['paths'] != base['paths'] or result['output_bytes'] != base['output_bytes']:
+            rows.append((case, 'output-changed', f"{detail}; paths {base['paths']} -> {result['paths']}, "
+                                                 f"bytes {base['output_bytes']} -> {result['output_bytes']}"))
+        elif ratio > TIME_REGRESSION:
+            rows.append((case, 'slower', detail))
+        elif (result['peak_rss_mb'] and base.get('peak_rss_mb')
+              and result['peak_rss_mb'] > base['peak_rss_mb'] * MEMORY_REGRESSION):
+            rows.append((case, 'more-memory', f"{base['peak_rss_mb']} -> {result['peak_rss_mb']} MB"))
+        elif ratio < 1 / TIME_REGRESSION:
+            rows.append((case, 'faster', detail))
+        else:
+            rows.append((case, 'ok', detail))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SVG converter and compare with the committed baseline.")
+    parser.add_argument('--kinds', nargs='+', choices=IMAGE_KINDS, default=list(IMAGE_KINDS))
+    parser.add_argument('--sizes', nargs='+', type=float, default=list(DEFAULT_SIZES), help="Image sizes in megapixels.")
+    parser.add_argument('--n-colors', nargs='+', type=int, default=list(DEFAULT_N_COLORS))
+    parser.add_argument('--tolerances', nargs='+', type=float, default=list(DEFAULT_TOLERANCES))
+    parser.add_argument('--simplify-tolerances', nargs='+', type=float, default=list(DEFAULT_SIMPLIFY_TOLERANCES))
+    parser.add_argument('--options', default='{}', help="Extra converter options as JSON, e.g. '{\"quantizer\": \"kmeans\"}'.")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true', help="Write this run's results as the new baseline.")
+    parser.add_argument('--check', action='store_true', help="Exit with status 1 if any case regressed or failed.")
+    parser.add_argument('--results', help="Also write this run's results to a JSON file.")
+    parser.add_argument('--profile-dir', help="Write a cProfile .prof file per case into this folder.")
+    parser.add_argument('--py-spy-dir', help="Record a py-spy speedscope profile per case into this folder.")
+    # Internal: one child run
+    parser.add_argument('--image', help=argparse.SUPPRESS)
+    parser.add_argument('--output', help=argparse.SUPPRESS)
+    parser.add_argument('--single', help=argparse.SUPPRESS)
+    parser.add_argument('--profile-path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single is not None:
+        run_single(args.image, args.output, json.loads(args.single), args.profile_path)
+        return
+
+    if args.py_spy_dir and shutil.which('py-spy') is None:
+        parser.error("--py-spy-dir needs py-spy on PATH (pip install py-spy).")
+    for folder in (args.profile_dir, args.py_spy_dir):
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+    extra_options = json.loads(args.options)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for kind, megapixels in itertools.product(args.kinds, args.sizes):
+            image_path = os.path.join(tmp_dir, f"{kind}-{megapixels:g}mp.png")
+            width, height = make_test_image(image_path, kind, megapixels)
+            print(f"Generated {kind} test image {width}x{height}")
+            for n_colors, tolerance, simplify_tolerance in itertools.product(
+                    args.n_colors, args.tolerances, args.simplify_tolerances):
+                options = dict(extra_options, n_colors=n_colors, tolerance=tolerance, simplify_tolerance=simplify_tolerance)
+                case = case_id(kind, megapixels, options)
+                profile_path = os.path.join(args.profile_dir, f"{case}.prof") if args.profile_dir else None
+                py_spy_path = os.path.join(args.py_spy_dir, f"{case}.speedscope.json") if args.py_spy_dir else None
+                result = run_case(image_path, os.path.join(tmp_dir, 'benchmark.svg'), options, profile_path, py_spy_path)
+                results[case] = result
+                if 'error' in result:
+                    print(f"{case:<32} FAILED: {result['error']}")
+                    continue
+                stages = " ".join(f"{name}={seconds:.2f}" for name, seconds in result['stages'].items())
+                print(f"{case:<32} {result['seconds']:7.2f} s  peak {result['peak_rss_mb']} MB  "
+                      f"{result['paths']} paths  {result['output_bytes']} bytes  [{stages}]")
+
+    if args.results:
+        with open(args.results, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        baseline = {
+            'machine': {'platform': platform.platform(), 'python': platform.python_version(), 'cpus': os.cpu_count()},
+            'results': results,
+        }
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one.")
+        return
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\nCompared with baseline recorded on {baseline['machine']['platform']} "
+          f"(Python {baseline['machine']['python']}); timings are only comparable on similar machines.")
+    rows = compare(results, baseline['results'])
+    for case, verdict, detail in rows:
+        print(f"{case:<32} {verdict:<15} {detail}")
+    regressions = [row for row in rows if row[1] in ('failed', 'slower', 'more-memory', 'output-changed')]
+    if args.check and regressions:
+        print(f"{len(regressions)} regression(s).")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Peak-memory benchmark for the SVG converter.
+
+Generates a flat-color test image of the requested size and converts it once
+with the default float64 pipeline and once with options['low_memory'], each in
+a fresh interpreter so the reported peak RSS belongs to that run only.
+
+Usage (from the repository root):
+    python benchmarks/svg_memory_benchmark.py --megapixels 4 --n-colors 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src')
+
+
+def peak_rss_bytes():
+    """Returns the peak resident set size of the current process, or None if unavailable."""
+    try:
+        import resource
+    except ImportError: # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def make_test_image(path, megapixels):
+    """Writes a 4:3 RGB image with a few flat color blocks and a disc."""
+    import numpy as np
+    from PIL import Image
+
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    img = np.empty((height, width, 3), dtype=np.uint8)
+    img[:] = (200, 30, 30)
+    img[height // 5:height * 3 // 5, width // 5:width * 3 // 4] = (20, 40, 220)
+    img[height * 2 // 3:, :] = (240, 240, 60)
+    yy, xx = np.ogrid[:height, :width]
+    img[(yy - height // 2) ** 2 + (xx - width // 2) ** 2 < (height // 5) ** 2] = (30, 200, 40)
+    Image.fromarray(img).save(path)
+    return width, height
+
+
+def run_single(image_path, output_path, options):
+    """Runs one conversion in this process and prints a JSON result line."""
+    import time
+    sys.path.insert(0, SRC_DIR)
+    from core import svg_converter
+
+    start = time.perf_counter()
+    svg_converter.convert_image_to_svg(image_path, output_path, options=options)
+    result = {
+        'options': options,
+        'seconds': round(time.perf_counter() - start, 3),
+        'peak_rss_mb': None,
+        'output_bytes': os.path.getsize(output_path),
+    }
+    peak = peak_rss_bytes()
+    if peak is not None:
+        result['peak_rss_mb'] = round(peak / (1024 * 1024), 1)
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare peak RSS of the default and low-memory SVG pipelines.")
+    parser.add_argument('--megapixels', type=float, default=4.0, help="Size of the generated test image.")
+    parser.add_argument('--n-colors', type=int, default=5)
+    parser.add_argument('--image', help="Use an existing image instead of generating one.")
+    parser.add_argument('--single', help=argparse.SUPPRESS) # Internal: JSON options for one child run
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        image_path = args.image
+        if image_path is None:
+            image_path = os.path.join(tmp_dir, 'memory_benchmark.png')
+            width, height = make_test_image(image_path, args.megapixels)
+            print(f"Generated {width}x{height} test image")
+        output_path = os.path.join(tmp_dir, 'memory_benchmark.svg')
+
+        if args.single is not None:
+            run_single(image_path, output_path, json.loads(args.single))
+            return
+
+        for low_memory in (False, True):
+            options = {'n_colors': args.n_colors, 'low_memory': low_memory}
+            # A fresh interpreter per mode keeps the peak RSS figures independent
+            completed = subprocess.run(
+                [sys.executable, __file__, '--image', image_path, '--single', json.dumps(options)],
+                capture_output=True, text=True, check=True
+            )
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            mode = 'low_memory' if low_memory else 'default'
+            print(f"{mode:>10}: {result['seconds']:8.2f} s  peak RSS {result['peak_rss_mb']} MB  "
+                  f"output {result['output_bytes']} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+"""
+Command-line interface for the image tools, without Tk.
+
+Every subcommand takes image files, glob patterns and folders (the 'icon'
+command takes folders) and processes them in parallel with --jobs workers.
+Results are written to stdout as JSON lines, one object per input as it
+finishes, followed by a summary object:
+
+    {"type": "item", "input": ..., "status": "done", "output": ..., "error": null, "seconds": 0.12}
+    {"type": "summary", "operation": "convert", "items": 10, "done": 9, "failed": 1, "seconds": 1.4}
+
+The 'scan' command instead lists the images below folders from a SQLite
+catalog (format and size read from file headers) that a rescan only
+updates for added, changed or removed files:
+
+    {"type": "image", "path": ..., "format": "PNG", "width": 640, "height": 480, "size": 12345, "error": null}
+    {"type": "summary", "operation": "scan", "seen": 100000, "added": 12, "unchanged": 99988, ...}
+
+Log messages go to stderr. The exit status is 0 when every item succeeded,
+1 when any failed and 2 for usage errors.
+
+Usage (from src/):
+    python -m cli convert photos/*.jpg --format PNG --jobs 4
+    python -m cli resize photos --recursive --width 800
+    python -m cli crop scan.png --x 10 --y 10 --width 400 --height 300
+    python -m cli svg logos --colors 6 --output-format svgz --timeout 60
+    python -m cli icon "projects/*" --icon folder.ico
+    python -m cli svg big_folder --state queue.json   # rerun to resume after an interruption
+    python -m cli scan photos --recursive --format JPEG --format PNG
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+# Configured before any core module is imported, so their basicConfig calls keep these settings
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+DEFAULT_CATALOG = os.path.join(os.path.expanduser('~'), '.multitool_image_catalog.sqlite')
+
+
+def expand_inputs(patterns, recursive=False, folders=False):
+    """
+    Resolves command-line inputs into a list of paths.
+
+    Args:
+        patterns (list): Files, folders and glob patterns ('**' matches subfolders).
+        recursive (bool): Also scan the subfolders of folder inputs.
+        folders (bool): Inputs are folders themselves (the 'icon' command).
+
+    Returns:
+        list: Paths in input order, without duplicates. Folders are expanded to the
+            images they contain unless folders is True.
+
+    Raises:
+        FileNotFoundError: If an input matches nothing.
+    """
+    from core import svg_batch # Folder scanning; light (no NumPy)
+
+    paths = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))
+        else:
+            matches = [pattern] if os.path.exists(pattern) else []
+        if not matches:
+            raise FileNotFoundError(f"No such file or folder: {pattern}")
+        for match in matches:
+            if folders:
+                if os.path.isdir(match):
+                    paths.append(match)
+            elif os.path.isdir(match):
+                paths.extend(svg_batch.find_images(match, recursive))
+            elif match.lower().endswith(svg_batch.IMAGE_EXTENSIONS) or not glob.has_magic(pattern):
+                paths.append(match) # Explicit files are kept whatever their extension
+    seen = set()
+    return [path for path in paths if not (path in seen or seen.add(path))]
+
+
+def build_params(args):
+    """Maps the parsed arguments of a subcommand onto batch_queue.run_item parameters."""
+    if args.command == 'convert':
+        return {'output_format': args.format, 'quality': args.quality}
+    if args.command == 'resize':
+        return {'width': args.width, 'height': args.height, 'keep_aspect': not args.no_keep_aspect}
+    if args.command == 'crop':
+        return {'x': args.x, 'y': args.y, 'width': args.width, 'height': args.height}
+    if args.command == 'svg':
+        options = json.loads(args.options) if args.options else {}
+        for key, value in (('n_colors', args.colors), ('tolerance', args.tolerance),
+                           ('simplify_tolerance', args.simplify), ('output_format', args.output_format)):
+            if value is not None:
+                options[key] = value
+        return {'options': options, 'timeout': args.timeout, 'memory_limit_mb': args.memory_limit_mb}
+    return {'icon_path': args.icon}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m cli', description="Headless image tools (no GUI needed).")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Log progress (INFO) to stderr.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_command(name, help_text, inputs_help="Image files, glob patterns or folders."):
+        sub = subparsers.add_parser(name, help=help_text, description=help_text)
+        sub.add_argument('inputs', nargs='+', help=inputs_help)
+        sub.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                         help="Items processed in parallel (default: CPU count).")
+        sub.add_argument('-r', '--recursive', action='store_true', help="Also scan subfolders of folder inputs.")
+        sub.add_argument('--state', help="JSON file the queue is saved to; rerunning with it resumes unfinished items.")
+        sub.add_argument('--retry-failed', action='store_true', help="With --state, also rerun items that failed.")
+        sub.add_argument('--results', help="Write all results as one JSON document to this file as well.")
+        return sub
+
+    sub = add_command('convert', "Convert images to another format.")
+    sub.add_argument('--format', required=True, type=str.upper, help="Output format, e.g. PNG, JPEG, WEBP.")
+    sub.add_argument('--quality', type=int, default=95, help="JPEG quality 1-100 (default: 95).")
+
+    sub = add_command('resize', "Resize images (written as <name>_resized.<ext>).")
+    sub.add_argument('--width', type=int)
+    sub.add_argument('--height', type=int)
+    sub.add_argument('--no-keep-aspect', action='store_true', help="Stretch to exactly --width x --height.")
+
+    sub = add_command('crop', "Crop images (written as <name>_cropped.<ext>).")
+    for name in ('x', 'y', 'width', 'height'):
+        sub.add_argument(f'--{name}', type=int, required=True)
+
+    sub = add_command('svg', "Vectorize images to SVG (svgz/npz) in isolated worker processes.")
+    sub.add_argument('--colors', type=int, help="Number of colors (n_colors).")
+    sub.add_argument('--tolerance', type=float, help="Color tolerance.")
+    sub.add_argument('--simplify', type=float, help="Path simplification tolerance.")
+    sub.add_argument('--output-format', choices=('svg', 'svgz', 'npz'))
+    sub.add_argument('--options', help="Further converter options as JSON, e.g. '{\"curve_fitting\": true}'.")
+    sub.add_argument('--timeout', type=float, help="Seconds allowed per image.")
+    sub.add_argument('--memory-limit-mb', type=float, help="Memory allowed per worker process.")
+
+    sub = subparsers.add_parser('scan', help="List the images below folders using the image catalog.",
+                                description="List the images below folders (format and dimensions from file "
+                                            "headers), keeping a catalog so rescans only read changed files.")
+    sub.add_argument('folders', nargs='+', help="Folders to scan.")
+    sub.add_argument('-r', '--recursive', action='store_true', help="Also scan subfolders.")
+    sub.add_argument('--catalog', default=DEFAULT_CATALOG,
+                     help=f"SQLite catalog file (default: {DEFAULT_CATALOG}; ':memory:' keeps none).")
+    sub.add_argument('--format', dest='formats', action='append', type=str.upper,
+                     help="Only list this format (repeatable), e.g. PNG, JPEG.")
+    sub.add_argument('--errors', action='store_true', help="Also list files that are not readable images.")
+    sub.add_argument('--summary-only', action='store_true', help="Update the catalog without listing the images.")
+
+    sub = add_command('icon', "Set a folder icon on several folders.", inputs_help="Folders or glob patterns.")
+    sub.add_argument('--icon', required=True, help="Icon file (.ico on Windows, .icns on macOS).")
+    return parser
+
+
+def run_scan(args, parser):
+    """The 'scan' command: updates the catalog for each folder and lists its images."""
+    from core import image_scanner
+
+    for folder in args.folders:
+        if not os.path.isdir(folder):
+            parser.error(f"Not a folder: {folder}")
+    try:
+        catalog = image_scanner.ImageCatalog(args.catalog)
+    except image_scanner.ImageScanError as e:
+        parser.error(str(e))
+    totals = {}
+    with catalog:
+        for folder in args.folders:
+            for key, value in catalog.scan(folder, args.recursive).items():
+                totals[key] = round(totals.get(key, 0) + value, 3)
+            if args.summary_only:
+                continue
+            for row in catalog.images(folder, args.formats, args.errors):
+                if not args.recursive and os.path.dirname(row['path']) != os.path.abspath(folder):
+                    continue
+                print(json.dumps({'type': 'image', 'path': row['path'], 'format': row['format'],
+                                  'width': row['width'], 'height': row['height'], 'size': row['size'],
+                                  'error': row['error']}))
+    summary = {'type': 'summary', 'operation': 'scan'}
+    summary.update(totals)
+    print(json.dumps(summary), flush=True)
+    return EXIT_FAILED if totals.get('errors') else EXIT_OK
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format=LOG_FORMAT, stream=sys.stderr)
+
+    if args.command == 'scan':
+        return run_scan(args, parser)
+
+    if args.command == 'resize' and args.width is None and args.height is None:
+        parser.error("resize needs --width and/or --height.")
+    try:
+        params = build_params(args)
+    except json.JSONDecodeError as e:
+        parser.error(f"--options is not valid JSON: {e}")
+
+    from core import batch_queue
+
+    start = time.perf_counter()
+    if args.state and os.path.exists(args.state):
+        try:
+            queue = batch_queue.BatchQueue.load(args.state)
+        except batch_queue.BatchQueueError as e:
+            parser.error(str(e))
+        if queue.operation != args.command:
+            parser.error(f"{args.state} holds a '{queue.operation}' queue, not '{args.command}'.")
+        queue.params = params
+    else:
+        try:
+            paths = expand_inputs(args.inputs, args.recursive, folders=args.command == 'icon')
+        except FileNotFoundError as e:
+            parser.error(str(e))
+        queue = batch_queue.BatchQueue(args.command, params, args.state)
+        queue.add_paths(paths)
+        queue.save()
+
+    print_lock = threading.Lock()
+
+    def on_progress(index, item):
+        if item['status'] not in (batch_queue.ITEM_DONE, batch_queue.ITEM_FAILED, batch_queue.ITEM_CANCELLED):
+            return
+        line = json.dumps({'type': 'item', 'input': item['path'], 'status': item['status'],
+                           'output': item['output'], 'error': item['error'], 'seconds': item['seconds']})
+        with print_lock:
+            print(line, flush=True)
+
+    try:
+        counts = batch_queue.run_queue(queue, workers=max(1, args.jobs), retry_failed=args.retry_failed,
+                                       progress_callback=on_progress)
+    except KeyboardInterrupt:
+        # Finished items are saved (with --state); running ones count as unfinished
+        logging.warning("Interrupted.")
+        counts = queue.counts()
+
+    summary = {'type': 'summary', 'operation': queue.operation, 'items': len(queue.items),
+               'seconds': round(time.perf_counter() - start, 3)}
+    summary.update(counts)
+    print(json.dumps(summary), flush=True)
+    if args.results:
+        with open(args.results, 'w', encoding='utf-8') as f:
+            json.dump({'summary': summary, 'items': queue.items}, f, indent=2)
+
+    unfinished = len(queue.items) - counts.get(batch_queue.ITEM_DONE, 0)
+    return EXIT_FAILED if unfinished else EXIT_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,344 @@
+import os
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core import svg_batch
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Operations a queue can run; 'icon' items are folders, every other operation takes image files
+OPERATIONS = ('convert', 'resize', 'crop', 'svg', 'icon')
+QUEUE_FORMAT_VERSION = 1
+
+ITEM_PENDING = 'pending'
+ITEM_RUNNING = 'running'
+ITEM_DONE = 'done'
+ITEM_FAILED = 'failed'
+ITEM_CANCELLED = 'cancelled'
+# Items a resumed queue runs again ('running' means the previous run was interrupted)
+UNFINISHED_STATES = (ITEM_PENDING, ITEM_RUNNING, ITEM_CANCELLED)
+# A running queue is saved after this many finished items, or once a finished item has waited this long
+SAVE_EVERY_ITEMS = 25
+SAVE_INTERVAL_SECONDS = 2.0
+
+
+class BatchQueueError(Exception):
+    """Custom exception for batch queue errors."""
+    pass
+
+
+def _suffixed_path(input_path, suffix):
+    """Output path next to the input with a suffix, as the Modifier tab names its results."""
+    directory, filename = os.path.split(input_path)
+    name, ext = os.path.splitext(filename)
+    return os.path.join(directory, f"{name}_{suffix}{ext}")
+
+
+def _optional_int(value):
+    return int(value) if value not in (None, '') else None
+
+
+def run_item(operation, input_path, params, cancel_token=None):
+    """
+    Runs one queue operation on one input with the core functions.
+
+    Args:
+        operation (str): One of OPERATIONS.
+        input_path (str): Image file, or the folder for 'icon'.
+        params (dict): Flat operation parameters:
+            convert: output_format, quality.
+            resize: width, height (either may be empty), keep_aspect.
+            crop: x, y, width, height.
+            svg: options (convert_image_to_svg options dict); run_queue also reads
+                timeout and memory_limit_mb (per image, see svg_batch).
+            icon: icon_path.
+        cancel_token (CancellationToken, optional): Passed on to the SVG conversion.
+
+    Returns:
+        str: The output path (the folder for 'icon').
+
+    Raises:
+        BatchQueueError: For an unknown operation or a failed icon change.
+        Exception: Whatever the core function raises for this input.
+    """
+    # Core modules are imported per operation, so a command-line run only loads what it uses
+    if operation == 'convert':
+        from core import image_converter
+        return image_converter.convert_and_resize_image(
+            input_path=input_path,
+            output_format=params['output_format'],
+            quality=int(params.get('quality', 95))
+        )
+    if operation == 'resize':
+        from core import image_modifier
+        return image_modifier.resize_image(
+            input_path=input_path,
+            output_path=_suffixed_path(input_path, "resized"),
+            width=_optional_int(params.get('width')),
+            height=_optional_int(params.get('height')),
+            keep_aspect_ratio=bool(params.get('keep_aspect', True))
+        )
+    if operation == 'crop':
+        from core import image_modifier
+        return image_modifier.crop_image(
+            input_path=input_path,
+            output_path=_suffixed_path(input_path, "cropped"),
+            x=int(params['x']),
+            y=int(params['y']),
+            width=int(params['width']),
+            height=int(params['height'])
+        )
+    if operation == 'svg':
+        from core import svg_converter # Heavy (NumPy, scikit-learn): only imported for SVG work
+        return svg_converter.convert_image_to_svg(input_path, options=params.get('options'), cancel_token=cancel_token)
+    if operation == 'icon':
+        from core import folder_icon_setter
+        if not folder_icon_setter.set_folder_icon(params['icon_path'], input_path):
+            raise BatchQueueError(f"Could not set the icon for {input_path}.")
+        return input_path
+    raise BatchQueueError(f"Unknown batch operation: {operation!r}")
+
+
+def throughput_and_eta(completed, remaining, elapsed):
+    """
+    Items per second and the estimated seconds left for the current run.
+
+    Returns:
+        tuple: (items_per_second, eta_seconds); eta_seconds is None until an item has finished.
+    """
+    if completed <= 0 or elapsed <= 0:
+        return 0.0, None
+    rate = completed / elapsed
+    return rate, remaining / rate
+
+
+class BatchQueue:
+    """
+    A list of inputs processed with one operation, persisted as JSON so an
+    interrupted run can be resumed.
+
+    Every item is a dict with 'path', 'status' (ITEM_*), 'output', 'error' and
+    'seconds'. Finished items are saved to state_path in batches (atomically,
+    via a temporary file) and run_queue saves once more when it stops, so after
+    a crash or a closed window load() picks up where the run stopped; at worst
+    the last few finished items run again.
+
+    Args:
+        operation (str): One of OPERATIONS.
+        params (dict, optional): Parameters for run_item.
+        state_path (str, optional): JSON file the queue is saved to.
+    """
+
+    def __init__(self, operation, params=None, state_path=None):
+        if operation not in OPERATIONS:
+            raise BatchQueueError(f"Unknown batch operation: {operation!r}")
+        self.operation = operation
+        self.params = dict(params or {})
+        self.state_path = state_path
+        self.items = []
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock() # Serializes the file writes, which happen outside _lock
+        self._unsaved = 0 # Finished items not saved yet
+        self._saved_at = time.monotonic()
+        self._snapshots = 0
+        self._written = 0 # Number of the newest snapshot on disk
+
+    def add_paths(self, paths, recursive=False):
+        """
+        Adds files, or the images inside folders, skipping paths already queued.
+
+        For the 'icon' operation folders are the items themselves.
+
+        Returns:
+            int: Number of items added.
+        """
+        with self._lock:
+            known = {item['path'] for item in self.items}
+            added = 0
+            for path in paths:
+                path = os.path.abspath(path)
+                if os.path.isdir(path) and self.operation != 'icon':
+                    candidates = svg_batch.find_images(path, recursive)
+                else:
+                    candidates = [path]
+                for candidate in candidates:
+                    if candidate not in known:
+                        known.add(candidate)
+                        self.items.append(_new_item(candidate))
+                        added += 1
+            return added
+
+    def remove(self, indices):
+        with self._lock:
+            drop = set(indices)
+            self.items = [item for i, item in enumerate(self.items) if i not in drop]
+
+    def unfinished(self, retry_failed=False):
+        """Indices of the items a (resumed) run should process."""
+        states = UNFINISHED_STATES + ((ITEM_FAILED,) if retry_failed else ())
+        with self._lock:
+            return [i for i, item in enumerate(self.items) if item['status'] in states]
+
+    def update(self, index, status, output=None, error=None, seconds=None):
+        """
+        Records an item's new state. Thread-safe.
+
+        The queue is saved every SAVE_EVERY_ITEMS finished items or
+        SAVE_INTERVAL_SECONDS, not on every change; 'running' is never saved
+        on its own, as a resumed queue treats it like 'pending' anyway.
+        """
+        with self._lock:
+            item = self.items[index]
+            item['status'] = status
+            if output is not None:
+                item['output'] = output
+            item['error'] = error
+            if seconds is not None:
+                item['seconds'] = round(seconds, 3)
+            if status != ITEM_RUNNING:
+                self._unsaved += 1
+            due = self._unsaved >= SAVE_EVERY_ITEMS or (
+                self._unsaved > 0 and time.monotonic() - self._saved_at >= SAVE_INTERVAL_SECONDS)
+            item = dict(item)
+        if due:
+            self.save()
+        return item
+
+    def counts(self):
+        """Number of items per status."""
+        with self._lock:
+            counts = {}
+            for item in self.items:
+                counts[item['status']] = counts.get(item['status'], 0) + 1
+            return counts
+
+    def save(self):
+        """Writes the queue to state_path. The items are copied under the lock and written outside it."""
+        with self._lock:
+            state_path = self.state_path
+            if not state_path:
+                return
+            state = {'format_version': QUEUE_FORMAT_VERSION, 'operation': self.operation,
+                     'params': dict(self.params), 'items': [dict(item) for item in self.items]}
+            self._unsaved = 0
+            self._saved_at = time.monotonic()
+            self._snapshots += 1
+            snapshot = self._snapshots
+        with self._save_lock:
+            if snapshot < self._written:
+                return # A newer snapshot got here first
+            temp_path = state_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(temp_path, state_path)
+            self._written = snapshot
+
+    @classmethod
+    def load(cls, state_path):
+        """
+        Reads a queue saved by save().
+
+        Raises:
+            FileNotFoundError: If state_path does not exist.
+            BatchQueueError: If the file is not a queue this version understands.
+        """
+        with open(state_path, 'r', encoding='utf-8') as f:
+            try:
+                state = json.load(f)
+            except json.JSONDecodeError as e:
+                raise BatchQueueError(f"Corrupt batch queue file {state_path}: {e}") from None
+        if state.get('format_version') != QUEUE_FORMAT_VERSION:
+            raise BatchQueueError(f"Unsupported batch queue file version in {state_path}.")
+        queue = cls(state['operation'], state.get('params'), state_path)
+        queue.items = [dict(_new_item(item['path']), **item) for item in state.get('items', [])]
+        return queue
+
+
+def _new_item(path):
+    return {'path': path, 'status': ITEM_PENDING, 'output': None, 'error': None, 'seconds': None}
+
+
+def run_queue(queue, workers=1, retry_failed=False, progress_callback=None, cancel_token=None):
+    """
+    Processes the unfinished items of a queue with several workers.
+
+    SVG items go through svg_batch (separate worker processes, so one image
+    cannot stall or crash the run); every other operation runs on a thread pool,
+    as Pillow does the heavy lifting outside the GIL. Cancelling leaves the
+    remaining items 'cancelled', which a later run picks up again.
+
+    Args:
+        queue (BatchQueue): The queue; its state is saved as items finish and when the run stops.
+        workers (int): Items processed at the same time.
+        retry_failed (bool): Also rerun items that failed before.
+        progress_callback (callable, optional): Called as progress_callback(index, item)
+            whenever an item starts or finishes, from a worker thread.
+        cancel_token (CancellationToken, optional): Stops the run.
+
+    Returns:
+        dict: Number of items per status after the run.
+    """
+    indices = queue.unfinished(retry_failed)
+    if not indices:
+        return queue.counts()
+    workers = max(1, int(workers))
+
+    def report(index, *args, **kwargs):
+        item = queue.update(index, *args, **kwargs)
+        if progress_callback is not None:
+            progress_callback(index, item)
+
+    try:
+        if queue.operation == 'svg':
+            _run_svg_items(queue, indices, workers, report, cancel_token)
+        else:
+            _run_thread_items(queue, indices, workers, report, cancel_token)
+    finally:
+        queue.save() # Also after a cancel or an interrupt, so the finished items are not run again
+    return queue.counts()
+
+
+def _run_thread_items(queue, indices, workers, report, cancel_token):
+    """Runs non-SVG items on a thread pool."""
+
+    def process(index):
+        if cancel_token is not None and cancel_token.cancelled:
+            report(index, ITEM_CANCELLED)
+            return
+        report(index, ITEM_RUNNING)
+        start = time.perf_counter()
+        try:
+            output = run_item(queue.operation, queue.items[index]['path'], queue.params, cancel_token)
+        except Exception as e:
+            logging.warning(f"Batch item {queue.items[index]['path']} failed: {e}")
+            report(index, ITEM_FAILED, error=str(e), seconds=time.perf_counter() - start)
+        else:
+            report(index, ITEM_DONE, output=output, seconds=time.perf_counter() - start)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch-item') as pool:
+        for future in [pool.submit(process, index) for index in indices]:
+            future.result()
+
+
+def _run_svg_items(queue, indices, workers, report, cancel_token):
+    """Runs SVG items through svg_batch.convert_batch_to_svg and maps its records onto the queue."""
+    by_path = {queue.items[index]['path']: index for index in indices}
+
+    def on_record(done, total, record):
+        index = by_path[record['input']]
+        if record['status'] == svg_batch.STATUS_OK:
+            report(index, ITEM_DONE, output=record['output'], seconds=record.get('seconds'))
+        elif record['status'] == svg_batch.STATUS_CANCELLED:
+            report(index, ITEM_CANCELLED)
+        else:
+            error = record.get('error') or record['status']
+            report(index, ITEM_FAILED, error=f"{record['status']}: {error}", seconds=record.get('seconds'))
+
+    svg_batch.convert_batch_to_svg(list(by_path), options=queue.params.get('options'), jobs=workers,
+                                   timeout=queue.params.get('timeout'),
+                                   memory_limit_mb=queue.params.get('memory_limit_mb'),
+                                   progress_callback=on_record, cancel_token=cancel_token)
@@ -0,0 +1,331 @@
+import os
+import time
+import struct
+import logging
+import sqlite3
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# File extensions treated as images (the same set the batch tools accept)
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.ico', '.webp', '.tif', '.tiff')
+# Bytes read up front for sniffing; enough for every fixed-layout header below
+HEADER_BYTES = 64
+# Catalog rows written per transaction during a scan
+COMMIT_EVERY = 1000
+CATALOG_SCHEMA_VERSION = 1
+
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC} # Start-of-frame markers carry the size
+
+
+class ImageScanError(Exception):
+    """Custom exception for image scanning and catalog errors."""
+    pass
+
+
+def iter_image_entries(root, recursive=True, extensions=IMAGE_EXTENSIONS):
+    """
+    Iterates over the image files below root as os.DirEntry objects, without building a list.
+
+    Uses os.scandir, whose entries carry the file type (and on Windows the
+    stat result) from the directory listing itself, so large trees are walked
+    without a stat call per entry. Unreadable folders are logged and skipped;
+    symlinked folders are not followed.
+
+    Args:
+        root (str): Folder to scan.
+        recursive (bool): Also scan subfolders (default: True).
+        extensions (tuple): Lower-case file extensions to yield.
+
+    Returns:
+        generator: os.DirEntry per image file, in directory order.
+
+    Raises:
+        FileNotFoundError: If root is not a folder.
+    """
+    if not os.path.isdir(root): # Checked here, not when iteration starts
+        raise FileNotFoundError(f"Folder not found: {root}")
+    return _walk(root, recursive, extensions)
+
+
+def _walk(root, recursive, extensions):
+    pending = [root]
+    while pending:
+        folder = pending.pop()
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                pending.append(entry.path)
+                        elif entry.name.lower().endswith(extensions) and entry.is_file():
+                            yield entry
+                    except OSError as e: # Entry vanished or is unreadable mid-scan
+                        logging.debug(f"Skipping {entry.path}: {e}")
+        except (PermissionError, FileNotFoundError, NotADirectoryError) as e:
+            logging.warning(f"Cannot read folder {folder}: {e}")
+
+
+def iter_image_paths(root, recursive=True, extensions=IMAGE_EXTENSIONS):
+    """Like iter_image_entries, but yields paths."""
+    for entry in iter_image_entries(root, recursive, extensions):
+        yield entry.path
+
+
+def _jpeg_size(f):
+    """Walks the JPEG marker segments up to the first start-of-frame, seeking past everything else."""
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte and byte != b'\xff': # Padding or garbage between segments
+            byte = f.read(1)
+        while byte == b'\xff': # Fill bytes
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7: # Markers without a length
+            continue
+        if marker == 0xD9: # End of image
+            return None
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        if marker in _JPEG_SOF_MARKERS:
+            segment = f.read(5)
+            if len(segment) < 5:
+                return None
+            height, width = struct.unpack('>HH', segment[1:5])
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def _sniff_header(header, f):
+    """Format and size from a fixed-layout header, or None if the format needs Pillow."""
+    if header.startswith(b'\x89PNG\r\n\x1a\n') and header[12:16] == b'IHDR':
+        width, height = struct.unpack('>II', header[16:24])
+        return 'PNG', width, height
+    if header[:6] in (b'GIF87a', b'GIF89a'):
+        width, height = struct.unpack('<HH', header[6:10])
+        return 'GIF', width, height
+    if header.startswith(b'BM') and len(header) >= 26:
+        dib_size = struct.unpack('<I', header[14:18])[0]
+        if dib_size == 12: # OS/2 BITMAPCOREHEADER
+            width, height = struct.unpack('<HH', header[18:22])
+        else:
+            width, height = struct.unpack('<ii', header[18:26])
+        return 'BMP', width, abs(height) # Negative height means top-down rows
+    if header.startswith(b'RIFF') and header[8:12] == b'WEBP':
+        chunk = header[12:16]
+        if chunk == b'VP8 ':
+            width, height = struct.unpack('<HH', header[26:30])
+            return 'WEBP', width & 0x3FFF, height & 0x3FFF
+        if chunk == b'VP8L':
+            bits = struct.unpack('<I', header[21:25])[0]
+            return 'WEBP', (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X':
+            width = int.from_bytes(header[24:27], 'little') + 1
+            height = int.from_bytes(header[27:30], 'little') + 1
+            return 'WEBP', width, height
+    if header.startswith(b'\xff\xd8'):
+        size = _jpeg_size(f)
+        if size is not None:
+            return ('JPEG',) + size
+    return None
+
+
+def sniff_image(path):
+    """
+    Reads an image's format and dimensions from its header, without decoding pixels.
+
+    PNG, GIF, BMP, WebP and JPEG are parsed directly (JPEG by seeking from
+    marker to marker); other formats (TIFF, ICO, ...) use Pillow's lazy open,
+    which also only reads the header.
+
+    Returns:
+        tuple: (format, width, height), format as Pillow names it (e.g. 'PNG').
+
+    Raises:
+        ImageScanError: If the file is not a readable image.
+        OSError: If the file cannot be read.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(HEADER_BYTES)
+        try:
+            sniffed = _sniff_header(header, f)
+        except struct.error:
+            sniffed = None
+    if sniffed is not None:
+        return sniffed
+
+    from PIL import Image, UnidentifiedImageError # Only needed for the less common formats
+    try:
+        with Image.open(path) as img:
+            return img.format, img.size[0], img.size[1]
+    except (UnidentifiedImageError, SyntaxError, ValueError) as e:
+        raise ImageScanError(f"Not a readable image: {path} ({e})") from None
+
+
+class ImageCatalog:
+    """
+    SQLite index of the images below one or more folders.
+
+    One row per file holds its size and modification time (the change key)
+    plus the sniffed format and dimensions, or the error that prevented
+    sniffing. scan() only sniffs files whose size or mtime differ from their
+    row, and removes rows of files that disappeared, so re-scanning a large,
+    mostly unchanged tree costs little more than listing it.
+
+    Args:
+        db_path (str): Catalog file (':memory:' for a throwaway catalog).
+
+    Raises:
+        ImageScanError: If the file cannot be opened as a catalog.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        try:
+            self._db = sqlite3.connect(db_path)
+        except sqlite3.Error as e:
+            raise ImageScanError(f"Cannot open the image catalog {db_path}: {e}") from None
+        try:
+            self._db.execute("PRAGMA journal_mode=WAL" if db_path != ':memory:' else "PRAGMA journal_mode=MEMORY")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            version = self._db.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, CATALOG_SCHEMA_VERSION):
+                raise ImageScanError(f"Unsupported image catalog version {version} in {db_path}.")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS images ("
+                " path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+                " format TEXT, width INTEGER, height INTEGER, error TEXT, scanned_at REAL NOT NULL)"
+            )
+            self._db.execute(f"PRAGMA user_version={CATALOG_SCHEMA_VERSION}")
+            self._db.commit()
+        except (sqlite3.Error, ImageScanError) as e:
+            self._db.close()
+            if isinstance(e, ImageScanError):
+                raise
+            raise ImageScanError(f"Cannot open the image catalog {db_path}: {e}") from None
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def _prefix_range(root):
+        """Path bounds selecting everything below root with an index range instead of LIKE."""
+        prefix = os.path.join(os.path.abspath(root), '')
+        return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+    def scan(self, root, recursive=True, progress_callback=None, cancel_token=None):
+        """
+        Brings the catalog up to date with the images below root.
+
+        Args:
+            root (str): Folder to scan.
+            recursive (bool): Include subfolders (default: True). A non-recursive
+                scan leaves the rows of subfolders alone.
+            progress_callback (callable, optional): Called as progress_callback(seen)
+                every COMMIT_EVERY files.
+            cancel_token (CancellationToken, optional): Stops the scan; what was
+                scanned so far is kept, nothing is removed.
+
+        Returns:
+            dict: Counts of 'seen', 'added', 'updated', 'unchanged', 'removed'
+                and 'errors' files, plus 'seconds'.
+
+        Raises:
+            FileNotFoundError: If root is not a folder.
+        """
+        start = time.perf_counter()
+        root = os.path.abspath(root)
+        low, high = self._prefix_range(root)
+        known = {path: (size, mtime_ns) for path, size, mtime_ns in self._db.execute(
+            "SELECT path, size, mtime_ns FROM images WHERE path >= ? AND path < ?", (low, high))}
+        stats = {'seen': 0, 'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0, 'errors': 0}
+        rows = []
+        cancelled = False
+
+        for entry in iter_image_entries(root, recursive):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue # Deleted while scanning
+            stats['seen'] += 1
+            previous = known.pop(entry.path, None)
+            if previous == (stat.st_size, stat.st_mtime_ns):
+                stats['unchanged'] += 1
+            else:
+                stats['updated' if previous else 'added'] += 1
+                try:
+                    image_format, width, height = sniff_image(entry.path)
+                    error = None
+                except (ImageScanError, OSError) as e:
+                    image_format = width = height = None
+                    error = str(e)
+                    stats['errors'] += 1
+                rows.append((entry.path, stat.st_size, stat.st_mtime_ns, image_format, width, height, error, time.time()))
+            if stats['seen'] % COMMIT_EVERY == 0:
+                self._write(rows)
+                rows = []
+                if progress_callback is not None:
+                    progress_callback(stats['seen'])
+                if cancel_token is not None and cancel_token.cancelled:
+                    cancelled = True
+                    break
+        self._write(rows)
+
+        if not cancelled:
+            # Whatever was not seen again is gone (below the scanned depth only)
+            removed = [path for path in known if recursive or os.path.dirname(path) == root]
+            self._db.executemany("DELETE FROM images WHERE path = ?", ((path,) for path in removed))
+            self._db.commit()
+            stats['removed'] = len(removed)
+        stats['seconds'] = round(time.perf_counter() - start, 3)
+        logging.info(f"Scanned {root}: {stats}")
+        return stats
+
+    def _write(self, rows):
+        if rows:
+            self._db.executemany("INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+
+    def images(self, root=None, formats=None, include_errors=False):
+        """
+        Yields catalog rows as dicts ('path', 'size', 'mtime_ns', 'format', 'width',
+        'height', 'error'), ordered by path.
+
+        Args:
+            root (str, optional): Only images below this folder.
+            formats (iterable, optional): Only these formats, e.g. ('PNG', 'JPEG').
+            include_errors (bool): Also yield files that could not be sniffed.
+        """
+        query = "SELECT path, size, mtime_ns, format, width, height, error FROM images WHERE 1=1"
+        params = []
+        if root is not None:
+            query += " AND path >= ? AND path < ?"
+            params.extend(self._prefix_range(root))
+        if formats:
+            formats = [image_format.upper() for image_format in formats]
+            query += f" AND format IN ({', '.join('?' * len(formats))})"
+            params.extend(formats)
+        if not include_errors:
+            query += " AND error IS NULL"
+        query += " ORDER BY path"
+        columns = ('path', 'size', 'mtime_ns', 'format', 'width', 'height', 'error')
+        for row in self._db.execute(query, params):
+            yield dict(zip(columns, row))
+
+    def count(self, root=None):
+        if root is None:
+            return self._db.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+        return self._db.execute("SELECT COUNT(*) FROM images WHERE path >= ? AND path < ?",
+                                self._prefix_range(root)).fetchone()[0]
@@ -0,0 +1,125 @@
+import os
+import mmap
+import logging
+
+import numpy as np
+from PIL import Image
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Pillow raw modes that map onto a plain array: rawmode -> (dtype, bytes per pixel, channel selection)
+# The selection is applied as a view, so e.g. BGR pixels come out as RGB without a copy.
+RAW_LAYOUTS = {
+    'L': (np.uint8, 1, None),
+    'RGB': (np.uint8, 3, None),
+    'BGR': (np.uint8, 3, slice(None, None, -1)),
+    'RGBX': (np.uint8, 4, slice(0, 3)),
+    'BGRX': (np.uint8, 4, slice(2, None, -1)),
+    'RGBA': (np.uint8, 4, None),
+    'I;16': (np.dtype('<u2'), 2, None),
+}
+
+
+def _raw_layout(pil_img):
+    """
+    Describes where an uncompressed image keeps its pixels on disk.
+
+    Returns:
+        tuple or None: (offset, row_stride, bottom_up, rawmode), or None if the pixels
+            are compressed or not stored as one contiguous block of full-width rows.
+    """
+    tiles = pil_img.tile
+    if not tiles or any(tile[0] != 'raw' for tile in tiles):
+        return None
+    width, height = pil_img.size
+    args = tiles[0][3]
+    rawmode, stride, ystep = (args, 0, 1) if isinstance(args, str) else (tuple(args) + (0, 1))[:3]
+    if rawmode not in RAW_LAYOUTS:
+        return None
+    stride = stride or width * RAW_LAYOUTS[rawmode][1]
+    bottom_up = ystep == -1
+    if bottom_up and len(tiles) > 1:
+        return None
+
+    # Strips (e.g. TIFF RowsPerStrip) are fine as long as they follow each other on disk
+    offset = tiles[0][2]
+    for tile in tiles:
+        left, top, right, bottom = tile[1]
+        tile_args = tile[3]
+        tile_rawmode = tile_args if isinstance(tile_args, str) else tile_args[0]
+        if left != 0 or right != width or tile_rawmode != rawmode or tile[2] != offset + top * stride:
+            return None
+    if tiles[-1][1][3] != height or tiles[0][1][1] != 0:
+        return None
+    return offset, stride, bottom_up, rawmode
+
+
+def open_mapped(image_path):
+    """
+    Opens an uncompressed raster as a read-only memory-mapped array.
+
+    Pixels are not read into private memory: slices of the returned array are
+    paged in from the file on access, and every process mapping the same file
+    shares the operating system's page cache. Supported are .npy files and
+    uncompressed BMP, TIFF, PPM/PGM and similar files whose pixels Pillow
+    would read with its 'raw' decoder (8-bit gray/RGB/RGBA, 16-bit gray).
+
+    Args:
+        image_path (str): Path to the image.
+
+    Returns:
+        np.ndarray or None: HxW or HxWxC array view of the file (RGB channel order),
+            or None if the file cannot be mapped (compressed, palette, EXIF-rotated, ...).
+    """
+    if image_path.lower().endswith('.npy'):
+        try:
+            array = np.load(image_path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            logging.info(f"Cannot memory-map {image_path}: {e}")
+            return None
+        if array.ndim not in (2, 3):
+            return None
+        return array
+
+    try:
+        with Image.open(image_path) as pil_img:
+            if getattr(pil_img, 'n_frames', 1) > 1:
+                return None # Multi-page files go through the sequence reader
+            exif = pil_img.getexif()
+            if exif.get(0x0112, 1) not in (1, None): # Orientation tag would need a transpose
+                return None
+            layout = _raw_layout(pil_img)
+            width, height = pil_img.size
+    except OSError as e:
+        logging.info(f"Cannot memory-map {image_path}: {e}")
+        return None
+    if layout is None:
+        return None
+
+    offset, stride, bottom_up, rawmode = layout
+    dtype, pixel_bytes, selection = RAW_LAYOUTS[rawmode]
+    if offset + stride * height > os.path.getsize(image_path):
+        return None # Truncated file; let the regular decoder report it
+    if height == 0 or width == 0:
+        return None
+    rows = np.memmap(image_path, dtype=np.uint8, mode='r', offset=offset, shape=(height, stride))
+    pixels = rows[:, :width * pixel_bytes].view(dtype)
+    channels = pixel_bytes // np.dtype(dtype).itemsize
+    if channels > 1:
+        pixels = pixels.reshape(height, width, channels)
+        if selection is not None:
+            pixels = pixels[..., selection]
+    if bottom_up:
+        pixels = pixels[::-1]
+    logging.info(f"Memory-mapped {image_path}: {width}x{height} {rawmode} at offset {offset}.")
+    return pixels
+
+
+def is_file_backed(array):
+    """True if a NumPy array is a view of a memory-mapped file rather than private memory."""
+    while isinstance(array, np.ndarray):
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return isinstance(array, mmap.mmap)
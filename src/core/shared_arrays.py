@@ -0,0 +1,198 @@
+import atexit
+import inspect
+import logging
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Python 3.13+ can attach without registering the segment with the resource tracker
+_SUPPORTS_TRACK = 'track' in inspect.signature(shared_memory.SharedMemory).parameters
+
+_owned = {} # Segment name -> SharedArray created by this process
+_owned_lock = threading.Lock()
+# Serializes segment creation/attachment while the resource tracker is bypassed (Python < 3.13)
+_tracker_lock = threading.Lock()
+
+
+class SharedArrayError(Exception):
+    """Custom exception for shared memory array errors."""
+    pass
+
+
+class SharedArrayDescriptor:
+    """
+    Picklable handle of a shared array: the segment name plus shape and dtype.
+
+    Only the descriptor travels between processes; the pixels stay in the
+    named segment and are mapped by whoever calls attach().
+    """
+
+    __slots__ = ('name', 'shape', 'dtype')
+
+    def __init__(self, name, shape, dtype):
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype).str
+
+    @property
+    def nbytes(self):
+        return int(np.prod(self.shape, dtype=np.int64)) * np.dtype(self.dtype).itemsize
+
+    def __getstate__(self):
+        return self.name, self.shape, self.dtype
+
+    def __setstate__(self, state):
+        self.name, self.shape, self.dtype = state
+
+    def __repr__(self):
+        return f"SharedArrayDescriptor({self.name!r}, {self.shape}, {self.dtype!r})"
+
+
+class SharedArray:
+    """
+    A NumPy array in a named shared memory segment, owned by the creating process.
+
+    The owner decides the segment's lifetime: unlink() (or leaving the with
+    block) removes it once every consumer is done. Segments still owned when the
+    interpreter exits are unlinked then, so an exception between create and
+    unlink does not leak memory until reboot.
+
+    Attributes:
+        array (np.ndarray): The shared array (None after close/unlink).
+        descriptor (SharedArrayDescriptor): Handle to pass to other processes.
+    """
+
+    def __init__(self, shape, dtype):
+        descriptor_nbytes = int(np.prod(shape, dtype=np.int64)) * np.dtype(dtype).itemsize
+        # Zero-size segments are not allowed; an empty array still gets one byte
+        with _tracker_lock:
+            self._shm = shared_memory.SharedMemory(create=True, size=max(1, descriptor_nbytes))
+        self.descriptor = SharedArrayDescriptor(self._shm.name, shape, dtype)
+        self.array = np.ndarray(self.descriptor.shape, dtype=self.descriptor.dtype, buffer=self._shm.buf)
+        self._unlinked = False
+        with _owned_lock:
+            _owned[self._shm.name] = self
+        logging.debug(f"Created shared array {self.descriptor}.")
+
+    @classmethod
+    def from_array(cls, array):
+        """Creates a segment with a copy of array (the only copy the handoff needs)."""
+        shared = cls(array.shape, array.dtype)
+        np.copyto(shared.array, array)
+        return shared
+
+    @property
+    def name(self):
+        return self.descriptor.name
+
+    def close(self):
+        """Unmaps the segment in this process; the segment itself stays available."""
+        self.array = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # Views of the array are still alive; the mapping goes away with them
+            logging.debug(f"Shared array {self.name} still has exported views; leaving it mapped.")
+
+    def unlink(self):
+        """Unmaps and removes the segment. Safe to call more than once."""
+        if self._unlinked:
+            return
+        self._unlinked = True
+        self.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+        with _owned_lock:
+            _owned.pop(self.name, None)
+        logging.debug(f"Unlinked shared array {self.name}.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.unlink()
+
+
+class AttachedArray:
+    """A consumer's view of a SharedArray; close() unmaps it but never removes the segment."""
+
+    def __init__(self, descriptor):
+        try:
+            if _SUPPORTS_TRACK:
+                self._shm = shared_memory.SharedMemory(name=descriptor.name, track=False)
+            else:
+                self._shm = _attach_untracked(descriptor.name)
+        except FileNotFoundError:
+            raise SharedArrayError(f"Shared array {descriptor.name} does not exist (already unlinked?).") from None
+        if self._shm.size < descriptor.nbytes:
+            self._shm.close()
+            raise SharedArrayError(f"Shared segment {descriptor.name} is smaller than {descriptor}.")
+        self.descriptor = descriptor
+        self.array = np.ndarray(descriptor.shape, dtype=descriptor.dtype, buffer=self._shm.buf)
+
+    def close(self):
+        self.array = None
+        try:
+            self._shm.close()
+        except BufferError:
+            logging.debug(f"Attached array {self.descriptor.name} still has exported views; leaving it mapped.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _attach_untracked(name):
+    """
+    Attaches to a segment without registering it with the resource tracker.
+
+    Before Python 3.13 attaching registers the segment as if it had been created
+    here, so the tracker would unlink it (and warn about a leak) when this
+    consumer exits while the owner still uses it. Unregistering afterwards is not
+    an option either: spawned workers share the owner's tracker, which would then
+    forget the owner's registration too.
+    """
+    from multiprocessing import resource_tracker
+    with _tracker_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None if rtype == 'shared_memory' else register(name, rtype)
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def attach(descriptor):
+    """
+    Maps a shared array created by another process.
+
+    Args:
+        descriptor (SharedArrayDescriptor): Handle received from the owner.
+
+    Returns:
+        AttachedArray: Use as a context manager; .array is the shared NumPy array.
+
+    Raises:
+        SharedArrayError: If the segment no longer exists or is too small.
+    """
+    return AttachedArray(descriptor)
+
+
+def unlink_all():
+    """Removes every segment this process still owns (called at interpreter exit)."""
+    with _owned_lock:
+        leftovers = list(_owned.values())
+    for shared in leftovers:
+        logging.debug(f"Unlinking leftover shared array {shared.name}.")
+        shared.unlink()
+
+
+atexit.register(unlink_all)
@@ -0,0 +1,339 @@
+import os
+import json
+import time
+import logging
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import wait
+
+from core import image_scanner
+
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Raster formats picked up when a directory is scanned
+IMAGE_EXTENSIONS = image_scanner.IMAGE_EXTENSIONS
+# How often running jobs are checked against their limits
+WATCHDOG_INTERVAL = 0.1
+# Workers in a row that may exit before finishing any job (e.g. an import error in
+# the spawned interpreter) before the queued jobs are given up as crashed
+MAX_WORKER_START_FAILURES = 3
+
+# Job outcomes recorded in the summary
+STATUS_OK = 'ok'
+STATUS_ERROR = 'error'
+STATUS_TIMEOUT = 'timeout'
+STATUS_MEMORY = 'memory_limit'
+STATUS_CRASHED = 'crashed'
+STATUS_CANCELLED = 'cancelled'
+
+
+class SvgBatchError(Exception):
+    """Custom exception for batch SVG conversion errors."""
+    pass
+
+
+def find_images(input_dir, recursive=False):
+    """Returns the sorted paths of the raster images in input_dir (optionally including subfolders)."""
+    return sorted(image_scanner.iter_image_paths(input_dir, recursive))
+
+
+def _rss_bytes(pid):
+    """Current resident set size of a process, or None where /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid}/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _limit_address_space(memory_limit_bytes):
+    """Backstop for platforms without /proc: caps the worker's address space where the OS allows it."""
+    try:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, memory_limit_bytes))
+    except (ImportError, ValueError, OSError) as e:
+        logging.debug(f"Could not set the address space limit: {e}")
+
+
+def _batch_worker_main(conn, options, memory_limit_bytes, log_level=logging.INFO):
+    """Worker process: converts the jobs it receives until it gets None."""
+    logging.getLogger().setLevel(log_level) # Spawned workers start unconfigured; follow the parent
+    if memory_limit_bytes and _rss_bytes(os.getpid()) is None:
+        _limit_address_space(memory_limit_bytes)
+    from core import svg_converter
+    from core.svg_instrumentation import Instrumentation
+    conn.send(('ready', os.getpid()))
+
+    while True:
+        job = conn.recv()
+        if job is None:
+            return
+        job_id, image_path, output_path = job
+        instrumentation = Instrumentation()
+        try:
+            output_path = svg_converter.convert_image_to_svg(image_path, output_path, options=options,
+                                                             instrumentation=instrumentation)
+            status, error = STATUS_OK, None
+        except MemoryError:
+            status, error = STATUS_MEMORY, "Out of memory (address space limit reached)."
+        except Exception as e:
+            status, error = STATUS_ERROR, f"{type(e).__name__}: {e}"
+        stats = instrumentation.stats
+        conn.send(('result', job_id, {
+            'status': status,
+            'error': error,
+            'output': output_path,
+            'counts': dict(stats.counts) if stats is not None else {},
+            'cpu_seconds': round(stats.cpu_seconds, 3) if stats is not None else None,
+        }))
+        if status == STATUS_MEMORY:
+            return # A process that hit its memory cap is not trusted with more work
+
+
+class _Slot:
+    """One worker process of the pool and the job it is running."""
+
+    def __init__(self, context, options, memory_limit_bytes):
+        self.conn, child_conn = context.Pipe()
+        log_level = logging.getLogger().getEffectiveLevel()
+        self.process = context.Process(target=_batch_worker_main,
+                                       args=(child_conn, options, memory_limit_bytes, log_level),
+                                       name='svg-batch-worker', daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.results = 0 # Jobs this worker finished
+        self.closed = False # Killed and not replaced
+        self.job = None # (job_id, image_path, output_path)
+        self.started = 0.0
+        self.peak_rss = 0
+
+    def send(self, job):
+        self.job = job
+        self.started = time.perf_counter()
+        self.peak_rss = 0
+        self.conn.send(job)
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+        self.closed = True
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=5)
+        self.kill()
+
+
+def _output_path_for(image_path, input_dir, output_dir, extension='.svg'):
+    """Mirrors the image's location below input_dir inside output_dir, with the output format's extension."""
+    if output_dir is None:
+        return None # convert_image_to_svg picks '<image_name>_converted.svg'
+    relative = os.path.relpath(image_path, input_dir) if input_dir else os.path.basename(image_path)
+    output_path = os.path.join(output_dir, os.path.splitext(relative)[0] + extension)
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    return output_path
+
+
+def _output_paths(image_paths, input_dir, output_dir, extension='.svg'):
+    """
+    _output_path_for every image, made unique: images that would write the same
+    file (a/logo.png and b/logo.png from a list, or logo.png and logo.jpg in one
+    folder) get a numeric suffix instead, as in logo.svg, logo_1.svg.
+    """
+    output_paths = []
+    taken = set()
+    for image_path in image_paths:
+        output_path = _output_path_for(image_path, input_dir, output_dir, extension)
+        if output_path is not None:
+            stem, ext = os.path.splitext(output_path)
+            suffix = 0
+            while os.path.normcase(output_path) in taken:
+                suffix += 1
+                output_path = f"{stem}_{suffix}{ext}"
+            taken.add(os.path.normcase(output_path))
+        output_paths.append(output_path)
+    return output_paths
+
+
+def convert_batch_to_svg(source, output_dir=None, options=None, jobs=None, timeout=None, memory_limit_mb=None,
+                         summary_path=None, recursive=False, progress_callback=None, cancel_token=None):
+    """
+    Converts many images to SVG in parallel worker processes.
+
+    Every worker process handles one image at a time. A job that runs longer
+    than timeout seconds, or whose worker grows beyond memory_limit_mb, is
+    killed together with its worker; the failure is recorded and a fresh worker
+    takes over, so one pathological image cannot stall the run. When
+    MAX_WORKER_START_FAILURES workers in a row exit before finishing any job,
+    the remaining jobs are recorded as crashed instead. Each finished
+    job is streamed as one JSON line to summary_path, followed by a final line
+    with the batch totals.
+
+    Args:
+        source (str or list): Folder to scan for images, or a list of image paths.
+        output_dir (str, optional): Where to write the SVGs (mirroring the folder
+            layout below source; images that would share an output name get a
+            numeric suffix). If None, each SVG is written next to its image.
+        options (dict, optional): convert_image_to_svg options, shared by all jobs.
+        jobs (int, optional): Number of worker processes (default: CPU count).
+        timeout (float, optional): Wall-clock limit per image in seconds.
+        memory_limit_mb (float, optional): Resident memory limit per worker. On Linux
+            the parent samples each worker's RSS; elsewhere RLIMIT_AS is set where supported.
+        summary_path (str, optional): JSON lines file for the per-job records.
+        recursive (bool): Also scan subfolders when source is a folder.
+        progress_callback (callable, optional): Called as progress_callback(done, total, record)
+            after every job, on the calling thread.
+        cancel_token (CancellationToken, optional): Stops the batch; running jobs are
+            killed and every unfinished job is recorded as cancelled.
+
+    Returns:
+        list: One record per image, in input order. A record holds 'input', 'output',
+            'status' ('ok', 'error', 'timeout', 'memory_limit', 'crashed' or
+            'cancelled'), 'error', 'seconds', 'cpu_seconds', 'peak_rss_mb' and the
+            contour/point/path counts.
+
+    Raises:
+        FileNotFoundError: If the source folder does not exist.
+        SvgBatchError: If no images were found.
+    """
+    input_dir = None
+    if isinstance(source, (str, os.PathLike)):
+        input_dir = os.fspath(source)
+        image_paths = find_images(input_dir, recursive)
+    else:
+        image_paths = [os.fspath(path) for path in source]
+    if not image_paths:
+        raise SvgBatchError(f"No images found in {source!r}.")
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(image_paths)))
+    memory_limit_bytes = int(memory_limit_mb * 1024 * 1024) if memory_limit_mb else None
+    options = dict(options or {})
+    context = multiprocessing.get_context('spawn') # Fresh interpreters: no inherited threads or Tk state
+
+    from core import svg_export # Imports NumPy, which scanning folders does not need
+    extension = svg_export.OUTPUT_EXTENSIONS.get(options.get('output_format') or 'svg', '.svg')
+    output_paths = _output_paths(image_paths, input_dir, output_dir, extension)
+    queue = deque((job_id, path, output_paths[job_id]) for job_id, path in enumerate(image_paths))
+    records = [None] * len(image_paths)
+    done = 0
+    batch_start = time.perf_counter()
+    summary = open(summary_path, 'a', encoding='utf-8') if summary_path else None
+    logging.info(f"Starting batch SVG conversion of {len(image_paths)} images with {jobs} workers.")
+
+    def record(slot_job, status, error=None, seconds=0.0, counts=None, cpu_seconds=None, peak_rss=0, output_path=None):
+        nonlocal done
+        job_id, image_path, planned_output = slot_job
+        output_path = output_path or planned_output
+        entry = {
+            'type': 'job',
+            'input': image_path,
+            'output': output_path if status == STATUS_OK else None,
+            'status': status,
+            'error': error,
+            'seconds': round(seconds, 3),
+            'cpu_seconds': cpu_seconds,
+            'peak_rss_mb': round(peak_rss / (1024 * 1024), 1) if peak_rss else None,
+        }
+        entry.update(counts or {})
+        records[job_id] = entry
+        done += 1
+        if summary is not None:
+            summary.write(json.dumps(entry) + '\n')
+            summary.flush()
+        if status != STATUS_OK:
+            logging.warning(f"Batch job failed ({status}): {image_path}: {error}")
+        if progress_callback is not None:
+            progress_callback(done, len(image_paths), entry)
+
+    slots = [_Slot(context, options, memory_limit_bytes) for _ in range(jobs)]
+    start_failures = 0 # Workers in a row that exited before finishing a job
+    try:
+        while done < len(image_paths):
+            if cancel_token is not None and cancel_token.cancelled:
+                for slot in slots:
+                    if slot.job is not None:
+                        record(slot.job, STATUS_CANCELLED, "Batch was cancelled.", time.perf_counter() - slot.started)
+                        slot.job = None
+                while queue:
+                    record(queue.popleft(), STATUS_CANCELLED, "Batch was cancelled.")
+                break
+
+            for slot in slots:
+                if not slot.closed and slot.ready and slot.job is None and queue:
+                    slot.send(queue.popleft())
+
+            for conn in wait([slot.conn for slot in slots if not slot.closed], timeout=WATCHDOG_INTERVAL):
+                slot = next(s for s in slots if s.conn is conn)
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    continue # Worker died; handled by the liveness check below
+                if message[0] == 'ready':
+                    slot.ready = True
+                elif message[0] == 'result':
+                    slot.results += 1
+                    start_failures = 0
+                    result = message[2]
+                    record(slot.job, result['status'], result['error'], time.perf_counter() - slot.started,
+                           result['counts'], result['cpu_seconds'], slot.peak_rss, result['output'])
+                    slot.job = None
+
+            # Watchdog: enforce the limits and replace dead or killed workers
+            for index, slot in enumerate(slots):
+                if slot.closed:
+                    continue
+                failure = None
+                if slot.job is not None:
+                    elapsed = time.perf_counter() - slot.started
+                    rss = _rss_bytes(slot.process.pid) if memory_limit_bytes else None
+                    if rss:
+                        slot.peak_rss = max(slot.peak_rss, rss)
+                    if timeout and elapsed > timeout:
+                        failure = (STATUS_TIMEOUT, f"Exceeded the {timeout} s time limit.")
+                    elif memory_limit_bytes and rss and rss > memory_limit_bytes:
+                        failure = (STATUS_MEMORY, f"Exceeded the {memory_limit_mb} MB memory limit.")
+                    elif not slot.process.is_alive():
+                        failure = (STATUS_CRASHED, f"Worker exited unexpectedly (exit code {slot.process.exitcode}).")
+                    if failure is not None:
+                        record(slot.job, failure[0], failure[1], elapsed, peak_rss=slot.peak_rss)
+                        slot.job = None
+                if failure is not None or not slot.process.is_alive():
+                    slot.kill()
+                    if failure is None and slot.results == 0:
+                        start_failures += 1
+                        if start_failures >= MAX_WORKER_START_FAILURES and queue:
+                            error = (f"{start_failures} worker processes in a row exited before finishing a job "
+                                     f"(last exit code {slot.process.exitcode}).")
+                            while queue:
+                                record(queue.popleft(), STATUS_CRASHED, error)
+                    if queue: # Otherwise the other workers finish the running jobs
+                        slots[index] = _Slot(context, options, memory_limit_bytes)
+    finally:
+        for slot in slots:
+            if slot.closed:
+                continue
+            if slot.job is None:
+                slot.stop()
+            else:
+                slot.kill()
+        totals = {
+            'type': 'batch',
+            'images': len(image_paths),
+            'seconds': round(time.perf_counter() - batch_start, 3),
+            'workers': jobs,
+        }
+        for status in (STATUS_OK, STATUS_ERROR, STATUS_TIMEOUT, STATUS_MEMORY, STATUS_CRASHED, STATUS_CANCELLED):
+            totals[status] = sum(1 for entry in records if entry is not None and entry['status'] == status)
+        if summary is not None:
+            summary.write(json.dumps(totals) + '\n')
+            summary.close()
+        logging.info(f"Batch SVG conversion finished: {totals}")
+    return records
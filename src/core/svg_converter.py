@@ -1,32 +1,150 @@
 import os
+import io as io_module
+import shutil
+import hashlib
 import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
 import numpy as np
-from skimage import io, color, measure
-import svgwrite
-from sklearn.cluster import KMeans
-from PIL import Image # For reading image dimensions if needed
+from scipy import ndimage
+from skimage import color, measure
+from PIL import Image, ImageSequence # For reading image dimensions and animation frames
+
+from core.svg_pipeline import StageCache, NULL_CACHE
+from core import raster_mmap, shared_arrays, svg_curves, svg_export, svg_quantizers, svg_regions, svg_topology
+from core.svg_instrumentation import Instrumentation, JsonLinesSink, NULL_INSTRUMENTATION
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Pixels processed per chunk by the low-memory color conversions (~1 MP)
+LOW_MEMORY_CHUNK_PIXELS = 1 << 20
+# Pixels of a memory-mapped image read for the palette (every n-th row, ~4 MP)
+PALETTE_SAMPLE_PIXELS = 1 << 22
+# Extra rows around each chunk so a 3x3 opening/closing sees the same neighbors as on the whole image
+LABEL_CHUNK_HALO = 2
+# Values accepted by options['contour_mode']
+CONTOUR_MODES = ('full', 'components', 'topology')
+# Tile size (pixels) of the coarse occupancy grid used by contour_mode='components'
+COMPONENT_TILE = 32
+
 class SvgConversionError(Exception):
     """Custom exception for SVG conversion errors."""
     pass
 
-def _preprocess_image(image_path):
-    """Loads and preprocesses the image."""
+class SvgConversionCancelled(SvgConversionError):
+    """Raised when a conversion is stopped through its CancellationToken."""
+    pass
+
+
+class CancellationToken:
+    """Thread-safe flag used to cooperatively stop a running conversion."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """Requests cancellation; the conversion stops at its next check point."""
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+
+class _Progress:
+    """
+    Maps per-stage progress onto an overall [0, 1] fraction and polls the cancellation token.
+
+    Stage weights are rough shares of a typical uncached run. Stages served from
+    a StageCache are skipped, so the reported fraction simply jumps past them.
+    """
+
+    STAGE_WEIGHTS = (
+        ('decode', 0.05), ('preprocess', 0.10), ('palette', 0.35), ('masks', 0.10),
+        ('contours', 0.25), ('paths', 0.05), ('document', 0.09), ('write', 0.01),
+    )
+
+    def __init__(self, callback=None, cancel_token=None):
+        self.callback = callback
+        self.cancel_token = cancel_token
+        self._offsets = {}
+        offset = 0.0
+        for name, weight in self.STAGE_WEIGHTS:
+            self._offsets[name] = (offset, weight)
+            offset += weight
+        # The fused low-memory stage covers both masks and contours
+        self._offsets['masks+contours'] = (self._offsets['masks'][0], 0.35)
+        # Building the label map (and despeckling it) replaces mask building when enabled
+        self._offsets['despeckle'] = self._offsets['masks']
+        self._offsets['labels'] = self._offsets['masks']
+        self._stage = None
+
+    def check(self):
+        """Raises SvgConversionCancelled if cancellation was requested."""
+        if self.cancel_token is not None and self.cancel_token.cancelled:
+            raise SvgConversionCancelled("SVG conversion was cancelled.")
+
+    def enter(self, stage):
+        self.check()
+        self._stage = stage
+        self.report(0.0)
+
+    def report(self, stage_fraction):
+        if self.callback is None or self._stage is None:
+            return
+        offset, weight = self._offsets.get(self._stage, (0.0, 0.0))
+        self.callback(min(1.0, offset + weight * stage_fraction), self._stage)
+
+    def step(self, done, total):
+        """Check point inside a stage loop: polls cancellation and reports done/total."""
+        self.check()
+        if total:
+            self.report(done / total)
+
+
+_NULL_PROGRESS = _Progress()
+
+
+@contextmanager
+def _stage(name, instrumentation, progress):
+    """Runs one pipeline stage: cancellation check, progress report and timing."""
+    progress.enter(name)
+    with instrumentation.stage(name):
+        yield
+    progress.report(1.0)
+
+def _decode_image(image_path):
+    """Reads the raw pixel array of an image from disk."""
     try:
         # Use Pillow to open first to handle more formats reliably and get info
         with Image.open(image_path) as pil_img:
              img_format = pil_img.format
              img_mode = pil_img.mode
              logging.info(f"Opened with Pillow: format={img_format}, mode={img_mode}")
-        
-        # Use skimage.io for numerical processing
+
+        # Use skimage.io for numerical processing (imported here: its imageio plugins are slow to load)
+        from skimage import io
         img = io.imread(image_path)
         if img is None:
              raise SvgConversionError(f"skimage.io failed to read image: {image_path}")
+        return img
+
+    except FileNotFoundError:
+        logging.error(f"Image file not found: {image_path}")
+        raise
+    except SvgConversionError:
+        raise
+    except Exception as e:
+        logging.error(f"Error decoding image {image_path}: {e}", exc_info=True)
+        raise SvgConversionError(f"Failed to decode image: {e}")
 
+
+def _normalize_image(img):
+    """Converts a decoded pixel array into the working images used by the later stages."""
+    try:
         # Handle different image types (grayscale, RGB, RGBA)
         if img.ndim == 3 and img.shape[2] == 4:
             logging.info("Image has alpha channel, converting to RGB.")
@@ -66,25 +184,249 @@ def _preprocess_image(image_path):
 
         return img, img_smooth, img_hsv # Return necessary processed images
 
-    except FileNotFoundError:
-        logging.error(f"Image file not found: {image_path}")
+    except SvgConversionError:
         raise
     except Exception as e:
-        logging.error(f"Error preprocessing image {image_path}: {e}", exc_info=True)
+        logging.error(f"Error preprocessing image: {e}", exc_info=True)
         raise SvgConversionError(f"Failed to preprocess image: {e}")
 
 
-def _get_dominant_colors(img, n_colors):
-    """Gets dominant colors using k-means."""
+def _working_pixels_low_memory(img, verbose=True):
+    """Composites alpha (in row chunks) and keeps uint8 pixels as they are; other depths become float32 in [0, 1]."""
+    if img.ndim == 3 and img.shape[2] == 4:
+        if verbose:
+            logging.info("Image has alpha channel, compositing onto white in chunks.")
+        img = _composite_rgba_chunked(img)
+    elif img.ndim == 2:
+        if verbose:
+            logging.info("Image is grayscale.")
+    elif img.ndim == 3 and img.shape[2] == 3:
+        if verbose:
+            logging.info("Image is RGB.")
+    else:
+        raise SvgConversionError(f"Unsupported image format/dimensions: shape={img.shape}")
+
+    if img.dtype == np.uint8:
+        pass # Keep 8-bit pixels as they are (1 byte per channel)
+    elif img.dtype == np.uint16:
+        img = np.multiply(img, 1.0 / 65535.0, dtype=np.float32)
+    elif img.dtype == np.float32 or img.dtype == np.float64:
+        img = np.clip(img, 0, 1).astype(np.float32, copy=False)
+    else:
+        raise SvgConversionError(f"Unsupported image data type: {img.dtype}")
+    return img
+
+
+def _normalize_image_low_memory(img):
+    """
+    Low-memory variant of _normalize_image.
+
+    8-bit images stay uint8 (other depths become float32 in [0, 1]), alpha is
+    composited in row chunks and the HSV copy is float32, filled chunk by chunk.
+    """
     try:
-        # Reshape based on dimensions (RGB or Grayscale)
+        img = _working_pixels_low_memory(img)
         if img.ndim == 3:
-            pixels = img.reshape(-1, 3)
-        else: # Grayscale
-            pixels = img.reshape(-1, 1)
+            img_hsv = _rgb_to_hsv_chunked(img)
+        else: # Grayscale intensity, compared directly against the palette
+            img_hsv = _to_unit_float32(img)
+
+        return img, img, img_hsv
+
+    except SvgConversionError:
+        raise
+    except Exception as e:
+        logging.error(f"Error preprocessing image (low memory): {e}", exc_info=True)
+        raise SvgConversionError(f"Failed to preprocess image: {e}")
+
+
+def _chunk_rows(width):
+    """Number of image rows per chunk for the low-memory conversions."""
+    return max(1, LOW_MEMORY_CHUNK_PIXELS // max(1, width))
+
+
+def _to_unit_float32(pixels):
+    """Scales uint8 pixels to float32 in [0, 1]; float input is only cast."""
+    if pixels.dtype == np.uint8:
+        return np.multiply(pixels, 1.0 / 255.0, dtype=np.float32)
+    return pixels.astype(np.float32, copy=False)
+
+
+def _composite_rgba_chunked(img):
+    """Composites an RGBA image onto a white background (like color.rgba2rgb) one row chunk at a time."""
+    height, width = img.shape[:2]
+    out = np.empty((height, width, 3), dtype=np.uint8 if img.dtype == np.uint8 else np.float32)
+    scale = 255.0 if img.dtype == np.uint8 else (65535.0 if img.dtype == np.uint16 else 1.0)
+    rows = _chunk_rows(width)
+    for start in range(0, height, rows):
+        chunk = np.multiply(img[start:start + rows], 1.0 / scale, dtype=np.float32)
+        alpha = chunk[..., 3:4]
+        rgb = chunk[..., :3] * alpha + (1.0 - alpha)
+        if out.dtype == np.uint8:
+            out[start:start + rows] = np.rint(rgb * 255.0)
+        else:
+            out[start:start + rows] = rgb
+    return out
+
+
+def _rgb_to_hsv_chunked(img):
+    """Converts an RGB image to a float32 HSV image one row chunk at a time."""
+    height, width = img.shape[:2]
+    img_hsv = np.empty((height, width, 3), dtype=np.float32)
+    rows = _chunk_rows(width)
+    for start in range(0, height, rows):
+        img_hsv[start:start + rows] = color.rgb2hsv(_to_unit_float32(img[start:start + rows]))
+    return img_hsv
+
+
+def _preprocess_image(image_path, low_memory=False):
+    """Loads and preprocesses the image."""
+    if low_memory:
+        return _normalize_image_low_memory(_decode_image(image_path))
+    return _normalize_image(_decode_image(image_path))
+
+
+def _decode_mapped(image_path):
+    """Memory-maps an uncompressed raster; other files are decoded into memory as usual."""
+    pixels = raster_mmap.open_mapped(image_path)
+    if pixels is None:
+        logging.info(f"{image_path} cannot be memory-mapped (compressed or unsupported layout); decoding it.")
+        return _decode_image(image_path)
+    return pixels
+
+
+def _check_mapped_shape(img):
+    """Validates a (possibly memory-mapped) raw array without touching its pixels."""
+    if not (img.ndim == 2 or (img.ndim == 3 and img.shape[2] in (3, 4))):
+        raise SvgConversionError(f"Unsupported image format/dimensions: shape={img.shape}")
+    if img.dtype not in (np.uint8, np.uint16, np.float32, np.float64):
+        raise SvgConversionError(f"Unsupported image data type: {img.dtype}")
+
+
+def _sample_rows(img, max_pixels=PALETTE_SAMPLE_PIXELS):
+    """Every n-th row of a large image, read into memory as working pixels for the palette stage."""
+    height, width = img.shape[:2]
+    step = max(1, -(-height * width // max_pixels))
+    if step > 1:
+        logging.info(f"Sampling every {step}th row ({-(-height // step)} of {height}) for the palette.")
+    return _working_pixels_low_memory(np.ascontiguousarray(img[::step]), verbose=False)
+
+
+def _hsv_rows(img, start, stop):
+    """Working color values (HSV, or intensity for grayscale) of rows start:stop as float32."""
+    pixels = _working_pixels_low_memory(np.ascontiguousarray(img[start:stop]), verbose=False)
+    if pixels.ndim == 3:
+        return color.rgb2hsv(_to_unit_float32(pixels)).astype(np.float32, copy=False)
+    return _to_unit_float32(pixels)
+
+
+def _label_rows(source, start, stop, dominant_colors, tolerance, morphology, claim_all, source_is_hsv):
+    """
+    Labels rows start:stop of an image.
+
+    The rows are read with LABEL_CHUNK_HALO extra rows on each side when a 3x3
+    morphology operation is used, so the result is identical to labeling the
+    whole image. source holds HSV values when source_is_hsv, raw pixels otherwise.
+    """
+    height = source.shape[0]
+    halo = LABEL_CHUNK_HALO if morphology is not None else 0
+    top, bottom = max(0, start - halo), min(height, stop + halo)
+    values = source[top:bottom] if source_is_hsv else _hsv_rows(source, top, bottom)
+    chunk_labels = svg_regions.build_label_map(values, dominant_colors, tolerance, morphology, claim_all=claim_all)
+    return chunk_labels[start - top:stop - top]
+
+
+def _label_rows_shared(source_descriptor, labels_descriptor, start, stop, dominant_colors, tolerance, morphology,
+                       claim_all, source_is_hsv):
+    """Process pool task: labels rows start:stop of a shared image into a shared label map."""
+    with shared_arrays.attach(source_descriptor) as source, shared_arrays.attach(labels_descriptor) as labels:
+        labels.array[start:stop] = _label_rows(
+            source.array, start, stop, dominant_colors, tolerance, morphology, claim_all, source_is_hsv
+        )
+
+
+def _build_label_map_chunked(img, dominant_colors, tolerance, morphology=None, claim_all=False, progress=_NULL_PROGRESS,
+                             workers=1, source_is_hsv=False):
+    """
+    svg_regions.build_label_map computed one row chunk at a time.
+
+    By default rows are converted to HSV chunk by chunk straight from the (memory-
+    mapped) pixels, so the only full-size array is the uint8 label map itself.
+    With workers > 1 the chunks are labeled in a process pool instead: the image
+    and the label map live in shared memory segments and the tasks only carry
+    their descriptors, so no pixels are pickled.
+    """
+    height, width = img.shape[:2]
+    rows = _chunk_rows(width)
+    chunks = [(start, min(start + rows, height)) for start in range(0, height, rows)]
+    if workers > 1 and len(chunks) > 1:
+        return _build_label_map_parallel(img, chunks, dominant_colors, tolerance, morphology, claim_all,
+                                         source_is_hsv, workers, progress)
+
+    labels = np.empty((height, width), dtype=np.uint8)
+    for i, (start, stop) in enumerate(chunks):
+        progress.step(i, len(chunks))
+        labels[start:stop] = _label_rows(img, start, stop, dominant_colors, tolerance, morphology, claim_all, source_is_hsv)
+    return labels
+
+
+def _build_label_map_parallel(img, chunks, dominant_colors, tolerance, morphology, claim_all, source_is_hsv, workers,
+                              progress):
+    """Labels row chunks in worker processes that share the image and the label map (see shared_arrays)."""
+    height, width = img.shape[:2]
+    context = multiprocessing.get_context('spawn') # Workers must not inherit the caller's threads or Tk state
+    logging.info(f"Labeling {len(chunks)} row chunks in {workers} processes.")
+    with shared_arrays.SharedArray.from_array(img) as shared_source, \
+            shared_arrays.SharedArray((height, width), np.uint8) as shared_labels:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=context) as executor:
+            futures = [
+                executor.submit(_label_rows_shared, shared_source.descriptor, shared_labels.descriptor, start, stop,
+                                dominant_colors, tolerance, morphology, claim_all, source_is_hsv)
+                for start, stop in chunks
+            ]
+            try:
+                for i, future in enumerate(as_completed(futures)):
+                    future.result()
+                    progress.step(i + 1, len(futures))
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        # Copy out before the segment is unlinked; the label map is only one byte per pixel
+        return np.array(shared_labels.array)
+
+
+def _get_dominant_colors(img, n_colors, progress=_NULL_PROGRESS, quantizer=svg_quantizers.DEFAULT_QUANTIZER, init=None):
+    """
+    Gets dominant colors with the selected quantizer engine (scikit-learn k-means by default).
+
+    init optionally holds starting centers (RGB/intensity in [0, 1]); engines that
+    support it run once from there instead of from several random seedings.
+    """
+    try:
+        engine = svg_quantizers.get_quantizer(quantizer)
+        sample_weight = None
+        if not getattr(engine, 'uses_samples', True):
+            # Image-based engines (Pillow) quantize the image directly and cope with
+            # fewer distinct colors themselves, so skip the costly unique-color pass
+            logging.info(f"Quantizing image with {quantizer}.")
+            dominant_colors = engine(img, None, None, n_colors, progress)
+            logging.info(f"Found {len(dominant_colors)} dominant colors ({quantizer}).")
+            return dominant_colors
+        if img.dtype == np.uint8:
+            # Low-memory images stay uint8: cluster the unique colors weighted by
+            # their pixel counts instead of a float copy of every pixel
+            unique_pixels, sample_weight = _unique_uint8_colors(img)
+            pixels = unique_pixels.astype(np.float32) / 255.0
+        else:
+            # Reshape based on dimensions (RGB or Grayscale)
+            if img.ndim == 3:
+                pixels = img.reshape(-1, 3)
+            else: # Grayscale
+                pixels = img.reshape(-1, 1)
+            unique_pixels = np.unique(pixels, axis=0)
 
         # Ensure n_colors is not more than unique colors (or pixels)
-        unique_pixels = np.unique(pixels, axis=0)
         actual_n_colors = min(n_colors, len(unique_pixels))
         if actual_n_colors < n_colors:
              logging.warning(f"Reduced n_colors from {n_colors} to {actual_n_colors} (number of unique colors/pixels)")
@@ -92,53 +434,72 @@ def _get_dominant_colors(img, n_colors):
              raise SvgConversionError("Image appears to have no unique colors.")
 
 
-        kmeans = KMeans(n_clusters=actual_n_colors, random_state=0, n_init=10) # n_init='auto' in newer sklearn
-        kmeans.fit(pixels)
-        dominant_colors = kmeans.cluster_centers_
+        if init is not None and len(init) == actual_n_colors and getattr(engine, 'supports_init', False):
+            dominant_colors = engine(img, pixels, sample_weight, actual_n_colors, progress, init=init)
+        else:
+            dominant_colors = engine(img, pixels, sample_weight, actual_n_colors, progress)
 
         # Convert back to original scale if needed (assuming input was [0,1])
         # dominant_colors_uint8 = (dominant_colors * 255).astype(np.uint8)
 
-        logging.info(f"Found {len(dominant_colors)} dominant colors.")
+        logging.info(f"Found {len(dominant_colors)} dominant colors ({quantizer}).")
         return dominant_colors # Return colors in the [0, 1] range
 
+    except SvgConversionCancelled:
+        raise
     except Exception as e:
         logging.error(f"Error finding dominant colors: {e}", exc_info=True)
         raise SvgConversionError(f"Failed to find dominant colors: {e}")
 
 
-def _create_color_masks(img_hsv, dominant_colors, tolerance):
+def _unique_uint8_colors(img):
+    """Returns the unique colors of a uint8 image (as an (N, channels) array) and their pixel counts."""
+    if img.ndim == 2:
+        counts = np.bincount(img.ravel(), minlength=256)
+        values = np.nonzero(counts)[0]
+        return values.reshape(-1, 1).astype(np.uint8), counts[values]
+
+    # Pack RGB into one uint32 per pixel, chunk by chunk, so np.unique sorts scalars
+    height, width = img.shape[:2]
+    packed = np.empty((height, width), dtype=np.uint32)
+    rows = _chunk_rows(width)
+    for start in range(0, height, rows):
+        chunk = img[start:start + rows]
+        packed_chunk = packed[start:start + rows]
+        np.left_shift(chunk[..., 0], 16, out=packed_chunk, dtype=np.uint32)
+        packed_chunk |= np.left_shift(chunk[..., 1], 8, dtype=np.uint32)
+        packed_chunk |= chunk[..., 2]
+    values, counts = np.unique(packed, return_counts=True)
+    colors = np.stack([(values >> 16) & 0xFF, (values >> 8) & 0xFF, values & 0xFF], axis=1)
+    return colors.astype(np.uint8), counts
+
+
+def _mask_fill_color(color_val, is_grayscale):
+    """Returns the uint8 RGB fill color for a palette center in mask space."""
+    if is_grayscale:
+        rgb = np.repeat(np.asarray(color_val, dtype=np.float64)[:1], 3)
+    else:
+        rgb = color.hsv2rgb(np.asarray(color_val, dtype=np.float64).reshape(1, 1, 3)).flatten()
+    # Rounded, not truncated: a center of 0.99999 is still 255
+    return np.rint(np.clip(rgb, 0, 1) * 255).astype(np.uint8)
+
+
+def _create_color_masks(img_hsv, dominant_colors, tolerance, progress=_NULL_PROGRESS):
     """Creates binary masks for each dominant color based on tolerance in HSV space (or intensity for grayscale)."""
     masks = []
     is_grayscale = img_hsv.ndim == 2
+    channels = [img_hsv] if is_grayscale else [img_hsv[..., i] for i in range(3)]
+    distance = np.empty(img_hsv.shape[:2], dtype=np.float32)
+    scratch = np.empty(img_hsv.shape[:2], dtype=np.float32)
 
-    for color_val in dominant_colors:
+    for i, color_val in enumerate(dominant_colors):
+        progress.step(i, len(dominant_colors))
         try:
-            if is_grayscale:
-                # For grayscale, color_val is a single intensity value [0, 1]
-                center_intensity = color_val[0]
-                lower_bound = np.clip(center_intensity - tolerance, 0, 1)
-                upper_bound = np.clip(center_intensity + tolerance, 0, 1)
-                mask = (img_hsv >= lower_bound) & (img_hsv <= upper_bound)
-                # Represent grayscale color as RGB for SVG fill
-                rgb_color = (np.array([center_intensity, center_intensity, center_intensity]) * 255).astype(np.uint8)
-
-            else: # RGB -> HSV processing
-                # color_val is [h, s, v] in [0, 1] range
-                # Tolerance is applied more carefully in HSV space
-                # Simple approach: apply tolerance to each channel (like original script)
-                # More complex: consider hue wrap-around and perceptual distance
-                hsv_center = color_val
-                lower_bound = np.clip(hsv_center - tolerance, 0, 1)
-                upper_bound = np.clip(hsv_center + tolerance, 0, 1)
-
-                # Handle Hue wrap-around (less critical with small tolerance, but good practice)
-                # If tolerance crosses 0/1 boundary for Hue, split into two ranges
-                # Simplified: just apply bounds for now, like original script
-                mask = np.all((img_hsv >= lower_bound) & (img_hsv <= upper_bound), axis=2)
-
-                # Convert the dominant HSV color back to RGB for SVG fill
-                rgb_color = (color.hsv2rgb(hsv_center.reshape(1, 1, 3)).flatten() * 255).astype(np.uint8)
+            # color_val is [h, s, v] (or one intensity for grayscale) in [0, 1]; the
+            # tolerance applies per channel, with hue wrapping around (see color_distance)
+            mask = svg_regions.color_distance(channels, color_val, distance, scratch) <= tolerance
+            # Convert the dominant color back to RGB for SVG fill
+            rgb_color = _mask_fill_color(color_val, is_grayscale)
 
             if np.any(mask): # Only add if the mask is not empty
                 masks.append((mask, rgb_color))
@@ -153,15 +514,21 @@ def _create_color_masks(img_hsv, dominant_colors, tolerance):
     return masks
 
 
-def _get_contours(mask, simplify_tolerance):
+def _get_contours(mask, simplify_tolerance, progress=_NULL_PROGRESS):
     """Finds contours in a binary mask."""
     # Pad mask to ensure contours on edges are closed
     padded_mask = np.pad(mask, pad_width=1, mode='constant', constant_values=0)
-    # Find contours using marching squares algorithm
-    contours = measure.find_contours(padded_mask.astype(float), level=0.5, fully_connected='low') # level=0.5 for binary
+    return _trace_padded_mask(padded_mask, simplify_tolerance, progress)
+
+
+def _trace_padded_mask(padded_mask, simplify_tolerance, progress=_NULL_PROGRESS):
+    """Finds and simplifies contours in a mask that already has a 1-pixel zero border."""
+    # Find contours using marching squares algorithm (find_contours makes its own float copy)
+    contours = measure.find_contours(padded_mask, level=0.5, fully_connected='low') # level=0.5 for binary
 
     simplified_contours = []
     for contour in contours:
+        progress.check()
         # Subtract padding offset
         contour -= 1
         # Simplify contour using Douglas-Peucker algorithm
@@ -173,6 +540,138 @@ def _get_contours(mask, simplify_tolerance):
     return simplified_contours
 
 
+def _get_component_contours(mask, simplify_tolerance, progress=_NULL_PROGRESS):
+    """
+    Finds contours of a binary mask one group of connected components at a time.
+
+    The mask is reduced to a coarse grid of COMPONENT_TILE x COMPONENT_TILE
+    tiles and the occupied tiles are labeled once. Every 4-connected pixel
+    component lies inside one connected group of tiles, so each group is
+    traced inside its own bounding box (plus a 1-pixel zero border) and the
+    coordinates are offset back. Tracing cost then follows the area the color
+    actually covers rather than the full image size. The traced outlines are
+    the ones _get_contours finds (fully_connected='low' is 4-connected too),
+    but a ring may start at a different point, and approximate_polygon keeps
+    its start point, so after simplification the vertex counts can differ
+    slightly (a few points per image).
+    """
+    height, width = mask.shape
+    tile = COMPONENT_TILE
+    tile_rows, tile_cols = -(-height // tile), -(-width // tile)
+    if (height, width) == (tile_rows * tile, tile_cols * tile):
+        tiled = mask
+    else:
+        tiled = np.zeros((tile_rows * tile, tile_cols * tile), dtype=bool)
+        tiled[:height, :width] = mask
+    occupied = tiled.reshape(tile_rows, tile, tile_cols, tile).any(axis=(1, 3))
+    del tiled
+    tile_labels, _ = ndimage.label(occupied) # Default structure is 4-connectivity
+
+    simplified_contours = []
+    for label, tile_bbox in enumerate(ndimage.find_objects(tile_labels), start=1):
+        if tile_bbox is None:
+            continue
+        progress.check()
+        rows = slice(tile_bbox[0].start * tile, min(tile_bbox[0].stop * tile, height))
+        cols = slice(tile_bbox[1].start * tile, min(tile_bbox[1].stop * tile, width))
+        owned = tile_labels[tile_bbox] == label
+        component = np.zeros((rows.stop - rows.start + 2, cols.stop - cols.start + 2), dtype=bool)
+        component[1:-1, 1:-1] = mask[rows, cols]
+        if not owned.all(): # Bounding boxes can overlap other groups; keep only this group's tiles
+            owned = np.repeat(np.repeat(owned, tile, axis=0), tile, axis=1)
+            component[1:-1, 1:-1] &= owned[:rows.stop - rows.start, :cols.stop - cols.start]
+        offset = np.array([rows.start, cols.start], dtype=np.float64)
+        for contour in _trace_padded_mask(component, simplify_tolerance, progress):
+            contour += offset
+            simplified_contours.append(contour)
+    return simplified_contours
+
+
+def _trace_mask(mask, simplify_tolerance, contour_mode, progress=_NULL_PROGRESS):
+    """Traces a mask with the whole-image or the per-component strategy."""
+    if contour_mode == 'components':
+        return _get_component_contours(mask, simplify_tolerance, progress)
+    return _get_contours(mask, simplify_tolerance, progress)
+
+
+def _trace_colors_low_memory(img_hsv, dominant_colors, tolerance, simplify_tolerance, progress=_NULL_PROGRESS,
+                             contour_mode='full'):
+    """
+    Low-memory replacement for _create_color_masks + _get_contours.
+
+    Each color's mask is built in place inside one padded buffer that is reused
+    for every color and traced immediately, so no per-color masks are kept. The
+    color distances are computed one row chunk at a time.
+    """
+    is_grayscale = img_hsv.ndim == 2
+    height, width = img_hsv.shape[:2]
+    padded_mask = np.zeros((height + 2, width + 2), dtype=bool)
+    mask = padded_mask[1:-1, 1:-1] # Interior view, the border stays zero
+    rows = min(height, _chunk_rows(width))
+    distance = np.empty((rows, width), dtype=np.float32)
+    scratch = np.empty((rows, width), dtype=np.float32)
+    channels = [img_hsv] if is_grayscale else [img_hsv[..., i] for i in range(3)]
+
+    color_contours = []
+    for i, color_val in enumerate(dominant_colors):
+        progress.step(i, len(dominant_colors))
+        for start in range(0, height, rows):
+            stop = min(start + rows, height)
+            chunk_distance = svg_regions.color_distance(
+                [channel[start:stop] for channel in channels], color_val,
+                distance[:stop - start], scratch[:stop - start]
+            )
+            np.less_equal(chunk_distance, tolerance, out=mask[start:stop])
+
+        rgb_color = _mask_fill_color(color_val, is_grayscale)
+        if not mask.any():
+            logging.debug(f"Skipping empty mask for color {rgb_color}")
+            continue
+        if contour_mode == 'components':
+            traced = _get_component_contours(mask, simplify_tolerance, progress)
+        else:
+            traced = _trace_padded_mask(padded_mask, simplify_tolerance, progress)
+        color_contours.append((rgb_color, traced))
+
+    logging.info(f"Traced {len(color_contours)} non-empty color masks (low memory).")
+    return color_contours
+
+
+def _masks_from_labels(labels, dominant_colors, progress=_NULL_PROGRESS):
+    """Splits a despeckled label map into the (mask, rgb_color) list _create_color_masks returns."""
+    is_grayscale = dominant_colors.shape[1] == 1
+    masks = []
+    for i, color_val in enumerate(dominant_colors):
+        progress.step(i, len(dominant_colors))
+        mask = labels == i
+        if mask.any():
+            masks.append((mask, _mask_fill_color(color_val, is_grayscale)))
+    logging.info(f"Created {len(masks)} non-empty color masks from the despeckled label map.")
+    return masks
+
+
+def _trace_labels_low_memory(labels, dominant_colors, simplify_tolerance, progress=_NULL_PROGRESS,
+                             contour_mode='full'):
+    """Traces every color of a label map through one reused padded mask buffer."""
+    is_grayscale = dominant_colors.shape[1] == 1
+    height, width = labels.shape
+    padded_mask = np.zeros((height + 2, width + 2), dtype=bool)
+    mask = padded_mask[1:-1, 1:-1] # Interior view, the border stays zero
+
+    color_contours = []
+    for i, color_val in enumerate(dominant_colors):
+        progress.step(i, len(dominant_colors))
+        np.equal(labels, i, out=mask)
+        if not mask.any():
+            continue
+        if contour_mode == 'components':
+            traced = _get_component_contours(mask, simplify_tolerance, progress)
+        else:
+            traced = _trace_padded_mask(padded_mask, simplify_tolerance, progress)
+        color_contours.append((_mask_fill_color(color_val, is_grayscale), traced))
+    return color_contours
+
+
 def _contour_to_svg_path(contour):
     """Converts a contour (list of [row, col] points) to an SVG path string."""
     if len(contour) < 2:
@@ -190,19 +689,416 @@ def _rgb_to_hex(rgb_color):
     return '#{:02x}{:02x}{:02x}'.format(*map(int, rgb_color))
 
 
-def convert_image_to_svg(image_path, output_path=None, options=None):
+def _to_mask_space(dominant_colors, is_grayscale):
+    """Converts palette centers (found on the RGB image) into the HSV space used for masking."""
+    # Clustering leaves round-off such as -1e-17 in the centers; rgb2hsv turns a
+    # red of [1, -0, 0] into hue 1.0 instead of 0.0
+    dominant_colors = np.clip(dominant_colors, 0, 1)
+    if is_grayscale:
+        return dominant_colors
+    return color.rgb2hsv(dominant_colors.reshape(1, -1, 3)).reshape(-1, 3)
+
+
+def _from_mask_space(dominant_colors, is_grayscale):
+    """Inverse of _to_mask_space: palette centers back to the RGB space they were clustered in."""
+    if is_grayscale:
+        return dominant_colors
+    return color.hsv2rgb(dominant_colors.reshape(1, -1, 3)).reshape(-1, 3)
+
+
+def _source_key(image_path):
+    """Cache key identifying the current contents of an image file."""
+    stat = os.stat(image_path)
+    return ('decode', os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size)
+
+
+def _build_paths(image_path, opts, cache, instrumentation=NULL_INSTRUMENTATION, progress=_NULL_PROGRESS, frame=None):
+    """
+    Runs the memoized stages decode -> preprocess -> palette -> [despeckle ->] masks -> contours -> paths.
+
+    Every stage is looked up in the cache under a key made of its upstream key and
+    its own parameters, so e.g. changing 'simplify_tolerance' re-runs only the
+    contours and paths stages. Upstream stages are only resolved on a miss, and
+    they are resolved before a stage's own timer starts so timings do not nest.
+
+    When a _Frame is given (sequence mode) its pixels replace the decode stage,
+    its init_palette warm-starts the palette stage, and the palette that was
+    used is stored back in frame.palette.
+
+    With 'memory_map' the decode stage maps uncompressed files instead of reading
+    them, preprocessing is skipped, the palette is computed from a row sample and
+    the label map is built chunk by chunk straight from the mapping; tracing then
+    follows the low-memory label path.
+
+    Returns:
+        tuple: (paths_key, (width, height, [(hex_color, [path_data, ...]), ...], counts))
+    """
+    memory_map = bool(opts.get('memory_map'))
+    # A mapped image is only ever read in row chunks, so it always takes the low-memory path
+    low_memory = bool(opts.get('low_memory')) or memory_map
+    curve_fitting = bool(opts.get('curve_fitting'))
+    # Curves are fitted to the raw traced points; a polygon simplification would discard the shape first
+    simplify_tolerance = 0 if curve_fitting else opts['simplify_tolerance']
+    contour_mode = opts.get('contour_mode', 'full')
+    if contour_mode not in CONTOUR_MODES:
+        raise SvgConversionError(f"Unknown contour_mode {contour_mode!r}; expected one of {CONTOUR_MODES}.")
+    min_region_area = int(opts.get('min_region_area') or 0)
+    morphology = opts.get('morphology')
+    if morphology not in svg_regions.MORPHOLOGY_OPERATIONS:
+        raise SvgConversionError(f"Unknown morphology {morphology!r}; expected one of {svg_regions.MORPHOLOGY_OPERATIONS}.")
+    despeckle = min_region_area > 1 or morphology is not None
+    label_workers = int(opts.get('label_workers') or 1)
+    # Topology mode needs a label map where every pixel belongs to some color
+    topology = contour_mode == 'topology'
+    curve_tolerance = opts['curve_tolerance'] if curve_fitting else None
+    if frame is not None:
+        decode_key = frame.key
+    elif memory_map:
+        decode_key = ('decode-mapped',) + _source_key(image_path)[1:]
+    else:
+        decode_key = _source_key(image_path)
+    init_palette = frame.init_palette if frame is not None else None
+    preprocess_key = ('preprocess', decode_key, low_memory, memory_map)
+    quantizer = opts.get('quantizer', svg_quantizers.DEFAULT_QUANTIZER)
+    if quantizer not in svg_quantizers.QUANTIZERS:
+        raise SvgConversionError(f"Unknown quantizer {quantizer!r}; expected one of {sorted(svg_quantizers.QUANTIZERS)}.")
+    palette_key = ('palette', preprocess_key, opts['n_colors'], quantizer,
+                   None if init_palette is None else tuple(np.round(init_palette, 6).ravel()))
+    labels_key = ('labels', palette_key, opts['tolerance'], morphology, min_region_area, topology)
+    # Mapped images are labeled in chunks, so their masks always come from the label map
+    use_labels = despeckle or memory_map
+    masks_key = ('masks', labels_key) if use_labels else ('masks', palette_key, opts['tolerance'])
+    if topology:
+        # The boundary graph is traced unsimplified; each edge is simplified once in the paths stage
+        contours_key = ('contours', labels_key, contour_mode)
+        paths_key = ('paths', contours_key, simplify_tolerance, curve_tolerance)
+    else:
+        contours_key = ('contours', masks_key, simplify_tolerance, contour_mode)
+        paths_key = ('paths', contours_key, curve_tolerance)
+
+    resolved = {} # Stage results already resolved during this call
+    def lookup(key, compute):
+        if key not in resolved:
+            resolved[key] = cache.get_or_compute(key, compute)
+        return resolved[key]
+
+    def decoded():
+        if frame is not None: # Already decoded by the sequence reader
+            return frame.pixels
+        def compute():
+            with _stage('decode', instrumentation, progress):
+                return _decode_mapped(image_path) if memory_map else _decode_image(image_path)
+        return lookup(decode_key, compute)
+
+    def preprocessed():
+        def compute():
+            raw = decoded()
+            if memory_map:
+                # The pixels stay where they are; later stages convert the rows they read
+                with _stage('preprocess', instrumentation, progress):
+                    _check_mapped_shape(raw)
+                return raw, None
+            normalize = _normalize_image_low_memory if low_memory else _normalize_image
+            with _stage('preprocess', instrumentation, progress):
+                img, _, img_hsv = normalize(raw)
+            return img, img_hsv
+        return lookup(preprocess_key, compute)
+
+    def palette():
+        def compute():
+            img, _ = preprocessed()
+            with _stage('palette', instrumentation, progress):
+                if memory_map:
+                    img = _sample_rows(img)
+                centers = _get_dominant_colors(img, opts['n_colors'], progress, quantizer, init_palette)
+                return _to_mask_space(centers, img.ndim == 2)
+        return lookup(palette_key, compute)
+
+    def labels():
+        def compute():
+            img, img_hsv = preprocessed()
+            dominant_colors = palette()
+            with _stage('despeckle' if despeckle else 'labels', instrumentation, progress):
+                if memory_map:
+                    label_map = _build_label_map_chunked(
+                        img, dominant_colors, opts['tolerance'], morphology, claim_all=topology, progress=progress,
+                        workers=label_workers
+                    )
+                elif label_workers > 1:
+                    label_map = _build_label_map_chunked(
+                        img_hsv, dominant_colors, opts['tolerance'], morphology, claim_all=topology, progress=progress,
+                        workers=label_workers, source_is_hsv=True
+                    )
+                else:
+                    label_map = svg_regions.build_label_map(
+                        img_hsv, dominant_colors, opts['tolerance'], morphology, claim_all=topology, progress=progress
+                    )
+                if min_region_area > 1:
+                    svg_regions.merge_small_regions(label_map, min_region_area, progress)
+            return label_map
+        return lookup(labels_key, compute)
+
+    def masks():
+        def compute():
+            if use_labels:
+                label_map = labels()
+                dominant_colors = palette()
+                with _stage('masks', instrumentation, progress):
+                    return _masks_from_labels(label_map, dominant_colors, progress)
+            _, img_hsv = preprocessed()
+            dominant_colors = palette()
+            with _stage('masks', instrumentation, progress):
+                return _create_color_masks(img_hsv, dominant_colors, opts['tolerance'], progress)
+        return lookup(masks_key, compute)
+
+    def contours():
+        def compute():
+            if topology:
+                label_map = labels()
+                height, width = label_map.shape
+                logging.info(f"Image dimensions: {width}x{height}")
+                with _stage('contours', instrumentation, progress):
+                    graph = svg_topology.build_boundary_graph(label_map, progress)
+                return width, height, graph
+
+            if low_memory and use_labels:
+                # Trace straight from the uint8 label map; per-color masks are never kept
+                label_map = labels()
+                dominant_colors = palette()
+                with _stage('contours', instrumentation, progress):
+                    traced = _trace_labels_low_memory(label_map, dominant_colors, simplify_tolerance, progress, contour_mode)
+                if not traced:
+                     raise SvgConversionError("No color regions found after masking. Try adjusting tolerance or n_colors.")
+                height, width = label_map.shape
+                logging.info(f"Image dimensions: {width}x{height}")
+                return width, height, traced
+
+            if low_memory:
+                # Masks are built and traced one color at a time in a reused buffer
+                _, img_hsv = preprocessed()
+                dominant_colors = palette()
+                with _stage('masks+contours', instrumentation, progress):
+                    traced = _trace_colors_low_memory(
+                        img_hsv, dominant_colors, opts['tolerance'], simplify_tolerance, progress, contour_mode
+                    )
+                if not traced:
+                     raise SvgConversionError("No color regions found after masking. Try adjusting tolerance or n_colors.")
+                height, width = img_hsv.shape[:2]
+                logging.info(f"Image dimensions: {width}x{height}")
+                return width, height, traced
+
+            color_masks = masks()
+            if not color_masks:
+                 raise SvgConversionError("No color regions found after masking. Try adjusting tolerance or n_colors.")
+            height, width = color_masks[0][0].shape
+            logging.info(f"Image dimensions: {width}x{height}")
+            with _stage('contours', instrumentation, progress):
+                traced = []
+                for i, (mask, rgb_color) in enumerate(color_masks):
+                    progress.step(i, len(color_masks))
+                    traced.append((rgb_color, _trace_mask(mask, simplify_tolerance, contour_mode, progress)))
+            return width, height, traced
+        return lookup(contours_key, compute)
+
+    def topology_paths():
+        def compute():
+            width, height, graph = contours()
+            dominant_colors = palette()
+            is_grayscale = dominant_colors.shape[1] == 1
+            with _stage('paths', instrumentation, progress):
+                geometries = svg_topology.simplify_edges(graph, simplify_tolerance, curve_tolerance)
+                color_paths = []
+                nodes = 0
+                for i, label in enumerate(sorted(graph.rings)):
+                    progress.step(i, len(graph.rings))
+                    path_data, ring_nodes = svg_topology.ring_path_data(graph.rings[label], geometries, curve_fitting)
+                    if path_data:
+                        color_paths.append((_rgb_to_hex(_mask_fill_color(dominant_colors[label], is_grayscale)), [path_data]))
+                        nodes += ring_nodes
+            counts = {
+                'colors': len(graph.rings),
+                'contours': sum(len(rings) for rings in graph.rings.values()),
+                'points': sum(len(points) for points in graph.edges),
+                'paths': len(color_paths),
+                'nodes': nodes,
+                'edges': len(graph.edges), # Shared boundary edges, each simplified once
+            }
+            return width, height, color_paths, counts
+        return lookup(paths_key, compute)
+
+    def paths():
+        if topology:
+            return topology_paths()
+        return polygon_paths()
+
+    def polygon_paths():
+        def compute():
+            width, height, color_contours = contours()
+            with _stage('paths', instrumentation, progress):
+                if curve_fitting:
+                    color_paths, nodes = _contours_to_curve_paths(color_contours, opts['curve_tolerance'], progress)
+                else:
+                    color_paths = _contours_to_paths(color_contours)
+                    nodes = sum(len(contour) for _, traced in color_contours for contour in traced)
+            counts = {
+                'colors': len(color_contours),
+                'contours': sum(len(traced) for _, traced in color_contours),
+                'points': sum(len(contour) for _, traced in color_contours for contour in traced),
+                'paths': sum(len(path_list) for _, path_list in color_paths),
+                'nodes': nodes, # Path vertices written to the SVG (segment end points)
+            }
+            return width, height, color_paths, counts
+        return lookup(paths_key, compute)
+
+    result = paths()
+    if frame is not None:
+        frame.palette = resolved.get(palette_key) # None when the paths came straight from the cache
+    return paths_key, result
+
+
+def _contours_to_paths(color_contours):
+    """Converts the traced contours of every color into SVG path strings."""
+    color_paths = []
+    for rgb_color, contours in color_contours:
+        hex_color = _rgb_to_hex(rgb_color)
+        logging.debug(f"Processing color {hex_color}, found {len(contours)} contours.")
+        path_list = [path_data for path_data in map(_contour_to_svg_path, contours) if path_data]
+        if path_list:
+            color_paths.append((hex_color, path_list))
+    return color_paths
+
+
+def _contours_to_curve_paths(color_contours, curve_tolerance, progress=_NULL_PROGRESS):
+    """Fits cubic Beziers to the traced contours of every color and returns (color_paths, node_count)."""
+    color_paths = []
+    nodes = 0
+    for rgb_color, contours in color_contours:
+        hex_color = _rgb_to_hex(rgb_color)
+        path_list = []
+        for contour in contours:
+            progress.check()
+            beziers, closed = svg_curves.fit_contour(contour, max_error=curve_tolerance)
+            path_data = svg_curves.beziers_to_svg_path(beziers, closed)
+            if path_data:
+                path_list.append(path_data)
+                nodes += len(beziers) + 1
+        logging.debug(f"Fitted {len(path_list)} curve paths for color {hex_color}.")
+        if path_list:
+            color_paths.append((hex_color, path_list))
+    return color_paths, nodes
+
+
+def _build_document(width, height, color_paths, opacity, progress=_NULL_PROGRESS, pretty=True):
+    """Serializes the SVG document for the given paths (indented unless pretty is False)."""
+    import svgwrite # Only needed for SVG output, not for .npz geometry
+    dwg = svgwrite.Drawing(profile='tiny', size=(f"{width}px", f"{height}px"))
+    dwg.viewbox(0, 0, width, height)
+    # Optional: Add background rectangle if needed
+    # dwg.add(dwg.rect(insert=(0, 0), size=('100%', '100%'), fill='white'))
+
+    for i, (hex_color, path_list) in enumerate(color_paths):
+        progress.step(i, len(color_paths))
+        for path_data in path_list:
+            dwg.add(dwg.path(
+                d=path_data,
+                fill=hex_color,
+                fill_opacity=opacity,
+                stroke='none' # No stroke by default
+            ))
+
+    buffer = io_module.StringIO()
+    dwg.write(buffer, pretty=pretty) # Use pretty=True for readable output
+    return buffer.getvalue()
+
+
+def _default_output_path(image_path, extension='.svg'):
+    """Builds '<image_name>_converted.svg' (or another extension), avoiding existing files."""
+    base_name = os.path.splitext(image_path)[0]
+    output_path = f"{base_name}_converted{extension}"
+    # Handle potential duplicate output filenames
+    counter = 1
+    while os.path.exists(output_path):
+         output_path = f"{base_name}_converted_{counter}{extension}"
+         counter += 1
+    return output_path
+
+
+def _output_format(opts, output_path):
+    """Resolves options['output_format']; None picks the format from the output file's extension."""
+    output_format = opts.get('output_format') or svg_export.format_from_path(output_path)
+    if output_format not in svg_export.OUTPUT_FORMATS:
+        raise SvgConversionError(f"Unknown output_format {output_format!r}; expected one of {svg_export.OUTPUT_FORMATS}.")
+    return output_format
+
+
+def convert_image_to_svg(image_path, output_path=None, options=None, cache=None, instrumentation=None,
+                         progress_callback=None, cancel_token=None):
     """
     Converts a raster image to an SVG file by vectorizing color regions.
 
+    The conversion runs as a chain of stages (decode -> preprocess -> palette ->
+    masks -> contours -> paths -> write). When a StageCache is passed, each stage
+    result is memoized under its inputs, so repeated calls that only change e.g.
+    'opacity' or 'simplify_tolerance' skip decoding and clustering.
+
     Args:
         image_path (str): Path to the input raster image.
         output_path (str, optional): Path to save the output SVG file.
-            If None, defaults to '<image_name>_converted.svg'.
+            If None, defaults to '<image_name>_converted.svg' (.svgz/.npz for those formats).
         options (dict, optional): Conversion parameters:
             'n_colors' (int): Number of dominant colors to find (default: 5).
             'tolerance' (float): Tolerance for grouping colors (HSV/intensity space, default: 0.2).
             'opacity' (float): Fill opacity for SVG paths (0.0-1.0, default: 1.0).
             'simplify_tolerance' (float): Tolerance for simplifying contours (default: 0.5).
+                Ignored when 'curve_fitting' is on.
+            'contour_mode' (str): 'full' traces each color mask over the whole image;
+                'components' labels connected groups of occupied tiles and traces each
+                group inside its bounding box, which is much cheaper for small, sparse
+                regions (default: 'full'). 'topology' assigns every pixel to its nearest
+                palette color, traces the boundaries between all regions once as a planar
+                graph, simplifies every shared edge a single time and writes one path per
+                color, so neighbouring colors meet without gaps or overlaps.
+            'min_region_area' (int): Despeckle threshold in pixels. Connected regions
+                smaller than this are merged into the neighboring color they share the
+                longest border with, instead of becoming their own paths (default: 0, off).
+            'morphology' (str): Optional 3x3 'open' or 'close' applied to each color's
+                mask before despeckling (default: None).
+            'curve_fitting' (bool): Fit cubic Bezier curves to the contours and emit C
+                commands instead of straight L segments (default: False).
+            'curve_tolerance' (float): Largest distance in pixels between a fitted curve
+                and the traced contour (default: 1.0).
+            'quantizer' (str): Palette engine: 'sklearn' (scikit-learn KMeans), 'kmeans'
+                (NumPy k-means++ with early stopping), 'median_cut' or 'octree' (Pillow);
+                see svg_quantizers.register_quantizer for custom engines (default: 'sklearn').
+            'low_memory' (bool): Keep pixels as uint8/float32, convert colors in chunks
+                and trace each color in a reused mask buffer (default: False).
+            'memory_map' (bool): Map uncompressed BMP/TIFF/PPM/.npy inputs into memory
+                instead of reading them (other files are decoded as usual). The palette
+                is computed from a row sample and the label map is built chunk by chunk
+                from the mapping, so processes converting the same file share the page
+                cache. Implies 'low_memory'; overlapping tolerance boxes resolve to the
+                nearest color as with despeckling (default: False).
+            'output_format' (str): 'svg', 'svgz' (gzip-compressed, unindented SVG
+                streamed to disk) or 'npz' (NumPy archive with the palette and the
+                delta-encoded path coordinates, no XML; see svg_export.write_npz and
+                svg_export.load_npz). None picks the format from the output_path
+                extension and falls back to 'svg' (default: None).
+            'label_workers' (int): Processes that build the label map (used by
+                'min_region_area', 'morphology', 'topology' and 'memory_map') in
+                parallel row chunks. The image and the label map are handed over in
+                shared memory; only very large images outweigh the
+                process start-up cost (default: 1, in-process).
+        cache (StageCache, optional): Cache for intermediate stage results. If None,
+            every stage is recomputed and nothing is retained.
+        instrumentation (Instrumentation, optional): Collects per-stage wall/CPU time,
+            traced memory and contour/point/path counts into instrumentation.stats and
+            sends them to its sinks. If None, no measurements are taken.
+        progress_callback (callable, optional): Called as progress_callback(fraction, stage)
+            with the overall fraction in [0, 1] at stage boundaries and between colors.
+            It runs on the converting thread.
+        cancel_token (CancellationToken, optional): Checked between stages, colors,
+            contours and k-means initialisations; once cancelled the conversion raises
+            SvgConversionCancelled.
 
     Returns:
         str: The path to the saved SVG file on success.
@@ -210,87 +1106,254 @@ def convert_image_to_svg(image_path, output_path=None, options=None):
     Raises:
         FileNotFoundError: If the input image is not found.
         SvgConversionError: For errors during the conversion process.
+        SvgConversionCancelled: If cancel_token was cancelled (a SvgConversionError subclass).
         Exception: For other unexpected errors.
     """
     if not os.path.exists(image_path):
         raise FileNotFoundError(f"Input image not found: {image_path}")
 
+    opts = _resolve_options(options)
+    logging.info(f"Starting SVG conversion for '{image_path}' with options: {opts}")
+    progress = _Progress(progress_callback, cancel_token)
+    output_path, _ = _convert(image_path, output_path, opts, cache, instrumentation, progress)
+    return output_path
+
+
+def _resolve_options(options):
+    """Merges user options over the defaults."""
     # Default options
     default_options = {
         'n_colors': 5,
         'tolerance': 0.2,
         'opacity': 1.0, # Default to full opacity
-        'simplify_tolerance': 0.5
+        'simplify_tolerance': 0.5,
+        'quantizer': svg_quantizers.DEFAULT_QUANTIZER,
+        'low_memory': False,
+        'memory_map': False,
+        'label_workers': 1,
+        'output_format': None,
+        'curve_fitting': False,
+        'curve_tolerance': 1.0,
+        'contour_mode': 'full',
+        'min_region_area': 0,
+        'morphology': None
     }
     if options:
         default_options.update(options)
-    
-    opts = default_options
-    logging.info(f"Starting SVG conversion for '{image_path}' with options: {opts}")
+    return default_options
 
-    try:
-        # 1. Preprocess Image
-        img, img_smooth, img_hsv = _preprocess_image(image_path)
-        height, width = img.shape[:2]
-        logging.info(f"Image dimensions: {width}x{height}")
 
-        # 2. Get Dominant Colors
-        dominant_colors = _get_dominant_colors(img_smooth, opts['n_colors'])
+def _convert(image_path, output_path, opts, cache, instrumentation, progress, frame=None):
+    """
+    Runs the pipeline for one image (or one sequence frame) and writes the SVG.
 
-        # 3. Create Color Masks
-        color_masks = _create_color_masks(img_hsv, dominant_colors, opts['tolerance'])
-        if not color_masks:
-             raise SvgConversionError("No color regions found after masking. Try adjusting tolerance or n_colors.")
+    Returns:
+        tuple: (output_path, document) where document is the SVG text (None for 'npz' output).
+    """
+    if cache is None:
+        cache = NULL_CACHE
+    if instrumentation is None:
+        instrumentation = NULL_INSTRUMENTATION
+    instrumentation.start(image_path, opts)
 
-        # 4. Setup SVG Drawing
-        if output_path is None:
-            base_name = os.path.splitext(image_path)[0]
-            output_path = f"{base_name}_converted.svg"
-            # Handle potential duplicate output filenames
-            counter = 1
-            while os.path.exists(output_path):
-                 output_path = f"{base_name}_converted_{counter}.svg"
-                 counter += 1
-
-        dwg = svgwrite.Drawing(output_path, profile='tiny', size=(f"{width}px", f"{height}px"))
-        dwg.viewbox(0, 0, width, height)
-        # Optional: Add background rectangle if needed
-        # dwg.add(dwg.rect(insert=(0, 0), size=('100%', '100%'), fill='white'))
-
-        # 5. Process Masks and Create SVG Paths
-        total_paths = 0
-        for mask, rgb_color in color_masks:
-            contours = _get_contours(mask, opts['simplify_tolerance'])
-            hex_color = _rgb_to_hex(rgb_color)
-            logging.debug(f"Processing color {hex_color}, found {len(contours)} contours.")
-
-            for contour in contours:
-                path_data = _contour_to_svg_path(contour)
-                if path_data:
-                    dwg.add(dwg.path(
-                        d=path_data,
-                        fill=hex_color,
-                        fill_opacity=opts['opacity'],
-                        stroke='none' # No stroke by default
-                    ))
-                    total_paths += 1
+    try:
+        # 1-6. Decode, preprocess, palette, masks, contours and paths (memoized)
+        paths_key, (width, height, color_paths, counts) = _build_paths(image_path, opts, cache, instrumentation, progress, frame)
+        for name, value in counts.items():
+            instrumentation.count(name, value)
 
+        total_paths = counts['paths']
         if total_paths == 0:
              raise SvgConversionError("No valid contours found to generate SVG paths.")
 
-        # 6. Save SVG
-        dwg.save(pretty=True) # Use pretty=True for readable output
+        # 7. Serialize and save SVG (or the geometry archive)
+        output_format = _output_format(opts, output_path)
+        if output_path is None:
+            output_path = _default_output_path(image_path, svg_export.OUTPUT_EXTENSIONS[output_format])
+        document = None
+        if output_format == 'npz':
+            with _stage('write', instrumentation, progress):
+                try:
+                    svg_export.write_npz(output_path, width, height, color_paths, opts['opacity'])
+                except svg_export.SvgExportError as e:
+                    raise SvgConversionError(f"Failed to write geometry archive: {e}")
+        else:
+            # Indentation only costs bytes inside a compressed file
+            pretty = output_format == 'svg'
+            def build_document():
+                with _stage('document', instrumentation, progress):
+                    return _build_document(width, height, color_paths, opts['opacity'], progress, pretty)
+            document = cache.get_or_compute(('document', paths_key, opts['opacity'], pretty), build_document)
+            with _stage('write', instrumentation, progress):
+                if output_format == 'svgz':
+                    svg_export.write_svgz(document, output_path)
+                else:
+                    with open(output_path, 'w', encoding='utf-8') as f:
+                        f.write(document)
         logging.info(f"SVG conversion successful. Saved {total_paths} paths to: {output_path}")
-        return output_path
+        instrumentation.finish(output_path)
+        return output_path, document
 
+    except SvgConversionCancelled as e:
+        logging.info(f"SVG conversion cancelled: {image_path}")
+        instrumentation.finish(error=e)
+        raise
     except (FileNotFoundError, SvgConversionError) as e:
         logging.error(f"SVG conversion failed: {e}")
+        instrumentation.finish(error=e)
         raise # Re-raise specific errors
     except Exception as e:
         logging.error(f"An unexpected error occurred during SVG conversion: {e}", exc_info=True)
+        instrumentation.finish(error=e)
         raise Exception(f"SVG conversion failed unexpectedly: {e}") # Raise generic exception
 
 
+class _Frame:
+    """One decoded frame of a sequence, plus the palette handed from frame to frame."""
+
+    def __init__(self, pixels, init_palette=None):
+        self.pixels = pixels
+        self.init_palette = init_palette
+        self.palette = None # Mask-space palette actually used, filled in by _build_paths
+        # Identical frames (anywhere in the sequence) share cache entries
+        digest = hashlib.blake2b(np.ascontiguousarray(pixels).data, digest_size=16).hexdigest()
+        self.key = ('frame', digest, pixels.shape, pixels.dtype.str)
+
+
+def _frame_to_array(frame):
+    """Converts a PIL animation frame to an RGB or RGBA uint8 array."""
+    if frame.mode in ('RGBA', 'LA', 'PA') or 'transparency' in frame.info:
+        return np.asarray(frame.convert('RGBA'))
+    return np.asarray(frame.convert('RGB'))
+
+
+def _iter_frames(source):
+    """Yields (index, label, pixels) for an animated image file or an ordered list of frames."""
+    if isinstance(source, (str, os.PathLike)):
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"Input image not found: {source}")
+        with Image.open(source) as pil_img:
+            for index, frame in enumerate(ImageSequence.Iterator(pil_img)):
+                yield index, f"{source}[{index}]", _frame_to_array(frame)
+        return
+    for index, item in enumerate(source):
+        if isinstance(item, np.ndarray):
+            yield index, f"frame {index}", item
+        else:
+            if not os.path.exists(item):
+                raise FileNotFoundError(f"Input image not found: {item}")
+            yield index, str(item), _decode_image(item)
+
+
+def _count_frames(source):
+    if isinstance(source, (str, os.PathLike)):
+        with Image.open(source) as pil_img:
+            return getattr(pil_img, 'n_frames', 1)
+    return len(source)
+
+
+def _frame_unchanged(previous, current, threshold):
+    """
+    Cheap check whether a frame can reuse the previous frame's SVG.
+
+    With threshold 0 the frames must be identical (a memcmp-speed comparison);
+    otherwise the mean absolute difference over every 4th row and column (in
+    0-255 units for 8-bit frames) must not exceed threshold.
+    """
+    if previous is None or previous.shape != current.shape or previous.dtype != current.dtype:
+        return False
+    if threshold <= 0:
+        return np.array_equal(previous, current)
+    sample_prev = previous[::4, ::4].astype(np.float32)
+    sample_curr = current[::4, ::4].astype(np.float32)
+    return float(np.mean(np.abs(sample_curr - sample_prev))) <= threshold
+
+
+def _default_frames_dir(source):
+    if isinstance(source, (str, os.PathLike)):
+        return f"{os.path.splitext(source)[0]}_frames"
+    first = source[0] if len(source) else None
+    if isinstance(first, (str, os.PathLike)):
+        return os.path.join(os.path.dirname(os.path.abspath(first)), "svg_frames")
+    raise SvgConversionError("output_dir is required when the frames are given as arrays.")
+
+
+def convert_sequence_to_svg(source, output_dir=None, options=None, cache=None, instrumentation=None,
+                            progress_callback=None, cancel_token=None):
+    """
+    Converts an animation or an ordered list of frames to one SVG per frame.
+
+    Consecutive frames usually share a palette, so after the first frame the
+    palette stage is warm-started from the previous frame's centers with a single
+    k-means run (n_init=1) instead of ten fresh initialisations. Frames that did
+    not change are not vectorized again; the previous SVG is written for them.
+
+    Args:
+        source (str or list): An animated image file (GIF, WebP, APNG, multi-page
+            TIFF) or an ordered list of frame file paths and/or numpy arrays.
+        output_dir (str, optional): Directory for 'frame_0000.svg', 'frame_0001.svg', ...
+            (.svgz/.npz with options['output_format'])
+            Defaults to '<source_name>_frames' (or 'svg_frames' next to the first
+            frame file). Required when the frames are arrays.
+        options (dict, optional): The convert_image_to_svg options, plus:
+            'frame_diff_threshold' (float): Largest mean absolute pixel difference
+                (sampled on every 4th row/column) for a frame to count as unchanged;
+                0 means only identical frames are skipped (default: 0).
+            'warm_start' (bool): Initialise each palette from the previous frame's
+                centers (default: True). Needs a k-means quantizer.
+        cache, instrumentation, progress_callback, cancel_token: As for
+            convert_image_to_svg; progress covers the whole sequence, and
+            instrumentation records one conversion per vectorized frame.
+
+    Returns:
+        list: The path of the SVG written for every frame, in order.
+
+    Raises:
+        FileNotFoundError: If the source (or a frame file) is not found.
+        SvgConversionError: For errors during the conversion process.
+        SvgConversionCancelled: If cancel_token was cancelled.
+    """
+    opts = _resolve_options(options)
+    diff_threshold = float(opts.pop('frame_diff_threshold', 0) or 0)
+    warm_start = bool(opts.pop('warm_start', True))
+    if output_dir is None:
+        output_dir = _default_frames_dir(source)
+    os.makedirs(output_dir, exist_ok=True)
+    n_frames = max(_count_frames(source), 1)
+    logging.info(f"Starting SVG sequence conversion of {n_frames} frames into '{output_dir}' with options: {opts}")
+
+    extension = svg_export.OUTPUT_EXTENSIONS[_output_format(opts, None)]
+    outputs = []
+    previous_pixels = None
+    previous_output = None
+    init_palette = None
+    skipped = 0
+    for index, label, pixels in _iter_frames(source):
+        if cancel_token is not None and cancel_token.cancelled:
+            raise SvgConversionCancelled("SVG conversion was cancelled.")
+        output_path = os.path.join(output_dir, f"frame_{index:04d}{extension}")
+
+        if previous_output is not None and _frame_unchanged(previous_pixels, pixels, diff_threshold):
+            shutil.copyfile(previous_output, output_path)
+            skipped += 1
+        else:
+            def frame_progress(fraction, stage, index=index):
+                if progress_callback is not None:
+                    progress_callback((index + fraction) / n_frames, f"frame {index + 1}/{n_frames}: {stage}")
+            frame = _Frame(pixels, init_palette if warm_start else None)
+            previous_output, _ = _convert(label, output_path, opts, cache, instrumentation,
+                                          _Progress(frame_progress, cancel_token), frame)
+            if frame.palette is not None:
+                init_palette = _from_mask_space(frame.palette, frame.palette.shape[1] == 1)
+            previous_pixels = pixels
+        outputs.append(output_path)
+
+    if progress_callback is not None:
+        progress_callback(1.0, "done")
+    logging.info(f"SVG sequence conversion finished: {len(outputs)} frames, {skipped} unchanged frames reused.")
+    return outputs
+
+
 if __name__ == '__main__':
     # Example usage for testing the core function
     print("Testing SVG converter core function...")
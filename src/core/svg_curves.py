@@ -0,0 +1,254 @@
+import logging
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Turning angle (degrees) above which a contour point is kept as a sharp corner
+DEFAULT_CORNER_ANGLE = 60.0
+# Neighbour distance (in contour points) used for tangents and corner detection.
+# Marching squares output steps in 0.5-1 px staircases, so adjacent points are too noisy.
+TANGENT_SPAN = 3
+# Newton-Raphson reparameterisation is only tried when the error is within this factor of the bound
+REPARAMETERIZE_FACTOR = 4.0
+MAX_REPARAMETERIZE_ITERATIONS = 4
+
+
+def _normalize(vector):
+    """Returns vector scaled to unit length (or the zero vector unchanged)."""
+    length = np.hypot(vector[0], vector[1])
+    return vector / length if length > 0 else vector
+
+
+def _bezier_basis(t):
+    """Bernstein basis of a cubic Bezier evaluated at parameters t, shape (len(t), 4)."""
+    mt = 1.0 - t
+    return np.stack([mt ** 3, 3 * mt ** 2 * t, 3 * mt * t ** 2, t ** 3], axis=1)
+
+
+def _evaluate(bezier, t):
+    """Points of a cubic Bezier (4x2 control points) at parameters t."""
+    return _bezier_basis(t) @ bezier
+
+
+def _chord_length_parameters(points):
+    """Assigns each point a parameter in [0, 1] proportional to cumulative chord length."""
+    distances = np.hypot(*np.diff(points, axis=0).T)
+    u = np.concatenate(([0.0], np.cumsum(distances)))
+    return u / u[-1] if u[-1] > 0 else np.linspace(0.0, 1.0, len(points))
+
+
+def _generate_bezier(points, u, left_tangent, right_tangent):
+    """Least-squares fit of the two inner control points along fixed end tangents."""
+    first, last = points[0], points[-1]
+    basis = _bezier_basis(u)
+    a1 = basis[:, 1:2] * left_tangent
+    a2 = basis[:, 2:3] * right_tangent
+
+    c00 = np.einsum('ij,ij->', a1, a1)
+    c01 = np.einsum('ij,ij->', a1, a2)
+    c11 = np.einsum('ij,ij->', a2, a2)
+    residual = points - np.outer(basis[:, 0] + basis[:, 1], first) - np.outer(basis[:, 2] + basis[:, 3], last)
+    x0 = np.einsum('ij,ij->', a1, residual)
+    x1 = np.einsum('ij,ij->', a2, residual)
+
+    segment_length = np.hypot(*(last - first))
+    determinant = c00 * c11 - c01 * c01
+    alpha_left = alpha_right = 0.0
+    if abs(determinant) > 1e-12:
+        alpha_left = (x0 * c11 - x1 * c01) / determinant
+        alpha_right = (c00 * x1 - c01 * x0) / determinant
+    # Degenerate or negative handle lengths: fall back to the Wu/Barsky heuristic
+    epsilon = 1e-6 * segment_length
+    if alpha_left < epsilon or alpha_right < epsilon:
+        alpha_left = alpha_right = segment_length / 3.0
+    return np.array([first, first + alpha_left * left_tangent, last + alpha_right * right_tangent, last])
+
+
+def _reparameterize(bezier, points, u):
+    """One Newton-Raphson step moving each parameter towards its point's closest position on the curve."""
+    mt = 1.0 - u
+    q = _evaluate(bezier, u)
+    d1 = 3 * (np.outer(mt ** 2, bezier[1] - bezier[0]) + np.outer(2 * mt * u, bezier[2] - bezier[1])
+              + np.outer(u ** 2, bezier[3] - bezier[2]))
+    d2 = 6 * (np.outer(mt, bezier[2] - 2 * bezier[1] + bezier[0]) + np.outer(u, bezier[3] - 2 * bezier[2] + bezier[1]))
+    offset = q - points
+    numerator = np.einsum('ij,ij->i', offset, d1)
+    denominator = np.einsum('ij,ij->i', d1, d1) + np.einsum('ij,ij->i', offset, d2)
+    step = np.divide(numerator, denominator, out=np.zeros_like(u), where=np.abs(denominator) > 1e-12)
+    return np.clip(u - step, 0.0, 1.0)
+
+
+def _max_error(bezier, points, u):
+    """Largest distance between the points and the curve, and the index where it occurs."""
+    distances = np.hypot(*(_evaluate(bezier, u) - points).T)
+    index = int(np.argmax(distances))
+    return distances[index], index
+
+
+def _fit_cubic(points, left_tangent, right_tangent, max_error):
+    """
+    Schneider's algorithm: fits one or more cubic Beziers to an ordered run of points.
+
+    The run is split at the worst-fitting point until every piece is within
+    max_error; an explicit stack replaces recursion so long contours cannot
+    exhaust the interpreter's recursion limit.
+
+    Returns:
+        list: 4x2 control point arrays, in order from points[0] to points[-1].
+    """
+    beziers = []
+    stack = [(points, left_tangent, right_tangent)]
+    while stack:
+        run, left, right = stack.pop()
+        if len(run) == 2:
+            length = np.hypot(*(run[1] - run[0])) / 3.0
+            beziers.append(np.array([run[0], run[0] + left * length, run[1] + right * length, run[1]]))
+            continue
+
+        u = _chord_length_parameters(run)
+        bezier = _generate_bezier(run, u, left, right)
+        error, split = _max_error(bezier, run, u)
+        if error > max_error and error < max_error * REPARAMETERIZE_FACTOR:
+            for _ in range(MAX_REPARAMETERIZE_ITERATIONS):
+                u = _reparameterize(bezier, run, u)
+                bezier = _generate_bezier(run, u, left, right)
+                error, split = _max_error(bezier, run, u)
+                if error <= max_error:
+                    break
+        if error <= max_error:
+            beziers.append(bezier)
+            continue
+
+        split = min(max(split, 1), len(run) - 2)
+        center = _normalize(run[split - 1] - run[split + 1])
+        if not center.any():
+            center = _normalize(run[split - 1] - run[split])
+        # Right half first so the left half is popped (and emitted) first
+        stack.append((run[split:], -center, right))
+        stack.append((run[:split + 1], left, center))
+    return beziers
+
+
+def _find_corners(ring, corner_angle, span):
+    """Indices of points on a closed ring whose turning angle exceeds corner_angle (degrees)."""
+    incoming = ring - np.roll(ring, span, axis=0)
+    outgoing = np.roll(ring, -span, axis=0) - ring
+    norms = np.hypot(*incoming.T) * np.hypot(*outgoing.T)
+    cosine = np.einsum('ij,ij->i', incoming, outgoing) / np.where(norms > 0, norms, 1.0)
+    angles = np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+    candidates = angles > corner_angle
+    if not candidates.any():
+        return []
+    if candidates.all():
+        return [int(np.argmax(angles))]
+
+    # A sharp corner shows up as a short run of candidates; keep the sharpest point of each run
+    start = int(np.argmin(candidates)) # Begin scanning at a non-candidate so runs do not wrap
+    corners = []
+    best = None
+    for offset in range(1, len(ring) + 1):
+        i = (start + offset) % len(ring)
+        if candidates[i]:
+            if best is None or angles[i] > angles[best]:
+                best = i
+        elif best is not None:
+            corners.append(best)
+            best = None
+    return sorted(corners)
+
+
+def fit_contour(contour, max_error=1.0, corner_angle=DEFAULT_CORNER_ANGLE, closed=None):
+    """
+    Fits cubic Bezier segments to a traced contour.
+
+    Sharp turns (above corner_angle) are kept as corners; everything between
+    them is fitted with G1-continuous cubics that stay within max_error of the
+    original points.
+
+    Args:
+        contour (np.ndarray): Nx2 array of [row, col] points; a closed contour
+            repeats its first point at the end (as measure.find_contours does).
+        max_error (float): Largest allowed distance (pixels) between the curve and the points.
+        corner_angle (float): Turning angle in degrees above which a point is a corner.
+        closed (bool, optional): Whether the contour is a closed ring. By default a
+            contour is closed when its last point repeats the first; pass False to
+            fit such a contour as an open chain that starts and ends on that point.
+
+    Returns:
+        tuple: (beziers, closed) where beziers is a list of 4x2 control point arrays.
+    """
+    points = np.asarray(contour, dtype=np.float64)
+    if closed is None:
+        closed = len(points) > 2 and np.allclose(points[0], points[-1])
+    if closed:
+        points = points[:-1]
+    # Drop repeated points, which would give zero-length tangents
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = np.any(np.diff(points, axis=0) != 0, axis=1)
+    points = points[keep]
+    if len(points) < 2:
+        return [], closed
+
+    span = max(1, min(TANGENT_SPAN, len(points) // 4))
+    if not closed:
+        corners = [0, len(points) - 1]
+        ring = points
+    else:
+        ring = points
+        corners = _find_corners(ring, corner_angle, span) if len(ring) >= 4 else []
+
+    # Break points: the corners, or two opposite points if the closed contour is smooth everywhere
+    smooth = not corners
+    if smooth:
+        corners = [0, len(ring) // 2]
+    count = len(ring)
+
+    def tangent_at(i):
+        return _normalize(ring[(i + span) % count] - ring[(i - span) % count])
+
+    beziers = []
+    runs = zip(corners, corners[1:] + ([corners[0] + count] if closed else []))
+    for start, end in runs:
+        indices = np.arange(start, end + 1) % count
+        run = ring[indices]
+        if len(run) < 2:
+            continue
+        reach = min(span, len(run) - 1)
+        if smooth:
+            left, right = tangent_at(start), -tangent_at(end % count)
+        else:
+            left = _normalize(run[reach] - run[0])
+            right = _normalize(run[-1 - reach] - run[-1])
+        beziers.extend(_fit_cubic(run, left, right, max_error))
+    return beziers, closed
+
+
+def _is_straight(bezier, tolerance=0.01):
+    """True if both control points lie on the chord, i.e. the segment can be written as a line."""
+    chord = bezier[3] - bezier[0]
+    length_sq = chord @ chord
+    if length_sq == 0:
+        return True
+    offsets = bezier[1:3] - bezier[0]
+    along = offsets @ chord / length_sq
+    across = np.abs(offsets[:, 0] * chord[1] - offsets[:, 1] * chord[0]) / np.sqrt(length_sq)
+    return bool(np.all(across <= tolerance) and np.all((along >= 0) & (along <= 1)))
+
+
+def beziers_to_svg_path(beziers, closed):
+    """Converts fitted Bezier segments ([row, col] control points) to SVG path data with C (or L) commands."""
+    if not beziers:
+        return ""
+    # SVG uses (x, y) which corresponds to (col, row)
+    start = beziers[0][0]
+    parts = [f"M {start[1]:.2f},{start[0]:.2f}"]
+    for bezier in beziers:
+        if _is_straight(bezier): # Straight runs need no control points
+            parts.append(f"L {bezier[3][1]:.2f},{bezier[3][0]:.2f}")
+        else:
+            parts.append("C " + " ".join(f"{point[1]:.2f},{point[0]:.2f}" for point in bezier[1:]))
+    if closed:
+        parts.append("Z")
+    return " ".join(parts)
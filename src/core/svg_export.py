@@ -0,0 +1,159 @@
+import os
+import re
+import gzip
+import logging
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Values accepted for options['output_format'] and the file extension each one writes
+OUTPUT_FORMATS = ('svg', 'svgz', 'npz')
+OUTPUT_EXTENSIONS = {'svg': '.svg', 'svgz': '.svgz', 'npz': '.npz'}
+# Coordinates are stored as integers in 1/100 px, the precision of the written path data
+COORDINATE_SCALE = 100
+NPZ_FORMAT_VERSION = 1
+# Characters handed to the gzip stream per write
+SVGZ_CHUNK_CHARS = 1 << 20
+
+# Path operation codes stored in the .npz 'ops' array and the points each one consumes
+OP_MOVE, OP_LINE, OP_CURVE, OP_CLOSE = 0, 1, 2, 3
+OP_POINTS = np.array([1, 1, 3, 0])
+_OP_CODES = {'M': OP_MOVE, 'L': OP_LINE, 'C': OP_CURVE, 'Z': OP_CLOSE}
+_OP_LETTERS = 'MLCZ'
+
+_COMMAND = re.compile(r"[MLCZ]")
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+class SvgExportError(Exception):
+    """Custom exception for SVG export errors."""
+    pass
+
+
+def format_from_path(output_path, default='svg'):
+    """Output format implied by a file extension ('.svgz' -> 'svgz', '.npz' -> 'npz'), else default."""
+    extension = os.path.splitext(output_path or '')[1].lower()
+    for output_format, format_extension in OUTPUT_EXTENSIONS.items():
+        if extension == format_extension:
+            return output_format
+    return default
+
+
+def write_svgz(document, output_path):
+    """Streams an SVG document through gzip into output_path."""
+    with gzip.open(output_path, 'wt', encoding='utf-8', compresslevel=9) as f:
+        for start in range(0, len(document), SVGZ_CHUNK_CHARS):
+            f.write(document[start:start + SVGZ_CHUNK_CHARS])
+
+
+def _encode_paths(path_list):
+    """
+    Encodes the path data strings written by svg_converter (absolute M, L, C and Z).
+
+    Returns:
+        tuple: (ops, ops_per_path, points) where points are absolute (x, y) int64
+            coordinates in 1/COORDINATE_SCALE px.
+    """
+    ops_per_path = np.array([sum(path_data.count(letter) for letter in _OP_LETTERS) for path_data in path_list],
+                            dtype=np.int64)
+    stream = " ".join(path_list)
+    ops = np.array([_OP_CODES[letter] for letter in _COMMAND.findall(stream)], dtype=np.uint8)
+    coordinates = np.array(_NUMBER.findall(stream), dtype=np.float64)
+    points = np.rint(coordinates * COORDINATE_SCALE).astype(np.int64).reshape(-1, 2)
+    if len(ops) != ops_per_path.sum() or OP_POINTS[ops].sum() != len(points):
+        raise SvgExportError("Path data does not match the M/L/C/Z layout written by the converter.")
+    return ops, ops_per_path, points
+
+
+def write_npz(output_path, width, height, color_paths, opacity):
+    """
+    Writes the palette and the path geometry as a compressed NumPy archive.
+
+    Paths keep their drawing order. Every path is a run of operations (MOVE,
+    LINE, CURVE, CLOSE) in 'ops'; 'path_ops' holds each path's offset into it
+    (CSR layout, n_paths + 1 entries). The points all operations consume (1, 1,
+    3 and 0 respectively) form a single stream stored as int32 deltas in
+    1/100 px, so np.cumsum(deltas, axis=0) / 100 restores the absolute
+    coordinates. Small deltas compress far better than absolute values.
+
+    Arrays: format_version, size ([width, height]), opacity, palette (n_colors x 3
+    uint8 RGB), path_color (palette index per path), path_ops, ops, deltas.
+    """
+    palette = []
+    color_index = {}
+    path_color = []
+    all_paths = []
+    for hex_color, path_list in color_paths:
+        if hex_color not in color_index:
+            color_index[hex_color] = len(palette)
+            palette.append([int(hex_color[i:i + 2], 16) for i in (1, 3, 5)])
+        path_color.extend([color_index[hex_color]] * len(path_list))
+        all_paths.extend(path_list)
+
+    ops, ops_per_path, points = _encode_paths(all_paths)
+    deltas = np.diff(points, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+    if len(deltas) and np.abs(deltas).max() > np.iinfo(np.int32).max:
+        raise SvgExportError("Coordinates are too large for the .npz delta encoding.")
+
+    with open(output_path, 'wb') as f: # A file object keeps numpy from appending '.npz' to the name
+        np.savez_compressed(
+            f,
+            format_version=np.array(NPZ_FORMAT_VERSION),
+            size=np.array([width, height], dtype=np.int64),
+            opacity=np.array(opacity, dtype=np.float64),
+            palette=np.array(palette, dtype=np.uint8).reshape(-1, 3),
+            path_color=np.array(path_color, dtype=np.uint16),
+            path_ops=np.concatenate(([0], np.cumsum(ops_per_path))).astype(np.int64),
+            ops=ops,
+            deltas=deltas.astype(np.int32),
+        )
+    logging.debug(f"Wrote {len(all_paths)} paths ({len(points)} points) to {output_path}.")
+
+
+def load_npz(npz_path):
+    """
+    Reads a geometry archive written by write_npz.
+
+    Returns:
+        dict: 'width', 'height', 'opacity' and 'paths', a list of (rgb, ops, points)
+            per path in drawing order, where rgb is an (r, g, b) tuple, ops the
+            operation codes and points an Nx2 float array of absolute (x, y) pixels.
+
+    Raises:
+        SvgExportError: If the archive has an unknown format version.
+    """
+    with np.load(npz_path) as data:
+        if int(data['format_version']) != NPZ_FORMAT_VERSION:
+            raise SvgExportError(f"Unsupported geometry archive version {int(data['format_version'])}.")
+        width, height = (int(value) for value in data['size'])
+        points = np.cumsum(data['deltas'].astype(np.int64), axis=0) / COORDINATE_SCALE
+        ops = data['ops']
+        path_ops = data['path_ops']
+        palette = data['palette']
+        path_color = data['path_color']
+        opacity = float(data['opacity'])
+
+    point_offsets = np.concatenate(([0], np.cumsum(OP_POINTS[ops])))
+    paths = []
+    for i, color_id in enumerate(path_color):
+        first_op, last_op = path_ops[i], path_ops[i + 1]
+        paths.append((
+            tuple(int(channel) for channel in palette[color_id]),
+            ops[first_op:last_op],
+            points[point_offsets[first_op]:point_offsets[last_op]],
+        ))
+    return {'width': width, 'height': height, 'opacity': opacity, 'paths': paths}
+
+
+def path_data_from_ops(ops, points):
+    """Rebuilds SVG path data from one path's operation codes and points (as returned by load_npz)."""
+    parts = []
+    index = 0
+    for op in ops:
+        count = OP_POINTS[op]
+        coordinates = " ".join(f"{x:.2f},{y:.2f}" for x, y in points[index:index + count])
+        parts.append(_OP_LETTERS[op] + (" " + coordinates if count else ""))
+        index += count
+    return " ".join(parts)
@@ -0,0 +1,183 @@
+import json
+import time
+import logging
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class StageStats:
+    """Timing and memory figures for one executed pipeline stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.allocated_bytes = None # Net traced allocation (None unless memory tracking is on)
+        self.peak_bytes = None # Peak traced allocation above the stage's starting point
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'wall_seconds': round(self.wall_seconds, 6),
+            'cpu_seconds': round(self.cpu_seconds, 6),
+            'allocated_bytes': self.allocated_bytes,
+            'peak_bytes': self.peak_bytes,
+        }
+
+
+class ConversionStats:
+    """
+    Structured result of an instrumented conversion.
+
+    Only stages that actually ran are listed; stages served from a StageCache
+    do not appear. 'counts' holds figures such as colors, contours, points and paths.
+    """
+
+    def __init__(self, image_path, options):
+        self.image_path = image_path
+        self.options = dict(options or {})
+        self.output_path = None
+        self.stages = []
+        self.counts = {}
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.error = None
+
+    def stage(self, name):
+        """Returns the StageStats recorded for name, or None if that stage did not run."""
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        return None
+
+    def to_dict(self):
+        return {
+            'image_path': self.image_path,
+            'output_path': self.output_path,
+            'options': self.options,
+            'wall_seconds': round(self.wall_seconds, 6),
+            'cpu_seconds': round(self.cpu_seconds, 6),
+            'stages': [stage.to_dict() for stage in self.stages],
+            'counts': self.counts,
+            'error': self.error,
+        }
+
+
+class JsonLinesSink:
+    """Sink that appends each ConversionStats as one JSON object per line to a file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, stats):
+        line = json.dumps(stats.to_dict(), default=str)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+
+class Instrumentation:
+    """
+    Opt-in per-stage instrumentation for convert_image_to_svg.
+
+    Records wall time, CPU time and (optionally) traced memory for every stage
+    that runs, plus contour/point/path counts. When the conversion finishes the
+    ConversionStats object is stored in .stats and passed to every sink.
+
+    Args:
+        sinks (list, optional): Callables receiving the ConversionStats, e.g. a
+            plain callback or a JsonLinesSink.
+        track_memory (bool): Trace allocations with tracemalloc (default: False).
+            Adds noticeable overhead, so it is off unless requested.
+    """
+
+    enabled = True
+
+    def __init__(self, sinks=None, track_memory=False):
+        self.sinks = list(sinks or [])
+        self.track_memory = track_memory
+        self.stats = None
+        self._started_tracing = False
+        self._wall_start = 0.0
+        self._cpu_start = 0.0
+
+    def start(self, image_path, options):
+        """Begins a new ConversionStats record."""
+        self.stats = ConversionStats(image_path, options)
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+    @contextmanager
+    def stage(self, name):
+        """Context manager timing one stage."""
+        record = StageStats(name)
+        tracing = self.track_memory and tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            mem_start = tracemalloc.get_traced_memory()[0]
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            record.wall_seconds = time.perf_counter() - wall_start
+            record.cpu_seconds = time.process_time() - cpu_start
+            if tracing:
+                mem_current, mem_peak = tracemalloc.get_traced_memory()
+                record.allocated_bytes = mem_current - mem_start
+                record.peak_bytes = mem_peak - mem_start
+            self.stats.stages.append(record)
+
+    def count(self, name, value):
+        """Records a count (e.g. 'contours', 'points') for the current conversion."""
+        self.stats.counts[name] = value
+
+    def finish(self, output_path=None, error=None):
+        """Closes the record, hands it to the sinks and returns it."""
+        stats = self.stats
+        stats.wall_seconds = time.perf_counter() - self._wall_start
+        stats.cpu_seconds = time.process_time() - self._cpu_start
+        stats.output_path = output_path
+        if error is not None:
+            stats.error = str(error)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+        for sink in self.sinks:
+            try:
+                sink(stats)
+            except Exception as e:
+                logging.warning(f"Instrumentation sink {sink!r} failed: {e}", exc_info=True)
+        return stats
+
+
+class _NullInstrumentation:
+    """Disabled instrumentation: every hook is a no-op."""
+
+    enabled = False
+    stats = None
+    _null_stage = nullcontext()
+
+    def start(self, image_path, options):
+        pass
+
+    def stage(self, name):
+        return self._null_stage
+
+    def count(self, name, value):
+        pass
+
+    def finish(self, output_path=None, error=None):
+        return None
+
+
+NULL_INSTRUMENTATION = _NullInstrumentation()
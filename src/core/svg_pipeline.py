@@ -0,0 +1,130 @@
+import sys
+import threading
+import logging
+from collections import OrderedDict
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Default memory budget for cached stage results (256 MB)
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def estimate_nbytes(value, _seen=None):
+    """Roughly estimates the memory held by a stage result (arrays, strings and containers)."""
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen: # Aliased objects (e.g. img_hsv is img for grayscale) count once
+        return 0
+    _seen.add(id(value))
+    # NumPy is not imported here (the GUI uses this cache without it); if nobody
+    # imported it, no value can be an array
+    np = sys.modules.get('numpy')
+    if np is not None and isinstance(value, np.ndarray):
+        from core.raster_mmap import is_file_backed
+        if is_file_backed(value): # Memory-mapped pixels live in the page cache, not in the cache budget
+            return 64
+        return value.nbytes + 64
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value) + 64
+    if isinstance(value, dict):
+        return 64 + sum(estimate_nbytes(k, _seen) + estimate_nbytes(v, _seen) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return 64 + sum(estimate_nbytes(v, _seen) for v in value)
+    return 64
+
+
+class StageCache:
+    """
+    Memory-bounded LRU cache for intermediate SVG pipeline results.
+
+    Each entry is keyed by the stage name plus everything the stage depends on
+    (the upstream stage key and its own parameters), so changing a parameter
+    only invalidates the stages downstream of it. The same instance can be
+    shared between the GUI and library calls; access is thread-safe.
+
+    Args:
+        max_bytes (int): Memory budget for all cached entries (default: 256 MB).
+            Least recently used entries are evicted once the budget is exceeded.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict() # key -> (value, nbytes)
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key, default=None):
+        """Returns the cached value for key (marking it recently used), or default."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, nbytes=None):
+        """Stores a value, evicting least recently used entries to stay within the budget."""
+        if nbytes is None:
+            nbytes = estimate_nbytes(value)
+        if nbytes > self.max_bytes:
+            logging.debug(f"Not caching stage {key[0]!r}: {nbytes} bytes exceeds budget of {self.max_bytes}")
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            self._entries[key] = (value, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes and self._entries:
+                evicted_key, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.nbytes -= evicted_bytes
+                logging.debug(f"Evicted cached stage {evicted_key[0]!r} ({evicted_bytes} bytes)")
+
+    def get_or_compute(self, key, compute):
+        """Returns the cached value for key, computing and storing it on a miss."""
+        sentinel = _MISSING
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        """Drops every cached entry."""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+
+class _NullCache:
+    """Cache stand-in used when no StageCache is supplied: always recomputes, stores nothing."""
+
+    def get_or_compute(self, key, compute):
+        return compute()
+
+
+class _NullProgress:
+    """Progress stand-in for pipeline helpers called outside a conversion: never reports, never cancels."""
+
+    def check(self):
+        pass
+
+    def step(self, done, total):
+        pass
+
+
+_MISSING = object()
+NULL_CACHE = _NullCache()
+NULL_PROGRESS = _NullProgress()
@@ -0,0 +1,204 @@
+import logging
+
+import numpy as np
+from PIL import Image
+
+from core.svg_pipeline import NULL_PROGRESS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_QUANTIZER = 'sklearn'
+# Rows of the distance matrix computed at once by the NumPy k-means (bounds its memory)
+KMEANS_CHUNK = 1 << 18
+KMEANS_MAX_ITER = 100
+KMEANS_TOLERANCE = 1e-4 # Stop once no center moves further than this (colors in [0, 1])
+KMEANS_N_INIT = 3
+
+
+# --- scikit-learn -----------------------------------------------------------
+
+def sklearn_kmeans(img, pixels, sample_weight, n_colors, progress=NULL_PROGRESS, init=None):
+    """
+    scikit-learn KMeans, the original engine.
+
+    Equivalent of KMeans(n_init=10): the initialisations run one at a time and the
+    lowest inertia wins, so a cancellation request is honoured between runs.
+    With init (e.g. the previous animation frame's centers) a single run starts
+    from those centers instead. sklearn is imported on first use only.
+    """
+    from sklearn.cluster import KMeans
+
+    if init is not None:
+        progress.step(0, 1)
+        kmeans = KMeans(n_clusters=n_colors, init=np.asarray(init, dtype=pixels.dtype), n_init=1)
+        return kmeans.fit(pixels, sample_weight=sample_weight).cluster_centers_
+
+    n_init = 10
+    seeds = np.random.RandomState(0).randint(np.iinfo(np.int32).max, size=n_init)
+    best = None
+    for i, seed in enumerate(seeds):
+        progress.step(i, n_init)
+        kmeans = KMeans(n_clusters=n_colors, random_state=seed, n_init=1)
+        kmeans.fit(pixels, sample_weight=sample_weight)
+        if best is None or kmeans.inertia_ < best.inertia_:
+            best = kmeans
+    return best.cluster_centers_
+
+
+# --- NumPy k-means++ --------------------------------------------------------
+
+def _assign(pixels, centers):
+    """Nearest center index and squared distance for every pixel, computed in row chunks."""
+    labels = np.empty(len(pixels), dtype=np.intp)
+    distances = np.empty(len(pixels), dtype=np.float32)
+    center_norms = np.einsum('ij,ij->i', centers, centers)
+    for start in range(0, len(pixels), KMEANS_CHUNK):
+        chunk = pixels[start:start + KMEANS_CHUNK]
+        # |p - c|^2 = |p|^2 - 2 p.c + |c|^2; |p|^2 does not change the argmin
+        partial = center_norms - 2.0 * (chunk @ centers.T)
+        chunk_labels = np.argmin(partial, axis=1)
+        labels[start:start + KMEANS_CHUNK] = chunk_labels
+        chunk_min = partial[np.arange(len(chunk)), chunk_labels] + np.einsum('ij,ij->i', chunk, chunk)
+        distances[start:start + KMEANS_CHUNK] = np.maximum(chunk_min, 0)
+    return labels, distances
+
+
+def _kmeans_plus_plus(pixels, weights, n_colors, rng):
+    """Weighted k-means++ seeding."""
+    centers = np.empty((n_colors, pixels.shape[1]), dtype=pixels.dtype)
+    centers[0] = pixels[rng.choice(len(pixels), p=weights / weights.sum())]
+    closest = np.einsum('ij,ij->i', pixels - centers[0], pixels - centers[0])
+    for k in range(1, n_colors):
+        potential = weights * closest
+        total = potential.sum()
+        if total <= 0: # Fewer distinct points than clusters; duplicates are harmless
+            centers[k:] = centers[0]
+            break
+        centers[k] = pixels[rng.choice(len(pixels), p=potential / total)]
+        np.minimum(closest, np.einsum('ij,ij->i', pixels - centers[k], pixels - centers[k]), out=closest)
+    return centers
+
+
+def _lloyd(pixels, weights, centers, progress):
+    """Weighted Lloyd iterations with early stopping; returns (centers, inertia)."""
+    channels = pixels.shape[1]
+    for _ in range(KMEANS_MAX_ITER):
+        progress.check()
+        labels, distances = _assign(pixels, centers)
+        totals = np.bincount(labels, weights=weights, minlength=len(centers))
+        new_centers = np.empty_like(centers)
+        for channel in range(channels):
+            sums = np.bincount(labels, weights=weights * pixels[:, channel], minlength=len(centers))
+            new_centers[:, channel] = sums / np.where(totals > 0, totals, 1)
+        empty = totals == 0
+        if empty.any(): # Re-seed empty clusters at the worst-fitting points
+            worst = np.argsort(distances * weights)[::-1][:np.count_nonzero(empty)]
+            new_centers[empty] = pixels[worst]
+        shift = np.max(np.abs(new_centers - centers))
+        centers = new_centers
+        if shift < KMEANS_TOLERANCE:
+            break
+    _, distances = _assign(pixels, centers)
+    return centers, float(np.dot(distances, weights))
+
+
+def numpy_kmeans(img, pixels, sample_weight, n_colors, progress=NULL_PROGRESS, init=None):
+    """
+    Vectorized NumPy k-means++ with early stopping (no scikit-learn needed).
+
+    Distances are computed in float32 row chunks, each run stops as soon as the
+    centers settle, and the best of KMEANS_N_INIT seeded runs is kept. With init
+    a single run starts from those centers instead.
+    """
+    pixels = np.ascontiguousarray(pixels, dtype=np.float32)
+    weights = np.ones(len(pixels)) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+    if init is not None:
+        progress.step(0, 1)
+        centers, _ = _lloyd(pixels, weights, np.asarray(init, dtype=np.float32), progress)
+        return centers.astype(np.float64)
+    rng = np.random.RandomState(0)
+    best_centers, best_inertia = None, np.inf
+    for i in range(KMEANS_N_INIT):
+        progress.step(i, KMEANS_N_INIT)
+        centers = _kmeans_plus_plus(pixels, weights, n_colors, rng)
+        centers, inertia = _lloyd(pixels, weights, centers, progress)
+        if inertia < best_inertia:
+            best_centers, best_inertia = centers, inertia
+    return best_centers.astype(np.float64)
+
+
+# --- Pillow -----------------------------------------------------------------
+
+def _to_pil_rgb(img):
+    """Builds an 8-bit RGB PIL image from a uint8 or [0, 1] float image (grayscale is replicated)."""
+    if img.dtype != np.uint8:
+        img = (np.clip(img, 0, 1) * 255 + 0.5).astype(np.uint8)
+    if img.ndim == 2:
+        return Image.fromarray(img, mode='L').convert('RGB')
+    return Image.fromarray(img, mode='RGB')
+
+
+def _pillow_quantize(img, n_colors, method, progress):
+    progress.step(0, 1)
+    quantized = _to_pil_rgb(img).quantize(colors=n_colors, method=method)
+    used = sorted(index for _, index in quantized.getcolors(maxcolors=256))
+    palette = np.array(quantized.getpalette()[:3 * 256], dtype=np.float64).reshape(-1, 3)[used] / 255.0
+    if img.ndim == 2:
+        return palette[:, :1]
+    return palette
+
+
+def median_cut(img, pixels, sample_weight, n_colors, progress=NULL_PROGRESS):
+    """Pillow's median-cut quantizer (C implementation, single pass)."""
+    return _pillow_quantize(img, n_colors, Image.Quantize.MEDIANCUT, progress)
+
+
+def octree(img, pixels, sample_weight, n_colors, progress=NULL_PROGRESS):
+    """Pillow's fast octree quantizer (C implementation, fastest engine)."""
+    return _pillow_quantize(img, n_colors, Image.Quantize.FASTOCTREE, progress)
+
+
+# Pillow engines work on the image itself and ignore the distinct-color samples
+median_cut.uses_samples = False
+octree.uses_samples = False
+# The k-means engines can be warm-started from given centers
+sklearn_kmeans.supports_init = True
+numpy_kmeans.supports_init = True
+
+QUANTIZERS = {
+    'sklearn': sklearn_kmeans,
+    'kmeans': numpy_kmeans,
+    'median_cut': median_cut,
+    'octree': octree,
+}
+
+
+def register_quantizer(name, engine):
+    """
+    Makes a quantizer engine selectable through options['quantizer'].
+
+    An engine is called as engine(img, pixels, sample_weight, n_colors, progress)
+    where img is the preprocessed image (uint8 or float in [0, 1], HxWx3 or HxW),
+    pixels/sample_weight are its distinct colors and their pixel counts (weights
+    may be None), and must return an (n, channels) array of centers in [0, 1].
+    Engines that set engine.uses_samples = False receive pixels=None and the
+    requested n_colors unchanged, which skips the distinct-color pass. Engines
+    that set engine.supports_init = True may also be called with init=<centers>
+    to warm-start from a previous palette (sequence mode).
+    """
+    QUANTIZERS[name] = engine
+
+
+def get_quantizer(name):
+    """Returns the engine registered under name; raises ValueError for unknown names."""
+    try:
+        return QUANTIZERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown quantizer {name!r}; expected one of {sorted(QUANTIZERS)}.") from None
+
+
+def warm_up(name=DEFAULT_QUANTIZER):
+    """Imports and exercises an engine once so the first real conversion starts hot."""
+    pixels = np.array([[0.0, 0.0, 0.0], [0.5, 0.5, 0.5], [1.0, 1.0, 1.0]])
+    get_quantizer(name)(pixels.reshape(1, 3, 3), pixels, None, 2)
@@ -0,0 +1,188 @@
+import logging
+
+import numpy as np
+from scipy import ndimage
+from skimage import measure
+
+from core.svg_pipeline import NULL_PROGRESS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Label of pixels not covered by any palette color's tolerance box
+NO_COLOR = 255
+# Values accepted for options['morphology']
+MORPHOLOGY_OPERATIONS = (None, 'open', 'close')
+# Upper bound on merge passes; each pass fuses every small region into a neighbor
+MAX_MERGE_PASSES = 10
+# Centers with less saturation or value than this (grays, near-white, near-black)
+# have no meaningful hue, and near-black ones no meaningful saturation either
+# (rgb2hsv gives [0, 1e-14, 1e-14] a saturation of 1), so their tolerance test
+# ignores those channels
+ACHROMATIC_THRESHOLD = 0.1
+
+_STRUCTURE = np.ones((3, 3), dtype=bool)
+
+
+def color_distance(channels, center, out, scratch):
+    """
+    Chebyshev distance of every pixel to a palette center, per channel.
+
+    A pixel lies inside a center's tolerance box exactly when its distance is
+    <= tolerance. Hue is compared around the color circle (0.95 is 0.1 away
+    from 0.05), and not at all for achromatic centers; for near-black centers
+    only the value counts.
+
+    Args:
+        channels (list): The H, S and V channel arrays, or the single intensity array.
+        center (np.ndarray): Palette center in the same space.
+        out (np.ndarray): float32 array, shaped like a channel, for the result.
+        scratch (np.ndarray): float32 work array shaped like out.
+
+    Returns:
+        np.ndarray: out.
+    """
+    center = np.atleast_1d(center)
+    is_hsv = len(channels) == 3
+    skipped = ()
+    if is_hsv and center[2] < ACHROMATIC_THRESHOLD:
+        skipped = (0, 1) # Hue and saturation
+    elif is_hsv and center[1] < ACHROMATIC_THRESHOLD:
+        skipped = (0,)
+    out.fill(0)
+    for i, (channel, value) in enumerate(zip(channels, center)):
+        if i in skipped:
+            continue
+        np.subtract(channel, value, out=scratch, casting='unsafe')
+        np.abs(scratch, out=scratch)
+        if i == 0 and is_hsv: # Hue wraps around: the distance is at most 0.5
+            np.minimum(scratch, 1.0 - scratch, out=scratch)
+        np.maximum(out, scratch, out=out)
+    return out
+
+
+def build_label_map(img_hsv, dominant_colors, tolerance, morphology=None, claim_all=False, progress=NULL_PROGRESS):
+    """
+    Assigns every pixel to one palette color.
+
+    A pixel belongs to a color when it lies inside that color's tolerance box
+    (color_distance, the test every mask builder uses); where boxes overlap the nearest
+    center wins. Each color's mask can first be cleaned with a 3x3
+    morphological 'open' (drops specks and thin spurs) or 'close' (fills
+    pinholes and narrow gaps). Only one color's mask exists at a time.
+    With claim_all, pixels outside every box go to their nearest center too,
+    so the map has no unclaimed pixels.
+
+    Args:
+        img_hsv (np.ndarray): HxWx3 HSV image or HxW intensity image in [0, 1].
+        dominant_colors (np.ndarray): Palette centers in the same space.
+        tolerance (float): Per-channel tolerance around each center.
+        morphology (str, optional): None, 'open' or 'close'.
+        claim_all (bool): Assign unclaimed pixels to the nearest center (default: False).
+
+    Returns:
+        np.ndarray: HxW uint8 label map; NO_COLOR marks pixels no color claims.
+    """
+    if morphology not in MORPHOLOGY_OPERATIONS:
+        raise ValueError(f"Unknown morphology {morphology!r}; expected one of {MORPHOLOGY_OPERATIONS}.")
+    if len(dominant_colors) >= NO_COLOR:
+        raise ValueError(f"At most {NO_COLOR - 1} palette colors are supported.")
+
+    is_grayscale = img_hsv.ndim == 2
+    height, width = img_hsv.shape[:2]
+    labels = np.full((height, width), NO_COLOR, dtype=np.uint8)
+    best = np.full((height, width), np.inf, dtype=np.float32)
+    channels = [img_hsv] if is_grayscale else [img_hsv[..., i] for i in range(3)]
+    distance = np.empty((height, width), dtype=np.float32)
+    scratch = np.empty((height, width), dtype=np.float32)
+    if claim_all:
+        nearest = np.zeros((height, width), dtype=np.uint8)
+        nearest_distance = np.full((height, width), np.inf, dtype=np.float32)
+
+    for i, color_val in enumerate(dominant_colors):
+        progress.step(i, len(dominant_colors))
+        color_distance(channels, color_val, distance, scratch)
+        if claim_all:
+            closer = distance < nearest_distance
+            nearest[closer] = i
+            nearest_distance[closer] = distance[closer]
+            del closer
+        mask = distance <= tolerance
+        if morphology == 'open':
+            mask = ndimage.binary_opening(mask, structure=_STRUCTURE)
+        elif morphology == 'close':
+            mask = ndimage.binary_closing(mask, structure=_STRUCTURE, border_value=0)
+        mask &= distance < best
+        labels[mask] = i
+        best[mask] = distance[mask]
+
+    if claim_all:
+        unclaimed = labels == NO_COLOR
+        labels[unclaimed] = nearest[unclaimed]
+    logging.debug(f"Label map: {np.count_nonzero(labels == NO_COLOR)} pixels not claimed by any color.")
+    return labels
+
+
+def _neighbor_pairs(components):
+    """Returns (a, b) component ids for every pair of 4-adjacent pixels in different components, both directions."""
+    pairs = []
+    for first, second in ((components[:, :-1], components[:, 1:]), (components[:-1, :], components[1:, :])):
+        differs = first != second
+        a, b = first[differs], second[differs]
+        pairs.append((a, b))
+        pairs.append((b, a))
+    return np.concatenate([p[0] for p in pairs]), np.concatenate([p[1] for p in pairs])
+
+
+def merge_small_regions(labels, min_area, progress=NULL_PROGRESS):
+    """
+    Merges connected regions smaller than min_area into their dominant neighbor.
+
+    Regions are 4-connected runs of one label. Each small region takes the label
+    of the neighbor it shares the longest border with, preferring neighbors that
+    are not small themselves and that have a color (so no holes appear). All
+    statistics are computed with vectorized bincount/unique passes; a few passes
+    are enough because merged regions fuse and are re-measured.
+
+    Args:
+        labels (np.ndarray): HxW uint8 label map (modified in place).
+        min_area (int): Regions with fewer pixels than this are merged away.
+
+    Returns:
+        np.ndarray: The label map.
+    """
+    for merge_pass in range(MAX_MERGE_PASSES):
+        progress.check()
+        components, count = measure.label(labels, background=-1, connectivity=1, return_num=True)
+        areas = np.bincount(components.ravel(), minlength=count + 1)
+        small = areas < min_area
+        small[0] = False # Label 0 is unused (there is no background)
+        if not small.any():
+            break
+
+        component_label = np.zeros(count + 1, dtype=labels.dtype)
+        component_label[components.ravel()] = labels.ravel()
+
+        a, b = _neighbor_pairs(components)
+        keep = small[a]
+        a, b = a[keep], b[keep]
+        if a.size == 0: # Only isolated small regions left (e.g. a tiny image)
+            break
+        # Border length between every (small region, neighbor) pair
+        pair_ids, border = np.unique(a * (count + 1) + b, return_counts=True)
+        a, b = np.divmod(pair_ids, count + 1)
+        # A small region only moves into a larger small neighbor, so two specks cannot swap labels forever
+        allowed = ~small[b] | (areas[b] > areas[a]) | ((areas[b] == areas[a]) & (b > a))
+        a, b, border = a[allowed], b[allowed], border[allowed]
+        if a.size == 0:
+            break
+        # Preference tier: large colored neighbor > small colored neighbor > uncolored neighbor
+        colored = component_label[b] != NO_COLOR
+        tier = colored.astype(np.int8) + (colored & ~small[b])
+        order = np.lexsort((border, tier, a))
+        a, b = a[order], b[order]
+        last = np.r_[a[1:] != a[:-1], True] # Best candidate is the last entry of each group
+        component_label[a[last]] = component_label[b[last]]
+        labels[...] = component_label[components]
+        logging.debug(f"Merge pass {merge_pass + 1}: merged {np.count_nonzero(last)} regions below {min_area} px.")
+    return labels
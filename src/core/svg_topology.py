@@ -0,0 +1,291 @@
+import logging
+from collections import defaultdict
+
+import numpy as np
+from skimage import measure
+
+from core import svg_curves
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Component id of the area outside the image
+OUTSIDE = 0
+# Cracks walked between cancellation checks
+CHECK_INTERVAL = 4096
+
+
+class BoundaryGraph:
+    """
+    Planar graph of the boundaries between the regions of a label map.
+
+    Boundaries run along pixel edges ("cracks"), in pixel-corner coordinates
+    where the image spans [0, height] x [0, width]. Nodes are the corners where
+    three or more cracks meet, plus the four image corners; an edge is the
+    chain between two nodes (or a closed loop without any node) and always
+    separates exactly two regions.
+    Each region's outline is a list of rings, and every ring is a list of
+    (edge index, reversed) references, so a shared edge exists only once.
+
+    Attributes:
+        edges (list): Nx2 arrays of [row, col] points. Node edges start and end
+            on their node corners; loop edges repeat their first point at the end.
+        loops (list): True for each edge that is a closed loop.
+        rings (dict): Label -> list of rings (every ring has its region on the left).
+    """
+
+    def __init__(self, edges, loops, rings):
+        self.edges = edges
+        self.loops = loops
+        self.rings = rings
+
+
+def _left(heading):
+    """Heading after a left turn, in image coordinates (row grows downwards)."""
+    return (-heading[1], heading[0])
+
+
+def _right(heading):
+    return (heading[1], -heading[0])
+
+
+def build_boundary_graph(label_map, progress=None):
+    """
+    Traces the boundaries of every 4-connected region of a label map once.
+
+    Args:
+        label_map (np.ndarray): HxW integer label map (e.g. from svg_regions.build_label_map).
+        progress (optional): Object with a check() method, polled while walking.
+
+    Returns:
+        BoundaryGraph: The edges and every region's rings.
+    """
+    height, width = label_map.shape
+    components, count = measure.label(label_map, background=-1, connectivity=1, return_num=True)
+    component_label = np.zeros(count + 1, dtype=np.int64)
+    component_label[components.ravel()] = label_map.ravel()
+    padded = np.pad(components, 1, mode='constant', constant_values=OUTSIDE)
+    del components
+
+    # Horizontal crack (r, c) joins corners (r, c) -> (r, c + 1), between pixel rows r - 1 and r
+    north, south = padded[:-1, 1:-1], padded[1:, 1:-1]
+    h_rows, h_cols = np.nonzero(north != south)
+    # Vertical crack (r, c) joins corners (r, c) -> (r + 1, c), between pixel columns c - 1 and c
+    west, east = padded[1:-1, :-1], padded[1:-1, 1:]
+    v_rows, v_cols = np.nonzero(west != east)
+
+    stride = width + 1
+    starts = np.concatenate((h_rows * stride + h_cols, v_rows * stride + v_cols))
+    ends = np.concatenate((h_rows * stride + h_cols + 1, (v_rows + 1) * stride + v_cols))
+    # Region on the left/right when walking a crack from its start to its end corner
+    # (walking east the left side is north; walking south the left side is east)
+    lefts = np.concatenate((north[h_rows, h_cols], east[v_rows, v_cols]))
+    rights = np.concatenate((south[h_rows, h_cols], west[v_rows, v_cols]))
+    midpoints = np.concatenate((
+        np.column_stack((h_rows, h_cols + 0.5)),
+        np.column_stack((v_rows + 0.5, v_cols)),
+    ))
+    n_horizontal = len(h_rows)
+    n_cracks = len(starts)
+    del padded, north, south, west, east
+
+    # Crack incidence per corner (CSR layout)
+    corner_of = np.concatenate((starts, ends))
+    crack_of = np.concatenate((np.arange(n_cracks), np.arange(n_cracks)))
+    degree = np.bincount(corner_of, minlength=(height + 1) * stride)
+    offsets = np.concatenate(([0], np.cumsum(degree)))
+    incident = crack_of[np.argsort(corner_of, kind='stable')]
+    is_node = degree > 2
+    # The image corners are nodes too, so they stay exact end points instead of
+    # being cut by a crack midpoint and rounded off by simplification or curves
+    is_node[[0, width, height * stride, height * stride + width]] = True
+    node_corners = np.flatnonzero(is_node)
+    del corner_of, crack_of, degree
+
+    # Python lists make the walk below several times faster than numpy scalar indexing
+    starts, ends = starts.tolist(), ends.tolist()
+    lefts, rights = lefts.tolist(), rights.tolist()
+    offsets, incident, is_node = offsets.tolist(), incident.tolist(), is_node.tolist()
+    visited = [False] * n_cracks
+
+    def heading(crack, forward):
+        step = (0, 1) if crack < n_horizontal else (1, 0)
+        return step if forward else (-step[0], -step[1])
+
+    def corner_point(corner):
+        return divmod(corner, stride)
+
+    walked = 0
+    def walk(crack, corner):
+        """Follows cracks from corner until a node (or the first crack again); returns the chain."""
+        nonlocal walked
+        first = crack
+        forward = starts[crack] == corner
+        chain = []
+        while True:
+            visited[crack] = True
+            chain.append(crack)
+            walked += 1
+            if walked % CHECK_INTERVAL == 0 and progress is not None:
+                progress.check()
+            corner = ends[crack] if starts[crack] == corner else starts[crack]
+            if is_node[corner]:
+                return chain, forward, corner
+            base = offsets[corner]
+            following = incident[base] if incident[base] != crack else incident[base + 1]
+            if following == first:
+                return chain, forward, None
+            crack = following
+
+    edges, loops = [], []
+    edge_info = [] # (start node, end node, start heading, end heading, left, right)
+
+    def add_edge(chain, forward, start_corner, end_corner):
+        first, last = chain[0], chain[-1]
+        points = midpoints[chain]
+        if start_corner is None:
+            points = np.vstack((points, points[:1]))
+        else:
+            points = np.vstack((corner_point(start_corner), points, corner_point(end_corner)))
+        # Orientation of the last crack follows from where the walk entered it
+        if len(chain) == 1:
+            last_forward = forward
+        else:
+            previous = chain[-2]
+            shared = {starts[previous], ends[previous]}
+            last_forward = starts[last] in shared
+        left, right = (lefts[first], rights[first]) if forward else (rights[first], lefts[first])
+        edges.append(points)
+        loops.append(start_corner is None)
+        edge_info.append((start_corner, end_corner, heading(first, forward), heading(last, last_forward), left, right))
+
+    for node in node_corners.tolist():
+        for slot in range(offsets[node], offsets[node + 1]):
+            crack = incident[slot]
+            if not visited[crack]:
+                chain, forward, end_corner = walk(crack, node)
+                add_edge(chain, forward, node, end_corner)
+    for crack in range(n_cracks): # Whatever is left forms closed loops without nodes
+        if not visited[crack]:
+            chain, forward, _ = walk(crack, starts[crack])
+            add_edge(chain, forward, None, None)
+
+    rings = _assemble_rings(edge_info, component_label, progress)
+    logging.debug(f"Boundary graph: {n_cracks} cracks, {len(node_corners)} nodes, {len(edges)} edges.")
+    return BoundaryGraph(edges, loops, rings)
+
+
+def _assemble_rings(edge_info, component_label, progress=None):
+    """Links every region's edges (oriented with the region on the left) into closed rings."""
+    outgoing = defaultdict(list) # (region, node) -> [(edge, reversed, start heading, end heading, end node)]
+    rings = defaultdict(list)
+    for index, (start, end, start_heading, end_heading, left, right) in enumerate(edge_info):
+        if start is None: # A loop is a complete ring for both of its regions
+            if left != OUTSIDE:
+                rings[int(component_label[left])].append([(index, False)])
+            if right != OUTSIDE:
+                rings[int(component_label[right])].append([(index, True)])
+            continue
+        if left != OUTSIDE:
+            outgoing[(left, start)].append((index, False, start_heading, end_heading, end))
+        if right != OUTSIDE:
+            reverse_start = (-end_heading[0], -end_heading[1])
+            reverse_end = (-start_heading[0], -start_heading[1])
+            outgoing[(right, end)].append((index, True, reverse_start, reverse_end, start))
+
+    used = set()
+    for (region, node), entries in list(outgoing.items()):
+        for entry in entries:
+            if (entry[0], entry[1]) in used:
+                continue
+            if progress is not None:
+                progress.check()
+            used.add((entry[0], entry[1]))
+            ring = [(entry[0], entry[1])]
+            current = entry
+            while True:
+                at_node, incoming = current[4], current[3]
+                candidates = [e for e in outgoing[(region, at_node)] if (e[0], e[1]) not in used or e is entry]
+                # Turning left first keeps 4-connected regions that only touch diagonally apart
+                preference = (_left(incoming), incoming, _right(incoming))
+                chosen = min(candidates, key=lambda e: preference.index(e[2]) if e[2] in preference else len(preference))
+                if chosen is entry:
+                    break
+                used.add((chosen[0], chosen[1]))
+                ring.append((chosen[0], chosen[1]))
+                current = chosen
+            rings[int(component_label[region])].append(ring)
+    return dict(rings)
+
+
+def simplify_edges(graph, simplify_tolerance, curve_tolerance=None):
+    """
+    Simplifies every shared edge exactly once.
+
+    Args:
+        graph (BoundaryGraph): The traced boundaries.
+        simplify_tolerance (float): Douglas-Peucker tolerance for polygon output.
+        curve_tolerance (float, optional): If given, fit cubic Beziers within this
+            error instead (see svg_curves.fit_contour).
+
+    Returns:
+        list: Per edge, an Nx2 point array (polygon) or a list of 4x2 Bezier arrays.
+    """
+    geometries = []
+    for points, loop in zip(graph.edges, graph.loops):
+        if curve_tolerance is not None:
+            beziers, _ = svg_curves.fit_contour(points, max_error=curve_tolerance, closed=loop)
+            geometries.append(beziers)
+        else:
+            # End points are always kept, so neighbouring edges still meet exactly at the nodes
+            geometries.append(measure.approximate_polygon(points, tolerance=simplify_tolerance))
+    return geometries
+
+
+def _ring_polygon(ring, geometries):
+    """Concatenates the simplified edges of one ring into a closed point array."""
+    parts = []
+    for index, reversed_ in ring:
+        points = geometries[index][::-1] if reversed_ else geometries[index]
+        parts.append(points if not parts else points[1:])
+    return np.concatenate(parts)
+
+
+def _ring_beziers(ring, geometries):
+    """Concatenates the fitted edges of one ring into a list of Bezier segments."""
+    beziers = []
+    for index, reversed_ in ring:
+        if reversed_:
+            beziers.extend(bezier[::-1] for bezier in reversed(geometries[index]))
+        else:
+            beziers.extend(geometries[index])
+    return beziers
+
+
+def ring_path_data(rings, geometries, curves=False):
+    """
+    Builds the SVG path data for all rings of one color.
+
+    Rings are emitted as subpaths of a single path. Outer boundaries and holes
+    wind in opposite directions, so the default nonzero fill rule leaves the
+    holes empty and neighbouring colors meet without gaps or overlaps.
+
+    Returns:
+        tuple: (path_data, node_count); path_data is "" if every ring degenerated.
+    """
+    subpaths = []
+    nodes = 0
+    for ring in rings:
+        if curves:
+            beziers = _ring_beziers(ring, geometries)
+            if beziers:
+                subpaths.append(svg_curves.beziers_to_svg_path(beziers, True))
+                nodes += len(beziers) + 1
+            continue
+        points = _ring_polygon(ring, geometries)
+        if len(points) < 4: # Closed rings repeat their first point; fewer than 3 corners is degenerate
+            continue
+        # SVG uses (x, y) which corresponds to (col, row); the closing point is implied by Z
+        subpaths.append("M " + " L ".join(f"{point[1]:.2f},{point[0]:.2f}" for point in points[:-1]) + " Z")
+        nodes += len(points) - 1
+    return " ".join(subpaths), nodes
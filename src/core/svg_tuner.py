@@ -0,0 +1,365 @@
+import re
+import time
+import logging
+import itertools
+
+import numpy as np
+from PIL import Image
+
+from core import svg_converter
+from core.svg_pipeline import StageCache
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Default search grid
+DEFAULT_N_COLORS = (2, 4, 6, 8, 12, 16)
+DEFAULT_TOLERANCES = (0.1, 0.2, 0.3)
+DEFAULT_SIMPLIFY_TOLERANCES = (0.5, 1.0, 2.0)
+# Default quality target: mean absolute difference per channel, in 0-255 levels
+DEFAULT_MAX_COLOR_ERROR = 10.0
+OBJECTIVES = ('speed', 'size')
+# Straight segments each cubic Bezier is flattened into when rasterizing
+BEZIER_SEGMENTS = 8
+# Cache budget for the stages shared between trials (1 GB)
+TUNER_CACHE_BYTES = 1024 * 1024 * 1024
+# Trials are rasterized and scored on a grid of at most this many pixels (the source is box-reduced to it)
+SCORE_MAX_PIXELS = 1024 * 1024
+
+_PATH_TOKEN = re.compile(r"[MLCZmlcz]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+class SvgTuningError(Exception):
+    """Custom exception for SVG parameter tuning errors."""
+    pass
+
+
+# --- Rasterizer -------------------------------------------------------------
+
+def _flatten_path(path_data):
+    """
+    Turns SVG path data (absolute M, L, C and Z, as written by svg_converter) into polygon edges.
+
+    Every subpath is closed implicitly, as SVG does when filling.
+
+    Returns:
+        np.ndarray: Nx4 array of edges (x0, y0, x1, y1).
+    """
+    tokens = _PATH_TOKEN.findall(path_data)
+    edges = []
+    start = current = None
+    command = None
+    i = 0
+    t = np.linspace(0.0, 1.0, BEZIER_SEGMENTS + 1)[1:, None]
+
+    def close():
+        if start is not None and current is not None and current != start:
+            edges.append((current[0], current[1], start[0], start[1]))
+
+    while i < len(tokens):
+        token = tokens[i]
+        if token.isalpha():
+            command = token
+            i += 1
+            if command in 'Zz':
+                close()
+                current = start
+                continue
+        if command is None:
+            raise SvgTuningError(f"Path data must start with a command: {path_data[:40]!r}")
+        if command.islower():
+            raise SvgTuningError(f"Relative path command {command!r} is not supported.")
+        if command == 'M':
+            close()
+            start = current = (float(tokens[i]), float(tokens[i + 1]))
+            i += 2
+            command = 'L' # Further coordinate pairs after M are line segments
+        elif command == 'L':
+            point = (float(tokens[i]), float(tokens[i + 1]))
+            edges.append((current[0], current[1], point[0], point[1]))
+            current = point
+            i += 2
+        elif command == 'C':
+            control = np.array([current] + [(float(tokens[i + k]), float(tokens[i + k + 1])) for k in (0, 2, 4)])
+            mt = 1.0 - t
+            points = mt ** 3 * control[0] + 3 * mt ** 2 * t * control[1] + 3 * mt * t ** 2 * control[2] + t ** 3 * control[3]
+            previous = np.vstack((control[:1], points[:-1]))
+            edges.extend(np.hstack((previous, points)).tolist())
+            current = (float(points[-1, 0]), float(points[-1, 1]))
+            i += 6
+        else:
+            raise SvgTuningError(f"Unsupported path command {command!r}.")
+    close()
+    return np.array(edges, dtype=np.float64).reshape(-1, 4)
+
+
+def fill_polygons(edges, height, width):
+    """
+    Scanline polygon filler with the nonzero winding rule (the SVG default).
+
+    A pixel is covered when its center lies inside the shape. All scanline
+    crossings are computed at once, sorted per row, and the covered spans are
+    accumulated in a difference array, so there is no per-pixel Python loop.
+
+    Args:
+        edges (np.ndarray): Nx4 array of edges (x0, y0, x1, y1) in pixel units.
+        height (int): Output height.
+        width (int): Output width.
+
+    Returns:
+        np.ndarray: HxW boolean coverage mask.
+    """
+    x0, y0, x1, y1 = edges.T
+    keep = y0 != y1 # Horizontal edges never cross a scanline
+    x0, y0, x1, y1 = x0[keep], y0[keep], x1[keep], y1[keep]
+    direction = np.where(y1 > y0, 1, -1)
+
+    # Rows whose center (r + 0.5) lies in [min(y), max(y)) of each edge
+    first_row = np.clip(np.ceil(np.minimum(y0, y1) - 0.5), 0, height).astype(np.int64)
+    end_row = np.clip(np.ceil(np.maximum(y0, y1) - 0.5), 0, height).astype(np.int64)
+    counts = np.maximum(end_row - first_row, 0)
+    edge = np.repeat(np.arange(len(counts)), counts)
+    rows = first_row[edge] + (np.arange(len(edge)) - np.repeat(np.cumsum(counts) - counts, counts))
+    scan_y = rows + 0.5
+    crossings = x0[edge] + (scan_y - y0[edge]) / (y1[edge] - y0[edge]) * (x1[edge] - x0[edge])
+
+    order = np.lexsort((crossings, rows))
+    rows, crossings, direction = rows[order], crossings[order], direction[edge][order]
+    # Every closed shape crosses each row equally often in both directions, so the
+    # running sum restarts at zero on each row and can be taken over all rows at once
+    winding = np.cumsum(direction)
+    inside = (winding[:-1] != 0) & (rows[:-1] == rows[1:])
+    span_rows = rows[:-1][inside]
+    span_start = np.clip(np.ceil(crossings[:-1][inside] - 0.5), 0, width).astype(np.int64)
+    span_end = np.clip(np.ceil(crossings[1:][inside] - 0.5), 0, width).astype(np.int64)
+
+    stride = width + 1
+    diff = np.bincount(span_rows * stride + span_start, minlength=height * stride)
+    diff -= np.bincount(span_rows * stride + span_end, minlength=height * stride)
+    return np.cumsum(diff.reshape(height, stride)[:, :width], axis=1) > 0
+
+
+def _hex_to_rgb(hex_color):
+    return np.array([int(hex_color[i:i + 2], 16) for i in (1, 3, 5)], dtype=np.float32) / 255.0
+
+
+def rasterize_paths(width, height, color_paths, opacity=1.0, size=None):
+    """
+    Renders converted paths back into an RGB image on a white background.
+
+    Args:
+        width (int): Image width.
+        height (int): Image height.
+        color_paths (list): [(hex_color, [path_data, ...]), ...] in drawing order.
+        opacity (float): Fill opacity of every path.
+        size (tuple, optional): (width, height) to render at instead, with the paths
+            scaled to fit (e.g. the size of a reference from load_reference).
+
+    Returns:
+        np.ndarray: HxWx3 float32 image in [0, 1] (at size, if given).
+    """
+    out_width, out_height = size or (width, height)
+    scale = np.array([out_width / width, out_height / height] * 2)
+    canvas = np.ones((out_height, out_width, 3), dtype=np.float32)
+    for hex_color, path_list in color_paths:
+        fill = _hex_to_rgb(hex_color)
+        for path_data in path_list:
+            covered = fill_polygons(_flatten_path(path_data) * scale, out_height, out_width)
+            if opacity >= 1.0:
+                canvas[covered] = fill
+            else:
+                canvas[covered] = fill * opacity + canvas[covered] * (1.0 - opacity)
+    return canvas
+
+
+def load_reference(image_path, max_pixels=None):
+    """
+    The source image as an HxWx3 float32 RGB image in [0, 1], composited onto white like the converter does.
+
+    Args:
+        image_path (str): Image file.
+        max_pixels (int, optional): Box-reduce the image to at most this many pixels.
+    """
+    pixels = svg_converter._working_pixels_low_memory(svg_converter._decode_image(image_path), verbose=False)
+    pixels = svg_converter._to_unit_float32(pixels)
+    if pixels.ndim == 2:
+        pixels = pixels[..., None]
+    height, width = pixels.shape[:2]
+    if max_pixels and width * height > max_pixels:
+        scale = (max_pixels / (width * height)) ** 0.5
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        pixels = np.stack([np.asarray(Image.fromarray(pixels[..., channel], 'F').resize(size, Image.Resampling.BOX))
+                           for channel in range(pixels.shape[2])], axis=2)
+    if pixels.shape[2] == 1:
+        pixels = np.repeat(pixels, 3, axis=2)
+    return pixels
+
+
+def fidelity(reference, rendered):
+    """
+    Compares a rendering with its source.
+
+    Returns:
+        dict: 'mean_color_error' (mean absolute difference per channel, 0-255 levels)
+            and 'psnr' (dB; inf for identical images).
+    """
+    difference = np.abs(reference - rendered)
+    mse = float(np.mean(np.square(difference, dtype=np.float64)))
+    return {
+        'mean_color_error': float(np.mean(difference, dtype=np.float64)) * 255.0,
+        'psnr': float('inf') if mse == 0 else float(10.0 * np.log10(1.0 / mse)),
+    }
+
+
+# --- Search -----------------------------------------------------------------
+
+class _TimedCache(StageCache):
+    """
+    StageCache that remembers how long each stage took to compute.
+
+    Stages compute their upstream stages inside their own compute function, so
+    the time of nested computations is subtracted and every key records only
+    its own work.
+    """
+
+    def __init__(self, max_bytes):
+        super().__init__(max_bytes)
+        self.seconds = {}
+        self._nested = []
+
+    def cold_seconds(self, key):
+        """Time a cold run would need for key: its own work plus every upstream stage in its key chain."""
+        total = 0.0
+        seen = set()
+        pending = [key]
+        while pending:
+            current = pending.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            total += self.seconds.get(current, 0.0)
+            # Stage keys embed their upstream stage keys as tuple elements
+            pending.extend(part for part in current if isinstance(part, tuple))
+        return total
+
+    def get_or_compute(self, key, compute):
+        def timed():
+            self._nested.append(0.0)
+            start = time.perf_counter()
+            try:
+                return compute()
+            finally:
+                elapsed = time.perf_counter() - start
+                nested = self._nested.pop()
+                self.seconds[key] = elapsed - nested
+                if self._nested:
+                    self._nested[-1] += elapsed
+        return super().get_or_compute(key, timed)
+
+
+def tune_svg_options(image_path, n_colors=DEFAULT_N_COLORS, tolerances=DEFAULT_TOLERANCES,
+                     simplify_tolerances=DEFAULT_SIMPLIFY_TOLERANCES, max_color_error=DEFAULT_MAX_COLOR_ERROR,
+                     objective='speed', base_options=None, progress_callback=None, cancel_token=None):
+    """
+    Searches n_colors x tolerance x simplify_tolerance for the cheapest configuration that is faithful enough.
+
+    Each trial runs the converter pipeline on a shared stage cache, so e.g. the
+    palette is clustered once per n_colors and the masks once per tolerance.
+    The resulting paths are rasterized with the built-in scanline filler and
+    compared with the source, both on a grid of at most SCORE_MAX_PIXELS
+    pixels so scoring memory stays bounded for large images. The cost of a
+    trial is the summed time of every stage in its chain, measured when that
+    stage was first computed, so cached stages still count and trials are
+    compared as if each had run cold. It covers the conversion only, not the
+    rasterizing and scoring.
+
+    Args:
+        image_path (str): Image to tune for.
+        n_colors (iterable): Palette sizes to try.
+        tolerances (iterable): Color tolerances to try.
+        simplify_tolerances (iterable): Simplification tolerances to try (ascending;
+            once a value misses the target, larger ones are skipped for that palette).
+        max_color_error (float): Quality target, mean absolute difference per channel
+            in 0-255 levels.
+        objective (str): 'speed' picks the fastest passing trial, 'size' the one with
+            the smallest SVG document.
+        base_options (dict, optional): Further convert_image_to_svg options applied to
+            every trial (e.g. 'quantizer' or 'contour_mode').
+        progress_callback (callable, optional): Called as progress_callback(done, total, trial)
+            after every trial. total shrinks as skipped simplify tolerances are taken
+            out of it, so the last call always has done == total.
+        cancel_token (CancellationToken, optional): Stops the search between trials.
+
+    Returns:
+        dict: 'options' (the chosen options; the most faithful trial if none met the
+            target), 'met_target' (bool) and 'trials' (one dict per trial with its
+            options, 'mean_color_error', 'psnr', 'seconds' (conversion time,
+            scoring excluded), 'svg_bytes', 'paths', 'nodes', 'meets_target' and 'error').
+
+    Raises:
+        FileNotFoundError: If the image does not exist.
+        SvgTuningError: For an unknown objective or if every trial failed.
+        SvgConversionCancelled: If cancel_token was cancelled.
+    """
+    if objective not in OBJECTIVES:
+        raise SvgTuningError(f"Unknown objective {objective!r}; expected one of {OBJECTIVES}.")
+    reference = load_reference(image_path, SCORE_MAX_PIXELS)
+    score_size = (reference.shape[1], reference.shape[0])
+    base = svg_converter._resolve_options(base_options)
+    cache = _TimedCache(TUNER_CACHE_BYTES)
+    progress = svg_converter._Progress(cancel_token=cancel_token)
+    simplify_tolerances = sorted(simplify_tolerances)
+    total = len(n_colors) * len(tolerances) * len(simplify_tolerances)
+
+    trials = []
+    for colors, tolerance in itertools.product(n_colors, tolerances):
+        for index, simplify_tolerance in enumerate(simplify_tolerances):
+            progress.check()
+            opts = dict(base, n_colors=colors, tolerance=tolerance, simplify_tolerance=simplify_tolerance)
+            trial = {'options': {'n_colors': colors, 'tolerance': tolerance, 'simplify_tolerance': simplify_tolerance}}
+            try:
+                paths_key, (width, height, color_paths, counts) = svg_converter._build_paths(image_path, opts, cache)
+                document_key = ('document', paths_key, opts['opacity'])
+                document = cache.get_or_compute(
+                    document_key,
+                    lambda: svg_converter._build_document(width, height, color_paths, opts['opacity'])
+                )
+                rendered = rasterize_paths(width, height, color_paths, opts['opacity'], score_size)
+                trial.update(fidelity(reference, rendered))
+                trial.update({
+                    'seconds': round(cache.cold_seconds(document_key), 4),
+                    'svg_bytes': len(document.encode('utf-8')),
+                    'paths': counts['paths'],
+                    'nodes': counts['nodes'],
+                    'meets_target': trial['mean_color_error'] <= max_color_error,
+                    'error': None,
+                })
+            except svg_converter.SvgConversionCancelled:
+                raise
+            except svg_converter.SvgConversionError as e:
+                trial.update({'meets_target': False, 'error': str(e)})
+            trials.append(trial)
+            if not trial['meets_target']:
+                # Coarser simplification only loses more detail: the rest are skipped, not run
+                total -= len(simplify_tolerances) - index - 1
+            logging.info(f"Tuning trial {len(trials)}/{total}: {trial}")
+            if progress_callback is not None:
+                progress_callback(len(trials), total, trial)
+            if not trial['meets_target']:
+                break
+
+    scored = [trial for trial in trials if trial['error'] is None]
+    if not scored:
+        raise SvgTuningError(f"Every tuning trial failed for {image_path}.")
+    passing = [trial for trial in scored if trial['meets_target']]
+    if passing:
+        cost = 'seconds' if objective == 'speed' else 'svg_bytes'
+        best = min(passing, key=lambda trial: (trial[cost], trial['mean_color_error']))
+    else:
+        best = min(scored, key=lambda trial: trial['mean_color_error'])
+        logging.warning(f"No configuration reached a mean color error of {max_color_error}; "
+                        f"best was {best['mean_color_error']:.2f}.")
+    options = dict(base_options or {})
+    options.update(best['options'])
+    logging.info(f"Tuned options for {image_path}: {options}")
+    return {'options': options, 'met_target': bool(passing), 'trials': trials}
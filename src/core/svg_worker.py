@@ -0,0 +1,246 @@
+import os
+import queue
+import logging
+import itertools
+import threading
+import multiprocessing
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Event kinds sent from the worker process to the service
+EVENT_READY = 'ready'
+EVENT_PROGRESS = 'progress'
+EVENT_DONE = 'done'
+EVENT_CANCELLED = 'cancelled'
+EVENT_ERROR = 'error'
+
+
+class SvgWorkerError(Exception):
+    """Custom exception for SVG worker service errors."""
+    pass
+
+
+def _warm_up(svg_converter):
+    """Imports and exercises the heavy dependencies so the first real job starts hot."""
+    import numpy as np
+    from core import svg_quantizers
+    svg_quantizers.warm_up() # Only the default engine; the others are cheap to start
+    svg_converter._get_contours(np.eye(4, dtype=bool), 0.5)
+
+
+def _job_reader(job_conn, jobs, tokens, tokens_lock):
+    """Worker-side thread: receives jobs and cancellation requests while a job is running."""
+    from core import svg_converter
+    while True:
+        try:
+            message = job_conn.recv()
+        except (EOFError, OSError):
+            message = ('shutdown',)
+        kind = message[0]
+        if kind == 'job':
+            _, job_id, image_path, output_path, options = message
+            with tokens_lock:
+                tokens[job_id] = svg_converter.CancellationToken()
+            jobs.put((job_id, image_path, output_path, options))
+        elif kind == 'cancel':
+            with tokens_lock:
+                token = tokens.get(message[1])
+            if token is not None:
+                token.cancel()
+        elif kind == 'clear_cache':
+            jobs.put(('clear_cache',))
+        elif kind == 'shutdown':
+            jobs.put(None)
+            return
+
+
+def _worker_main(job_conn, event_conn, cache_bytes):
+    """Entry point of the worker process: pre-imports the pipeline, then serves jobs until shutdown."""
+    from core import svg_converter
+    _warm_up(svg_converter)
+    cache = svg_converter.StageCache(max_bytes=cache_bytes)
+    event_conn.send((EVENT_READY, os.getpid()))
+
+    jobs = queue.Queue()
+    tokens = {}
+    tokens_lock = threading.Lock()
+    reader = threading.Thread(target=_job_reader, args=(job_conn, jobs, tokens, tokens_lock), daemon=True)
+    reader.start()
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        if job[0] == 'clear_cache':
+            cache.clear()
+            continue
+        job_id, image_path, output_path, options = job
+        with tokens_lock:
+            token = tokens[job_id]
+
+        def on_progress(fraction, stage, job_id=job_id):
+            event_conn.send((EVENT_PROGRESS, job_id, fraction, stage))
+
+        try:
+            if token.cancelled: # Cancelled while still queued
+                raise svg_converter.SvgConversionCancelled("SVG conversion was cancelled.")
+            result_path = svg_converter.convert_image_to_svg(
+                image_path, output_path, options=options, cache=cache,
+                progress_callback=on_progress, cancel_token=token
+            )
+            event_conn.send((EVENT_DONE, job_id, result_path))
+        except svg_converter.SvgConversionCancelled:
+            event_conn.send((EVENT_CANCELLED, job_id))
+        except Exception as e:
+            event_conn.send((EVENT_ERROR, job_id, type(e).__name__, str(e)))
+        finally:
+            with tokens_lock:
+                tokens.pop(job_id, None)
+
+
+class SvgWorkerService:
+    """
+    Long-lived, pre-warmed worker process for convert_image_to_svg.
+
+    The worker imports scikit-learn/scikit-image once at start-up and keeps its
+    own StageCache, so repeated conversions skip interpreter start, import
+    warm-up and (for unchanged inputs) decoding and clustering. Jobs go to the
+    worker over one pipe; progress and results come back as events over another.
+    The caller drains events with poll(), e.g. from a Tk after() loop.
+
+    Events are tuples:
+        ('ready', pid)
+        ('progress', job_id, fraction, stage)
+        ('done', job_id, output_path)
+        ('cancelled', job_id)
+        ('error', job_id, error_type, message)
+
+    Args:
+        cache_bytes (int): Memory budget of the worker's StageCache.
+        start (bool): Start the worker process immediately (default: True).
+    """
+
+    def __init__(self, cache_bytes=256 * 1024 * 1024, start=True):
+        self.cache_bytes = cache_bytes
+        self._context = multiprocessing.get_context('spawn') # Never fork a process that owns a Tk interpreter
+        self._process = None
+        self._job_conn = None
+        self._event_conn = None
+        self._job_ids = itertools.count(1)
+        self._pending = set()
+        self._stale_events = [] # Final events of a dead worker, returned by the next poll()
+        if start:
+            self.start()
+
+    @property
+    def alive(self):
+        return self._process is not None and self._process.is_alive()
+
+    def start(self):
+        """
+        Starts the worker process (no-op if it is already running).
+
+        If the previous worker died before poll() noticed, its remaining events
+        and an error for each of its unfinished jobs are kept for the next poll().
+        """
+        if self.alive:
+            return
+        if self._process is not None:
+            self._stale_events = self.poll()
+            self._close_pipes()
+        job_recv, self._job_conn = self._context.Pipe(duplex=False)
+        self._event_conn, event_send = self._context.Pipe(duplex=False)
+        self._process = self._context.Process(
+            target=_worker_main, args=(job_recv, event_send, self.cache_bytes),
+            name='svg-worker', daemon=True
+        )
+        self._process.start()
+        # The child owns these ends now
+        job_recv.close()
+        event_send.close()
+        logging.info(f"Started SVG worker process (pid={self._process.pid})")
+
+    def submit(self, image_path, output_path=None, options=None):
+        """Queues a conversion and returns its job id."""
+        if not self.alive:
+            self.start()
+        job_id = next(self._job_ids)
+        self._job_conn.send(('job', job_id, os.path.abspath(image_path), output_path, dict(options or {})))
+        self._pending.add(job_id)
+        return job_id
+
+    def cancel(self, job_id):
+        """Asks the worker to stop a queued or running job cooperatively."""
+        if self.alive and job_id in self._pending:
+            self._job_conn.send(('cancel', job_id))
+
+    def clear_cache(self):
+        """Drops the worker's cached stage results."""
+        if self.alive:
+            self._job_conn.send(('clear_cache',))
+
+    def poll(self, timeout=0.0):
+        """
+        Returns the events received so far (possibly an empty list).
+
+        If the worker process died, every pending job is reported as an error
+        and the worker is restarted on the next submit().
+        """
+        events, self._stale_events = self._stale_events, []
+        try:
+            ready = self._event_conn is not None and self._event_conn.poll(timeout)
+            while ready:
+                event = self._event_conn.recv()
+                if event[0] in (EVENT_DONE, EVENT_CANCELLED, EVENT_ERROR):
+                    self._pending.discard(event[1])
+                events.append(event)
+                ready = self._event_conn.poll()
+        except (EOFError, OSError):
+            pass # Worker went away; handled below
+
+        if self._process is not None and not self._process.is_alive() and self._pending:
+            exitcode = self._process.exitcode
+            for job_id in sorted(self._pending):
+                events.append((EVENT_ERROR, job_id, 'SvgWorkerError', f"SVG worker exited unexpectedly (exit code {exitcode})."))
+            self._pending.clear()
+        return events
+
+    def restart(self):
+        """
+        Kills the worker (freeing its CPU immediately) and starts a fresh one.
+
+        Returns:
+            list: Ids of the jobs that were dropped; no further events arrive for them.
+        """
+        dropped = sorted(self._pending)
+        self.terminate()
+        self._pending.clear()
+        self.start()
+        return dropped
+
+    def terminate(self):
+        """Stops the worker process without waiting for running jobs."""
+        if self._process is not None:
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process.join(timeout=5)
+        self._close_pipes()
+        self._process = None
+
+    def shutdown(self, timeout=5.0):
+        """Asks the worker to finish and exit, terminating it if it does not within timeout."""
+        if self.alive:
+            try:
+                self._job_conn.send(('shutdown',))
+            except (OSError, BrokenPipeError):
+                pass
+            self._process.join(timeout)
+        self.terminate()
+
+    def _close_pipes(self):
+        for conn in (self._job_conn, self._event_conn):
+            if conn is not None:
+                conn.close()
+        self._job_conn = None
+        self._event_conn = None
@@ -0,0 +1,246 @@
+import os
+import queue
+import logging
+import threading
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Pillow and NumPy release the GIL for decoding, resampling and encoding, so threads
+# are enough to keep the GUI responsive and let a few jobs overlap
+DEFAULT_MAX_WORKERS = min(4, os.cpu_count() or 1)
+# How often finished jobs and progress updates are handed to the GUI thread
+POLL_INTERVAL_MS = 50
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+
+class JobCancelled(Exception):
+    """Raised by Job.check() inside a job whose cancellation was requested."""
+    pass
+
+
+class Job:
+    """
+    A unit of work submitted to a JobExecutor.
+
+    The job doubles as a cancellation token (cancel() / cancelled, like
+    svg_converter.CancellationToken), so it can be passed straight to core
+    functions that accept a cancel_token. Functions submitted with
+    with_job=True receive it as the 'job' keyword argument and may call
+    report_progress() and check() from the worker thread.
+
+    Attributes:
+        id (int): Unique job number.
+        name (str): Label used in log messages.
+        state (str): One of the JOB_* constants.
+    """
+
+    def __init__(self, job_id, name, executor):
+        self.id = job_id
+        self.name = name
+        self._executor = executor
+        self.state = JOB_QUEUED
+        self._cancel_event = threading.Event()
+        self._future = None
+
+    def cancel(self):
+        """Requests cancellation. Queued jobs never start; running ones stop at their next check()."""
+        self._cancel_event.set()
+        if self._future is not None and self._future.cancel():
+            logging.debug(f"Job {self.id} ({self.name}) cancelled before it started.")
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check(self):
+        """Raises JobCancelled if cancellation was requested (call from the job's function)."""
+        if self._cancel_event.is_set():
+            raise JobCancelled(f"Job '{self.name}' was cancelled.")
+
+    def report_progress(self, done, total):
+        """Forwards progress to the job's on_progress callback on the GUI thread (thread-safe)."""
+        self._executor._post(self, 'progress', (done, total))
+
+    def __repr__(self):
+        return f"Job({self.id}, {self.name!r}, {self.state})"
+
+
+class JobExecutor:
+    """
+    Runs slow work on a thread pool and delivers the outcome on the Tk thread.
+
+    Callbacks (on_success, on_error, on_cancelled, on_progress) are queued by
+    the workers and invoked from an after() loop on the GUI thread, so they may
+    update widgets and show message boxes. The loop only runs while jobs are in
+    flight. Several jobs may run at once (up to max_workers); further ones wait
+    in the pool's queue.
+
+    Args:
+        master (tk.Misc): Any widget; its toplevel schedules the after() loop.
+        max_workers (int, optional): Worker threads (default: DEFAULT_MAX_WORKERS).
+    """
+
+    def __init__(self, master, max_workers=None):
+        self.master = master.winfo_toplevel()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or DEFAULT_MAX_WORKERS, thread_name_prefix='gui-job')
+        self._events = queue.Queue()
+        self._ids = itertools.count(1)
+        self._callbacks = {} # job id -> (job, on_success, on_error, on_progress, on_cancelled)
+        self._poll_id = None
+        self._closed = False
+        self.master.bind('<Destroy>', self._on_destroy, add='+')
+
+    @property
+    def active_jobs(self):
+        """Jobs submitted and not yet reported back."""
+        return [entry[0] for entry in self._callbacks.values()]
+
+    def submit(self, fn, args=(), kwargs=None, name=None, on_success=None, on_error=None,
+               on_progress=None, on_cancelled=None, with_job=False):
+        """
+        Queues fn(*args, **kwargs) for a worker thread. Call from the GUI thread.
+
+        Args:
+            fn (callable): The work; runs on a worker thread and must not touch widgets.
+            args (tuple): Positional arguments for fn.
+            kwargs (dict, optional): Keyword arguments for fn.
+            name (str, optional): Label for log messages (default: fn's name).
+            on_success (callable, optional): on_success(result).
+            on_error (callable, optional): on_error(exception). Errors without a
+                handler are logged.
+            on_progress (callable, optional): on_progress(done, total), latest value only.
+            on_cancelled (callable, optional): on_cancelled(), also used when fn
+                finishes after cancel() was requested (its result is dropped).
+            with_job (bool): Pass the Job to fn as the 'job' keyword argument.
+
+        Returns:
+            Job: Handle for cancel() and state.
+
+        Raises:
+            RuntimeError: If the executor was shut down.
+        """
+        if self._closed:
+            raise RuntimeError("The job executor has been shut down.")
+        job = Job(next(self._ids), name or getattr(fn, '__name__', 'job'), self)
+        kwargs = dict(kwargs or {})
+        if with_job:
+            kwargs['job'] = job
+        self._callbacks[job.id] = (job, on_success, on_error, on_progress, on_cancelled)
+        job._future = self._pool.submit(self._run, job, fn, args, kwargs)
+        job._future.add_done_callback(lambda future: future.cancelled() and self._post(job, JOB_CANCELLED, None))
+        logging.debug(f"Submitted job {job.id} ({job.name}).")
+        self._schedule_poll()
+        return job
+
+    def cancel_all(self):
+        for job in self.active_jobs:
+            job.cancel()
+
+    def shutdown(self, wait=False):
+        """Cancels every job and stops the workers; pending callbacks are dropped."""
+        self._closed = True
+        self.cancel_all()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+        if self._poll_id is not None:
+            try:
+                self.master.after_cancel(self._poll_id)
+            except Exception: # The interpreter may already be tearing Tk down
+                pass
+            self._poll_id = None
+        self._callbacks.clear()
+
+    def _run(self, job, fn, args, kwargs):
+        """Worker thread: runs one job and posts its outcome."""
+        if job.cancelled:
+            self._post(job, JOB_CANCELLED, None)
+            return
+        job.state = JOB_RUNNING
+        try:
+            result = fn(*args, **kwargs)
+        except JobCancelled:
+            self._post(job, JOB_CANCELLED, None)
+        except Exception as e:
+            # Core modules raise their own *Cancelled exceptions for a cancel_token
+            self._post(job, JOB_CANCELLED if job.cancelled else JOB_FAILED, e)
+        else:
+            self._post(job, JOB_CANCELLED if job.cancelled else JOB_DONE, result)
+
+    def _post(self, job, kind, payload):
+        self._events.put((job, kind, payload))
+
+    def _schedule_poll(self):
+        if self._poll_id is None and not self._closed:
+            self._poll_id = self.master.after(POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self):
+        """GUI thread: dispatches queued outcomes and progress while jobs remain."""
+        self._poll_id = None
+        if self._callbacks:
+            # Scheduled before dispatching: a callback's message box must not stall other jobs
+            self._schedule_poll()
+        progress = {}
+        while True:
+            try:
+                job, kind, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                progress[job.id] = payload # Only the latest value per job is shown
+                continue
+            progress.pop(job.id, None)
+            self._finish(job, kind, payload)
+        for job_id, (done, total) in progress.items():
+            entry = self._callbacks.get(job_id)
+            if entry is not None and entry[3] is not None:
+                self._call(entry[0], entry[3], done, total)
+
+    def _finish(self, job, kind, payload):
+        entry = self._callbacks.pop(job.id, None)
+        if entry is None:
+            return # Already reported (a future can be both cancelled and posted)
+        _, on_success, on_error, _, on_cancelled = entry
+        job.state = kind
+        if kind == JOB_DONE:
+            logging.debug(f"Job {job.id} ({job.name}) finished.")
+            if on_success is not None:
+                self._call(job, on_success, payload)
+        elif kind == JOB_FAILED:
+            if on_error is not None:
+                self._call(job, on_error, payload)
+            else:
+                logging.error(f"Job {job.id} ({job.name}) failed: {payload}", exc_info=payload)
+        else:
+            logging.info(f"Job {job.id} ({job.name}) cancelled.")
+            if on_cancelled is not None:
+                self._call(job, on_cancelled)
+
+    @staticmethod
+    def _call(job, callback, *args):
+        # A failing callback must not stop the dispatch of other jobs
+        try:
+            callback(*args)
+        except Exception as e:
+            logging.error(f"Callback of job {job.id} ({job.name}) failed: {e}", exc_info=True)
+
+    def _on_destroy(self, event):
+        if event.widget is self.master:
+            self.shutdown(wait=False)
+
+
+_shared_executor = None
+
+
+def get_job_executor(master):
+    """Returns the JobExecutor shared by every tab, creating it for master's toplevel on first use."""
+    global _shared_executor
+    if _shared_executor is None or _shared_executor._closed:
+        _shared_executor = JobExecutor(master)
+    return _shared_executor
@@ -1,10 +1,17 @@
+import importlib
 import tkinter as tk
 from tkinter import ttk
-# Import tab modules
-from .tabs.converter_tab import ConverterTab
-from .tabs.icon_setter_tab import IconSetterTab
-from .tabs.svg_tab import SvgTab
-from .tabs.modifier_tab import ModifierTab # Import the new tab
+
+# Notebook tabs: title, module (in gui.tabs) and class. A tab's module is only
+# imported, and the tab only built, the first time it is selected, so startup
+# does not pay for tabs (and their core modules) that are never opened.
+TABS = (
+    ('Format Converter', 'converter_tab', 'ConverterTab'),
+    ('Image Modifier', 'modifier_tab', 'ModifierTab'),
+    ('Folder Icon Setter', 'icon_setter_tab', 'IconSetterTab'),
+    ('Image to SVG', 'svg_tab', 'SvgTab'),
+    ('Batch', 'batch_tab', 'BatchTab'),
+)
 
 class MainWindow:
     def __init__(self, master):
@@ -20,25 +27,30 @@ class MainWindow:
 
         # --- Create Tab Frames ---
         # These frames will hold the content for each tool
-        self.converter_frame = ttk.Frame(self.notebook, padding="10")
-        self.icon_setter_frame = ttk.Frame(self.notebook, padding="10")
-        self.svg_frame = ttk.Frame(self.notebook, padding="10")
-        self.modifier_frame = ttk.Frame(self.notebook, padding="10") # Create frame for the new tab
-
-        # --- Add Tabs to Notebook ---
-        self.notebook.add(self.converter_frame, text='Format Converter')
-        self.notebook.add(self.modifier_frame, text='Image Modifier') # Add the new tab
-        self.notebook.add(self.icon_setter_frame, text='Folder Icon Setter')
-        self.notebook.add(self.svg_frame, text='Image to SVG')
+        self.tabs = {} # Frame widget name -> tab instance, for the tabs built so far
+        self._tab_classes = {} # Frame widget name -> (module name, class name)
+        for title, module_name, class_name in TABS:
+            frame = ttk.Frame(self.notebook, padding="10")
+            self.notebook.add(frame, text=title)
+            self._tab_classes[str(frame)] = (module_name, class_name)
 
         # --- Populate Tabs ---
-        # Instantiate each tab class within its frame
-        ConverterTab(self.converter_frame)
-        ModifierTab(self.modifier_frame) # Instantiate the new tab class
-        IconSetterTab(self.icon_setter_frame)
-        SvgTab(self.svg_frame)
-
-        # print("Main window initialized.") # Placeholder removed
+        # The visible tab is built right away, the others on first selection
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+        self.build_tab(self.notebook.select())
+
+    def on_tab_changed(self, event):
+        self.build_tab(self.notebook.select())
+
+    def build_tab(self, frame_name):
+        """Imports and instantiates the tab class for a notebook frame, once."""
+        if not frame_name or frame_name in self.tabs:
+            return self.tabs.get(frame_name)
+        module_name, class_name = self._tab_classes[frame_name]
+        module = importlib.import_module(f".tabs.{module_name}", __package__)
+        frame = self.notebook.nametowidget(frame_name)
+        self.tabs[frame_name] = getattr(module, class_name)(frame)
+        return self.tabs[frame_name]
 
 if __name__ == '__main__':
     # This allows testing the main window structure independently
@@ -0,0 +1,254 @@
+import os
+import logging
+
+from PIL import Image, ImageTk
+
+from core.svg_pipeline import StageCache
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Memory budget shared by decoded source images and preview thumbnails (128 MB)
+DEFAULT_PREVIEW_CACHE_BYTES = 128 * 1024 * 1024
+# Bytes per pixel assumed for a PhotoImage (Tk keeps 32-bit pixels)
+PHOTO_BYTES_PER_PIXEL = 4
+# Previews are resampled from a copy box-reduced to at most this many pixels per side
+# (larger previews fall back to the full image)
+REDUCED_SOURCE_MAX_SIDE = 2048
+
+
+class Preview:
+    """
+    A preview of one image at one target size.
+
+    Attributes:
+        image (PIL.Image.Image): The resized image.
+        photo (ImageTk.PhotoImage): Tk image for labels and canvases.
+        size (tuple): (width, height) of the preview.
+        original_size (tuple): (width, height) of the source image.
+        scale (float): size / original_size.
+    """
+
+    def __init__(self, image, photo, original_size):
+        self.image = image
+        self.photo = photo
+        self.size = image.size
+        self.original_size = original_size
+        self.scale = image.size[0] / original_size[0] if original_size[0] else 1.0
+
+
+def _image_nbytes(image):
+    """Approximate memory held by a decoded PIL image."""
+    width, height = image.size
+    return width * height * max(1, len(image.getbands())) + 64
+
+
+def _box(max_size):
+    return max(1, int(max_size[0])), max(1, int(max_size[1]))
+
+
+def _fit_size(original_size, max_size, upscale):
+    """Largest size within max_size that keeps the aspect ratio (never larger than the source unless upscale)."""
+    width, height = original_size
+    scale = min(max_size[0] / width, max_size[1] / height)
+    if not upscale:
+        scale = min(scale, 1.0)
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+class PreviewCache:
+    """
+    Application-wide LRU cache of decoded images and their previews.
+
+    Decoded source images are keyed by (path, mtime, file size), previews
+    additionally by their target size, so reselecting a file or switching to a
+    tab that shows the same file costs nothing, a resized canvas only re-runs
+    the resize, and an edited file is decoded afresh. Every entry counts against
+    one memory budget (sources too large for it are simply not kept).
+    PhotoImage objects belong to Tk, so get_preview and store_preview must only
+    be called from the GUI thread; quick_image and preview_image may run on a
+    worker thread.
+
+    Args:
+        max_bytes (int): Memory budget (default: 128 MB).
+    """
+
+    def __init__(self, max_bytes=DEFAULT_PREVIEW_CACHE_BYTES):
+        self._cache = StageCache(max_bytes=max_bytes)
+
+    @staticmethod
+    def _file_key(image_path):
+        stat = os.stat(image_path) # Raises FileNotFoundError for missing files, as Image.open would
+        return os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size
+
+    def _source(self, file_key, decode=True):
+        """The decoded full-size image; the file handle is closed right after decoding."""
+        key = ('source',) + file_key
+        image = self._cache.get(key)
+        if image is None and decode:
+            with Image.open(file_key[0]) as opened:
+                opened.load()
+                image = opened.copy() if opened.fp is not None else opened
+            self._cache.put(key, image, nbytes=_image_nbytes(image))
+        return image
+
+    def _reduced_source(self, file_key, decode=True):
+        """
+        The source box-reduced by an integer factor to about REDUCED_SOURCE_MAX_SIDE.
+
+        Returns:
+            tuple: (reduced image, original size), or (None, None) when decode is
+                False and nothing is cached.
+        """
+        key = ('reduced',) + file_key
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        source = self._source(file_key, decode=decode)
+        if source is None:
+            return None, None
+        if source.size[0] <= 0 or source.size[1] <= 0:
+            raise ValueError("Invalid image dimensions")
+        factor = max(source.size) // REDUCED_SOURCE_MAX_SIDE
+        if factor <= 1 or source.mode in ('P', '1'):
+            # The source is its own reduced copy. Caching it under a second key would
+            # keep it alive outside the budget once the source entry is gone
+            return source, source.size
+        entry = (source.reduce(factor), source.size)
+        self._cache.put(key, entry, nbytes=_image_nbytes(entry[0]))
+        return entry
+
+    def _resample(self, file_key, max_size, upscale, resample, decode=True):
+        """Resizes the (reduced) source to fit max_size. Returns (image, original size) or (None, None)."""
+        reduced, original_size = self._reduced_source(file_key, decode=decode)
+        if reduced is None:
+            return None, None
+        size = _fit_size(original_size, max_size, upscale)
+        if size[0] > reduced.size[0] or size[1] > reduced.size[1]:
+            reduced = self._source(file_key, decode=decode) # Enlarging the reduced copy would lose detail
+            if reduced is None:
+                return None, None
+        if size == reduced.size:
+            return reduced, original_size
+        return reduced.resize(size, resample), original_size
+
+    @staticmethod
+    def _preview_key(file_key, max_size, upscale):
+        return ('preview',) + file_key + (_box(max_size), bool(upscale))
+
+    def get_preview(self, image_path, max_size, upscale=False):
+        """
+        Returns a cached or newly made Preview fitting within max_size.
+
+        Args:
+            image_path (str): Image file.
+            max_size (tuple): (width, height) to fit into, keeping the aspect ratio.
+            upscale (bool): Enlarge images smaller than max_size (default: False,
+                like Image.thumbnail).
+
+        Returns:
+            Preview: The preview (with its PhotoImage).
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            Exception: Whatever Pillow raises for unreadable images.
+        """
+        file_key = self._file_key(image_path)
+        preview = self._cache.get(self._preview_key(file_key, max_size, upscale))
+        if preview is not None:
+            return preview
+        image, original_size = self._resample(file_key, _box(max_size), upscale, Image.Resampling.LANCZOS)
+        return self._store(file_key, max_size, upscale, image, original_size)
+
+    def _store(self, file_key, max_size, upscale, image, original_size):
+        preview = Preview(image, ImageTk.PhotoImage(image), original_size)
+        thumbnail_bytes = 0 if image.size == original_size else _image_nbytes(image)
+        nbytes = thumbnail_bytes + image.size[0] * image.size[1] * PHOTO_BYTES_PER_PIXEL + 64
+        self._cache.put(self._preview_key(file_key, max_size, upscale), preview, nbytes=nbytes)
+        return preview
+
+    def peek_preview(self, image_path, max_size, upscale=False):
+        """Returns the cached Preview for these arguments, or None (never decodes)."""
+        return self._cache.get(self._preview_key(self._file_key(image_path), max_size, upscale))
+
+    def draft_image(self, image_path, max_size, upscale=False):
+        """
+        Quick, lower quality resize for interactive feedback (e.g. while a window is dragged).
+
+        Only uses images that are already decoded, so it never blocks on the file.
+
+        Returns:
+            PIL.Image.Image: The draft, or None if the image has not been decoded yet.
+        """
+        image, _ = self._resample(self._file_key(image_path), _box(max_size), upscale,
+                                  Image.Resampling.BILINEAR, decode=False)
+        return image
+
+    def quick_image(self, image_path, max_size, upscale=False):
+        """
+        Fast, lower quality preview to show while preview_image runs, when there
+        is a way to make one that is cheaper than the final preview.
+
+        Uses the cached decoded image when there is one. Otherwise only JPEGs
+        have a cheap path: they are decoded at reduced scale with Image.draft
+        (the decoder skips up to 7 of every 8 pixel rows and columns). Other
+        formats, and JPEGs too small for a reduced decode, would cost as much
+        as preview_image, so None is returned without decoding anything and
+        the caller should go straight to preview_image. Safe to call from a
+        worker thread.
+
+        Returns:
+            tuple or None: (PIL.Image.Image, original size), the image having the
+                size preview_image returns for the same arguments; or None.
+        """
+        file_key = self._file_key(image_path)
+        box = _box(max_size)
+        image, original_size = self._resample(file_key, box, upscale, Image.Resampling.BILINEAR, decode=False)
+        if image is not None:
+            return image, original_size
+        with Image.open(file_key[0]) as opened:
+            if opened.format != 'JPEG':
+                return None
+            original_size = opened.size
+            size = _fit_size(original_size, box, upscale)
+            opened.draft(opened.mode, size) # Decodes at 1/2, 1/4 or 1/8 scale, never below size
+            if opened.size == original_size:
+                return None # No reduced scale fits: a full decode, as expensive as the final preview
+            opened.load()
+            if opened.size == size:
+                return opened.copy(), original_size
+            return opened.resize(size, Image.Resampling.BILINEAR), original_size
+
+    def preview_image(self, image_path, max_size, upscale=False):
+        """
+        The high quality resize behind get_preview, without the Tk part.
+
+        Safe to call from a worker thread; hand the result to store_preview on the
+        GUI thread.
+
+        Returns:
+            tuple: (PIL.Image.Image, original size).
+        """
+        return self._resample(self._file_key(image_path), _box(max_size), upscale, Image.Resampling.LANCZOS)
+
+    def store_preview(self, image_path, max_size, upscale, image, original_size):
+        """Wraps an image made by preview_image in a Preview and caches it (GUI thread only)."""
+        return self._store(self._file_key(image_path), max_size, upscale, image, original_size)
+
+    def original_size(self, image_path):
+        """Size of an image, from the cache when it was decoded before."""
+        return self._source(self._file_key(image_path)).size
+
+    def clear(self):
+        self._cache.clear()
+
+
+_shared_cache = None
+
+
+def get_preview_cache():
+    """Returns the PreviewCache shared by every tab."""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = PreviewCache()
+    return _shared_cache
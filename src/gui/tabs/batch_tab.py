@@ -0,0 +1,399 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+import os
+import time
+import queue
+import logging
+from utils import file_helpers
+from core import batch_queue, image_converter, svg_export
+from gui.job_executor import get_job_executor
+
+# Labels shown for the batch operations (core/batch_queue.OPERATIONS)
+OPERATION_LABELS = {
+    'convert': "Convert Format",
+    'resize': "Resize",
+    'crop': "Crop",
+    'svg': "Image to SVG",
+    'icon': "Set Folder Icon",
+}
+# The queue is saved here after every item so an interrupted run can be resumed
+DEFAULT_QUEUE_FILE = os.path.join(os.path.expanduser('~'), '.multitool_batch_queue.json')
+UPDATE_INTERVAL_MS = 100
+
+class BatchTab:
+    def __init__(self, master_frame):
+        self.frame = master_frame
+        self.status_var = tk.StringVar(value="Add files or folders to the queue.")
+        self.progress_var = tk.DoubleVar(value=0.0)
+        self.operation_label = tk.StringVar(value=OPERATION_LABELS['convert'])
+        self.workers = tk.IntVar(value=os.cpu_count() or 1)
+        self.recursive = tk.BooleanVar(value=False)
+        self.retry_failed = tk.BooleanVar(value=False)
+
+        self.queue = batch_queue.BatchQueue('convert', state_path=DEFAULT_QUEUE_FILE)
+        self.current_job = None
+        self._updates = queue.Queue() # (index, item) posted by batch worker threads
+        self._run_started = None
+        self._run_total = 0
+        self._run_completed = 0
+        self._drain_id = None
+
+        # Operation parameters (each operation uses a subset)
+        self.output_format = tk.StringVar(value=next(iter(image_converter.SUPPORTED_FORMATS), ''))
+        self.jpeg_quality = tk.IntVar(value=95)
+        self.resize_width = tk.StringVar()
+        self.resize_height = tk.StringVar()
+        self.keep_aspect = tk.BooleanVar(value=True)
+        self.crop_x = tk.StringVar(value="0")
+        self.crop_y = tk.StringVar(value="0")
+        self.crop_width = tk.StringVar()
+        self.crop_height = tk.StringVar()
+        self.n_colors = tk.IntVar(value=5)
+        self.tolerance = tk.DoubleVar(value=0.2)
+        self.svg_format = tk.StringVar(value='svg')
+        self.icon_path = tk.StringVar()
+
+        # --- UI Elements ---
+        # Operation Selection
+        operation_frame = ttk.LabelFrame(self.frame, text="Operation", padding="10")
+        operation_frame.pack(fill=tk.X, pady=5)
+
+        operation_combo = ttk.Combobox(operation_frame, textvariable=self.operation_label,
+                                       values=list(OPERATION_LABELS.values()), state='readonly', width=18)
+        operation_combo.pack(side=tk.LEFT, padx=(0, 10))
+        operation_combo.bind('<<ComboboxSelected>>', self.on_operation_changed)
+        self.params_frame = ttk.Frame(operation_frame)
+        self.params_frame.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.build_params_frame()
+
+        # Queue Controls
+        queue_buttons = ttk.Frame(self.frame)
+        queue_buttons.pack(fill=tk.X, pady=5)
+        ttk.Button(queue_buttons, text="Add Files...", command=self.add_files).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(queue_buttons, text="Add Folder...", command=self.add_folder).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(queue_buttons, text="Include Subfolders", variable=self.recursive).pack(side=tk.LEFT, padx=5)
+        ttk.Button(queue_buttons, text="Remove Selected", command=self.remove_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(queue_buttons, text="Clear", command=self.clear_queue).pack(side=tk.LEFT, padx=5)
+        ttk.Button(queue_buttons, text="Resume Last Queue", command=self.resume_last_queue).pack(side=tk.RIGHT)
+
+        # Queue List
+        list_frame = ttk.Frame(self.frame)
+        list_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        self.tree = ttk.Treeview(list_frame, columns=('file', 'status', 'detail'), show='headings', selectmode='extended')
+        self.tree.heading('file', text="File")
+        self.tree.heading('status', text="Status")
+        self.tree.heading('detail', text="Result")
+        self.tree.column('file', width=280)
+        self.tree.column('status', width=80, stretch=False)
+        self.tree.column('detail', width=280)
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # Run Controls
+        run_frame = ttk.Frame(self.frame)
+        run_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(run_frame, text="Workers:").pack(side=tk.LEFT)
+        ttk.Spinbox(run_frame, from_=1, to=32, textvariable=self.workers, width=4).pack(side=tk.LEFT, padx=(5, 10))
+        ttk.Checkbutton(run_frame, text="Retry Failed", variable=self.retry_failed).pack(side=tk.LEFT)
+        self.cancel_button = ttk.Button(run_frame, text="Cancel", command=self.cancel_run, state='disabled')
+        self.cancel_button.pack(side=tk.RIGHT)
+        self.start_button = ttk.Button(run_frame, text="Start", command=self.start_run)
+        self.start_button.pack(side=tk.RIGHT, padx=5)
+        self.progress_bar = ttk.Progressbar(run_frame, variable=self.progress_var, maximum=100, mode='determinate')
+        self.progress_bar.pack(side=tk.RIGHT, fill=tk.X, expand=True, padx=10)
+
+        # Status Bar
+        status_label = ttk.Label(self.frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
+        status_label.pack(side=tk.BOTTOM, fill=tk.X, ipady=2, pady=(10,0))
+
+    @property
+    def operation(self):
+        for operation, label in OPERATION_LABELS.items():
+            if label == self.operation_label.get():
+                return operation
+        return 'convert'
+
+    def build_params_frame(self):
+        """Shows the parameter fields of the selected operation."""
+        for child in self.params_frame.winfo_children():
+            child.destroy()
+        operation = self.operation
+
+        def field(label, variable, width=6):
+            ttk.Label(self.params_frame, text=label).pack(side=tk.LEFT, padx=(5, 2))
+            ttk.Entry(self.params_frame, textvariable=variable, width=width).pack(side=tk.LEFT)
+
+        if operation == 'convert':
+            ttk.Combobox(self.params_frame, textvariable=self.output_format, state='readonly', width=8,
+                         values=list(image_converter.SUPPORTED_FORMATS.keys())).pack(side=tk.LEFT)
+            ttk.Label(self.params_frame, text="JPEG Quality:").pack(side=tk.LEFT, padx=(10, 2))
+            ttk.Spinbox(self.params_frame, from_=1, to=100, textvariable=self.jpeg_quality, width=5).pack(side=tk.LEFT)
+        elif operation == 'resize':
+            field("Width:", self.resize_width)
+            field("Height:", self.resize_height)
+            ttk.Checkbutton(self.params_frame, text="Keep Aspect Ratio", variable=self.keep_aspect).pack(side=tk.LEFT, padx=5)
+        elif operation == 'crop':
+            field("X:", self.crop_x)
+            field("Y:", self.crop_y)
+            field("Width:", self.crop_width)
+            field("Height:", self.crop_height)
+        elif operation == 'svg':
+            ttk.Label(self.params_frame, text="Colors:").pack(side=tk.LEFT, padx=(5, 2))
+            ttk.Spinbox(self.params_frame, from_=2, to=20, textvariable=self.n_colors, width=4).pack(side=tk.LEFT)
+            field("Tolerance:", self.tolerance)
+            ttk.Combobox(self.params_frame, textvariable=self.svg_format, state='readonly', width=6,
+                         values=list(svg_export.OUTPUT_FORMATS)).pack(side=tk.LEFT, padx=5)
+        elif operation == 'icon':
+            ttk.Entry(self.params_frame, textvariable=self.icon_path, state='readonly', width=30).pack(side=tk.LEFT, padx=5)
+            ttk.Button(self.params_frame, text="Icon...", command=self.select_icon).pack(side=tk.LEFT)
+
+    def collect_params(self):
+        """
+        Reads the parameter fields of the selected operation.
+
+        Raises:
+            ValueError: If a field holds an invalid value.
+        """
+        operation = self.operation
+        if operation == 'convert':
+            if not self.output_format.get():
+                raise ValueError("Please select an output format.")
+            return {'output_format': self.output_format.get(), 'quality': int(self.jpeg_quality.get())}
+        if operation == 'resize':
+            width, height = self.resize_width.get().strip(), self.resize_height.get().strip()
+            if not width and not height:
+                raise ValueError("Please enter at least Width or Height for resizing.")
+            return {'width': int(width) if width else None, 'height': int(height) if height else None,
+                    'keep_aspect': bool(self.keep_aspect.get())}
+        if operation == 'crop':
+            return {'x': int(self.crop_x.get()), 'y': int(self.crop_y.get()),
+                    'width': int(self.crop_width.get()), 'height': int(self.crop_height.get())}
+        if operation == 'svg':
+            options = {'n_colors': int(self.n_colors.get()), 'tolerance': float(self.tolerance.get()),
+                       'output_format': self.svg_format.get()}
+            return {'options': options}
+        if not self.icon_path.get():
+            raise ValueError("Please select an icon file.")
+        return {'icon_path': self.icon_path.get()}
+
+    def restore_params(self, operation, params):
+        """Puts the parameters of a loaded queue back into the fields."""
+        self.operation_label.set(OPERATION_LABELS[operation])
+        if operation == 'convert':
+            self.output_format.set(params.get('output_format', self.output_format.get()))
+            self.jpeg_quality.set(params.get('quality', 95))
+        elif operation == 'resize':
+            self.resize_width.set(params.get('width') or "")
+            self.resize_height.set(params.get('height') or "")
+            self.keep_aspect.set(params.get('keep_aspect', True))
+        elif operation == 'crop':
+            for variable, key in ((self.crop_x, 'x'), (self.crop_y, 'y'), (self.crop_width, 'width'), (self.crop_height, 'height')):
+                variable.set(params.get(key, ""))
+        elif operation == 'svg':
+            options = params.get('options', {})
+            self.n_colors.set(options.get('n_colors', 5))
+            self.tolerance.set(options.get('tolerance', 0.2))
+            self.svg_format.set(options.get('output_format') or 'svg')
+        elif operation == 'icon':
+            self.icon_path.set(params.get('icon_path', ""))
+        self.build_params_frame()
+
+    def on_operation_changed(self, event=None):
+        self.build_params_frame()
+        if self.current_job is None:
+            # A different operation starts the existing items over
+            self.queue.operation = self.operation
+            for item in self.queue.items:
+                item.update(status=batch_queue.ITEM_PENDING, output=None, error=None, seconds=None)
+            self.refresh_tree()
+
+    def select_icon(self):
+        path = file_helpers.select_icon_file()
+        if path:
+            self.icon_path.set(path)
+
+    def add_files(self):
+        paths = file_helpers.select_image_files()
+        if paths:
+            self._add_paths(paths)
+
+    def add_folder(self):
+        path = file_helpers.select_folder()
+        if path:
+            self._add_paths([path])
+
+    def _add_paths(self, paths):
+        if self.current_job is not None:
+            messagebox.showinfo("Batch Running", "Wait for the running batch to finish before changing the queue.", parent=self.frame)
+            return
+        try:
+            added = self.queue.add_paths(paths, recursive=self.recursive.get())
+        except FileNotFoundError as e:
+            messagebox.showerror("Error", str(e), parent=self.frame)
+            return
+        self.refresh_tree()
+        self.status_var.set(f"Added {added} item(s); {len(self.queue.items)} in the queue.")
+
+    def remove_selected(self):
+        if self.current_job is not None:
+            return
+        self.queue.remove(int(iid) for iid in self.tree.selection())
+        self.refresh_tree()
+
+    def clear_queue(self):
+        if self.current_job is not None:
+            return
+        self.queue.items = []
+        self.refresh_tree()
+        self.progress_var.set(0.0)
+        self.status_var.set("Queue cleared.")
+
+    def resume_last_queue(self):
+        if self.current_job is not None:
+            return
+        try:
+            loaded = batch_queue.BatchQueue.load(DEFAULT_QUEUE_FILE)
+        except FileNotFoundError:
+            messagebox.showinfo("Resume", "There is no saved batch queue.", parent=self.frame)
+            return
+        except batch_queue.BatchQueueError as e:
+            messagebox.showerror("Resume Error", str(e), parent=self.frame)
+            return
+        self.queue = loaded
+        self.restore_params(loaded.operation, loaded.params)
+        self.refresh_tree()
+        unfinished = len(loaded.unfinished())
+        self.status_var.set(f"Loaded {len(loaded.items)} item(s), {unfinished} unfinished. Press Start to resume.")
+
+    def refresh_tree(self):
+        self.tree.delete(*self.tree.get_children())
+        for index, item in enumerate(self.queue.items):
+            self.tree.insert('', tk.END, iid=str(index), values=self._row_values(item))
+
+    @staticmethod
+    def _row_values(item):
+        detail = item.get('error') or (os.path.basename(item['output']) if item.get('output') else "")
+        return os.path.basename(item['path']) or item['path'], item['status'], detail
+
+    def start_run(self):
+        if self.current_job is not None:
+            return
+        if not self.queue.items:
+            messagebox.showerror("Error", "The queue is empty. Add files or folders first.", parent=self.frame)
+            return
+        try:
+            params = self.collect_params()
+            workers = max(1, int(self.workers.get()))
+        except (ValueError, tk.TclError) as e:
+            messagebox.showerror("Input Error", str(e), parent=self.frame)
+            return
+
+        retry_failed = self.retry_failed.get()
+        self.queue.operation = self.operation
+        self.queue.params = params
+        self.queue.state_path = DEFAULT_QUEUE_FILE
+        self._run_total = len(self.queue.unfinished(retry_failed))
+        if not self._run_total:
+            self.status_var.set("Nothing left to do: every item has been processed.")
+            return
+        try:
+            self.queue.save()
+        except OSError as e:
+            logging.warning(f"Could not save the batch queue to {DEFAULT_QUEUE_FILE}: {e}")
+            self.queue.state_path = None # Still run, just without resume support
+
+        self._run_started = time.perf_counter()
+        self._run_completed = 0
+        self.progress_var.set(0.0)
+        self.start_button.config(state='disabled')
+        self.cancel_button.config(state='normal')
+        self.status_var.set(f"Processing {self._run_total} item(s) with {workers} worker(s)...")
+
+        batch = self.queue
+        self.current_job = get_job_executor(self.frame).submit(
+            lambda job: batch_queue.run_queue(batch, workers, retry_failed, self._post_update, cancel_token=job),
+            name=f"batch {batch.operation}",
+            on_success=self._on_run_finished,
+            on_error=self._on_run_error,
+            on_cancelled=self._on_run_cancelled,
+            with_job=True
+        )
+        self._drain_id = self.frame.after(UPDATE_INTERVAL_MS, self._drain_updates)
+
+    def cancel_run(self):
+        if self.current_job is not None:
+            self.current_job.cancel()
+            self.cancel_button.config(state='disabled')
+            self.status_var.set("Cancelling... running items finish first.")
+
+    def _post_update(self, index, item):
+        # Called from the batch worker threads
+        self._updates.put((index, item))
+
+    def _drain_updates(self):
+        """Applies item updates to the list and refreshes throughput/ETA (runs in main thread via after())."""
+        self._drain_id = None
+        while True:
+            try:
+                index, item = self._updates.get_nowait()
+            except queue.Empty:
+                break
+            if self.tree.exists(str(index)):
+                self.tree.item(str(index), values=self._row_values(item))
+                if item['status'] == batch_queue.ITEM_RUNNING:
+                    self.tree.see(str(index))
+            if item['status'] in (batch_queue.ITEM_DONE, batch_queue.ITEM_FAILED, batch_queue.ITEM_CANCELLED):
+                self._run_completed += 1
+        if self.current_job is None:
+            return
+        elapsed = time.perf_counter() - self._run_started
+        rate, eta = batch_queue.throughput_and_eta(self._run_completed, self._run_total - self._run_completed, elapsed)
+        self.progress_var.set(100.0 * self._run_completed / self._run_total)
+        if not self.current_job.cancelled:
+            eta_text = time.strftime('%H:%M:%S', time.gmtime(eta)) if eta is not None else "--:--:--"
+            self.status_var.set(f"{self._run_completed}/{self._run_total} processed - {rate:.2f} items/s - ETA {eta_text}")
+        self._drain_id = self.frame.after(UPDATE_INTERVAL_MS, self._drain_updates)
+
+    def _finish_run(self):
+        self.current_job = None
+        if self._drain_id is not None:
+            self.frame.after_cancel(self._drain_id)
+        self._drain_updates()
+        self.start_button.config(state='normal')
+        self.cancel_button.config(state='disabled')
+
+    def _on_run_finished(self, counts):
+        self._finish_run()
+        elapsed = time.perf_counter() - self._run_started
+        done = counts.get(batch_queue.ITEM_DONE, 0)
+        failed = counts.get(batch_queue.ITEM_FAILED, 0)
+        self.progress_var.set(100.0)
+        self.status_var.set(f"Batch finished in {elapsed:.1f} s: {done} done, {failed} failed.")
+        if failed:
+            messagebox.showwarning("Batch Finished", f"{failed} item(s) failed. See the Result column for details.", parent=self.frame)
+
+    def _on_run_error(self, e):
+        self._finish_run()
+        self.status_var.set(f"Error: {e}")
+        messagebox.showerror("Batch Error", f"The batch stopped unexpectedly:\n{e}", parent=self.frame)
+        logging.error(f"Batch run failed: {e}", exc_info=e)
+
+    def _on_run_cancelled(self):
+        self._finish_run()
+        remaining = len(self.queue.unfinished())
+        self.status_var.set(f"Batch cancelled; {remaining} item(s) left. Press Start to resume.")
+
+# Example usage for testing the tab independently
+if __name__ == '__main__':
+    root = tk.Tk()
+    root.title("Batch Tab Test")
+    root.geometry("800x600")
+
+    main_frame = ttk.Frame(root, padding="10")
+    main_frame.pack(expand=True, fill='both')
+
+    batch_tab = BatchTab(main_frame)
+
+    root.mainloop()
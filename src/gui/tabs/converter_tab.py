@@ -2,9 +2,10 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import os
 import logging
-from PIL import Image, ImageTk  # Import PIL modules
 from utils import file_helpers
 from core import image_converter
+from gui.preview_cache import get_preview_cache
+from gui.job_executor import get_job_executor
 
 class ConverterTab:
     def __init__(self, master_frame):
@@ -127,10 +128,9 @@ class ConverterTab:
             max_width = self._preview_max_width
             max_height = self._preview_max_height
 
-            img = Image.open(image_path)
-            img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-
-            self.preview_image_tk = ImageTk.PhotoImage(img) # Keep reference
+            # Decoded once and shared with the other tabs
+            preview = get_preview_cache().get_preview(image_path, (max_width, max_height))
+            self.preview_image_tk = preview.photo # Keep reference
 
             self.preview_label.config(image=self.preview_image_tk, text="") # Display image, clear text
             self.preview_label.image = self.preview_image_tk # Keep reference for label too
@@ -218,34 +218,42 @@ class ConverterTab:
             return
 
         self.status_var.set("Processing...")
-        self.frame.update_idletasks() # Update GUI to show status
 
-        try:
-            output_path = image_converter.convert_and_resize_image(
+        # Runs on the shared job executor; several conversions may be in flight at once
+        get_job_executor(self.frame).submit(
+            image_converter.convert_and_resize_image,
+            kwargs=dict(
                 input_path=in_path,
                 output_format=out_format,
                 resize_option=resize_opt,
                 resize_params=resize_params,
                 quality=quality
-            )
-            if output_path:
-                self.status_var.set(f"Success! Saved as: {os.path.basename(output_path)}")
-                messagebox.showinfo("Success", f"Image converted successfully!\nSaved to: {output_path}", parent=self.frame)
-            else:
-                # Should not happen if exceptions are raised correctly
-                self.status_var.set("Failed. Unknown error.")
-                messagebox.showerror("Error", "Conversion failed for an unknown reason.", parent=self.frame)
-
-        except FileNotFoundError as e:
+            ),
+            name=f"convert {os.path.basename(in_path)}",
+            on_success=self._on_conversion_success,
+            on_error=self._on_conversion_error
+        )
+
+    def _on_conversion_success(self, output_path):
+        if output_path:
+            self.status_var.set(f"Success! Saved as: {os.path.basename(output_path)}")
+            messagebox.showinfo("Success", f"Image converted successfully!\nSaved to: {output_path}", parent=self.frame)
+        else:
+            # Should not happen if exceptions are raised correctly
+            self.status_var.set("Failed. Unknown error.")
+            messagebox.showerror("Error", "Conversion failed for an unknown reason.", parent=self.frame)
+
+    def _on_conversion_error(self, e):
+        if isinstance(e, FileNotFoundError):
              self.status_var.set(f"Error: Input file not found.")
              messagebox.showerror("Error", str(e), parent=self.frame)
-        except ValueError as e:
+        elif isinstance(e, ValueError):
              self.status_var.set(f"Error: Invalid parameter.")
              messagebox.showerror("Error", str(e), parent=self.frame)
-        except Exception as e:
+        else:
             self.status_var.set(f"Error: {e}")
             messagebox.showerror("Error", f"An unexpected error occurred:\n{e}", parent=self.frame)
-            logging.error(f"Conversion failed: {e}", exc_info=True)
+            logging.error(f"Conversion failed: {e}", exc_info=e)
 
 # Example usage for testing the tab independently
 if __name__ == '__main__':
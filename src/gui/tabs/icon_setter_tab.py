@@ -3,9 +3,9 @@ from tkinter import ttk, messagebox
 import os
 import platform
 import logging
-from PIL import Image, ImageTk # Import PIL modules
 from utils import file_helpers
 from core import folder_icon_setter
+from gui.preview_cache import get_preview_cache
 
 class IconSetterTab:
     def __init__(self, master_frame):
@@ -91,12 +91,10 @@ class IconSetterTab:
             max_height = self._preview_max_height
 
             # Use PIL to open. ICO should work, ICNS might be problematic.
-            img = Image.open(image_path)
             # Icons might have multiple sizes, try to get a reasonable one if possible
             # For simplicity, just thumbnail the default loaded size
-            img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-
-            self.preview_image_tk = ImageTk.PhotoImage(img) # Keep reference
+            preview = get_preview_cache().get_preview(image_path, (max_width, max_height))
+            self.preview_image_tk = preview.photo # Keep reference
 
             self.preview_label.config(image=self.preview_image_tk, text="") # Display image
             self.preview_label.image = self.preview_image_tk # Keep reference for label
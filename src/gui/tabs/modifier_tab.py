@@ -2,9 +2,11 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import os
 import logging
-from PIL import Image, ImageTk
+from PIL import ImageTk
 from utils import file_helpers
-from core import image_modifier
+from core import image_modifier, image_scanner
+from gui.preview_cache import get_preview_cache
+from gui.job_executor import get_job_executor
 
 class ModifierTab:
     def __init__(self, master_frame):
@@ -17,6 +19,7 @@ class ModifierTab:
         self.preview_offset_x = 0
         self.preview_offset_y = 0
         self.image_on_canvas_id = None
+        self._preview_generation = 0 # Bumped per loaded image; stale preview jobs are ignored
         self.crop_rect_id = None
         self.start_x = None
         self.start_y = None
@@ -111,12 +114,11 @@ class ModifierTab:
             self.load_and_display_preview(path)
             # Populate crop dimensions based on image size
             try:
-                with Image.open(path) as img:
-                    width, height = img.size
-                    self.crop_width.set(str(width))
-                    self.crop_height.set(str(height))
-                    self.resize_width.set(str(width)) # Also set initial resize values
-                    self.resize_height.set(str(height))
+                _, width, height = image_scanner.sniff_image(path) # Header only; the preview decodes in the background
+                self.crop_width.set(str(width))
+                self.crop_height.set(str(height))
+                self.resize_width.set(str(width)) # Also set initial resize values
+                self.resize_height.set(str(height))
             except Exception as e:
                 logging.warning(f"Could not read image dimensions for defaults: {e}")
                 self.crop_width.set("")
@@ -126,62 +128,121 @@ class ModifierTab:
 
 
     def load_and_display_preview(self, image_path):
-        """Loads an image, resizes it for preview, displays it on the canvas, and stores scaling info."""
+        """
+        Displays an image on the canvas in two steps and stores scaling info.
+
+        A quick draft (PreviewCache.quick_image: JPEGs decoded at reduced scale)
+        is made by a background job and shown first, then swapped for the
+        LANCZOS preview. Both have the same size, so the scale and offsets used
+        for crop coordinates, and a crop area drawn on the draft, stay valid.
+        Images without a cheap draft show the loading text until the final
+        preview is ready.
+        """
+        # Clear previous state
+        self.clear_preview()
+        self.preview_canvas.delete(self._placeholder_text_id) # Remove placeholder text
+        self._preview_generation += 1
+        generation = self._preview_generation
+
+        # Scale to fit the canvas while maintaining aspect ratio (small images are enlarged)
+        box = (self._preview_max_width, self._preview_max_height)
+        cache = get_preview_cache()
         try:
-            # Clear previous state
-            self.clear_preview()
-            self.preview_canvas.delete(self._placeholder_text_id) # Remove placeholder text
-
-            img = Image.open(image_path)
-            self.original_image_size = img.size
-            original_width, original_height = self.original_image_size
-
-            # Calculate scaling to fit canvas while maintaining aspect ratio
-            canvas_width = self._preview_max_width
-            canvas_height = self._preview_max_height
-            scale_w = canvas_width / original_width
-            scale_h = canvas_height / original_height
-            self.preview_scale_factor = min(scale_w, scale_h)
-
-            # Calculate preview dimensions and resize
-            preview_width = int(original_width * self.preview_scale_factor)
-            preview_height = int(original_height * self.preview_scale_factor)
-            # Ensure dimensions are at least 1 pixel
-            preview_width = max(1, preview_width)
-            preview_height = max(1, preview_height)
-
-            resized_img = img.resize((preview_width, preview_height), Image.Resampling.LANCZOS)
-            self.preview_image_tk = ImageTk.PhotoImage(resized_img) # Keep reference
-
-            # Calculate offset to center the image on the canvas
-            self.preview_offset_x = (canvas_width - preview_width) // 2
-            self.preview_offset_y = (canvas_height - preview_height) // 2
-
-            # Draw image on canvas
-            self.image_on_canvas_id = self.preview_canvas.create_image(
-                self.preview_offset_x, self.preview_offset_y,
-                anchor=tk.NW, image=self.preview_image_tk
-            )
-
-            # Reset crop selection
-            self.crop_x.set("0")
-            self.crop_y.set("0")
-            self.crop_width.set(str(original_width))
-            self.crop_height.set(str(original_height))
+            preview = cache.peek_preview(image_path, box, upscale=True)
+        except FileNotFoundError:
+            self.status_var.set("Error: Preview file not found.")
+            return
+        if preview is not None: # Shown before at this size
+            self._show_preview(preview.photo, preview.original_size)
+            return
 
+        self._placeholder_text_id = self.preview_canvas.create_text(
+            self._preview_max_width / 2, self._preview_max_height / 2,
+            text="Loading preview...", fill="gray50", anchor=tk.CENTER
+        )
+        get_job_executor(self.frame).submit(
+            cache.quick_image,
+            args=(image_path, box, True),
+            name=f"preview draft {os.path.basename(image_path)}",
+            on_success=lambda result: self._on_preview_draft(generation, image_path, box, result),
+            on_error=lambda e: self._on_preview_error(generation, image_path, e)
+        )
 
-        except FileNotFoundError:
+    def _on_preview_draft(self, generation, image_path, box, result):
+        """Shows the draft, if there is one, and starts the high quality preview (runs in main thread)."""
+        if generation != self._preview_generation:
+            return # Another image was selected meanwhile
+        has_draft = result is not None
+        if has_draft:
+            image, original_size = result
+            self._show_preview(ImageTk.PhotoImage(image), original_size)
+        get_job_executor(self.frame).submit(
+            get_preview_cache().preview_image,
+            args=(image_path, box, True),
+            name=f"preview {os.path.basename(image_path)}",
+            on_success=lambda result: self._on_preview_final(generation, image_path, box, result, has_draft),
+            on_error=lambda e: self._on_preview_error(generation, image_path, e)
+        )
+
+    def _on_preview_final(self, generation, image_path, box, result, has_draft):
+        """Shows the high quality preview, swapping it for the draft in place (runs in main thread)."""
+        if generation != self._preview_generation or (has_draft and not self.image_on_canvas_id):
+            return
+        image, original_size = result
+        try:
+            preview = get_preview_cache().store_preview(image_path, box, True, image, original_size)
+        except OSError as e: # File removed in the meantime; keep the draft
+            logging.warning(f"Could not store preview for {image_path}: {e}")
+            return
+        if not has_draft:
+            self._show_preview(preview.photo, original_size)
+            return
+        self.preview_image_tk = preview.photo # Keep reference
+        self.preview_canvas.itemconfigure(self.image_on_canvas_id, image=self.preview_image_tk)
+
+    def _on_preview_error(self, generation, image_path, e):
+        """Reports a preview that could not be loaded (runs in main thread)."""
+        if generation != self._preview_generation:
+            return
+        self.clear_preview()
+        self.preview_canvas.delete(self._placeholder_text_id)
+        if isinstance(e, FileNotFoundError):
             self.status_var.set("Error: Preview file not found.")
-            self.clear_preview()
-        except Exception as e:
-            self.status_var.set(f"Error loading preview: {e}")
-            logging.warning(f"Could not load preview for {image_path}: {e}", exc_info=True)
-            self.clear_preview()
-            # Show error on canvas
-            self.preview_canvas.create_text(
-                 self._preview_max_width / 2, self._preview_max_height / 2,
-                 text=f"Error loading preview:\n{e}", fill="red", anchor=tk.CENTER
-            )
+            return
+        self.status_var.set(f"Error loading preview: {e}")
+        logging.warning(f"Could not load preview for {image_path}: {e}", exc_info=e)
+        # Show error on canvas
+        self._placeholder_text_id = self.preview_canvas.create_text(
+             self._preview_max_width / 2, self._preview_max_height / 2,
+             text=f"Error loading preview:\n{e}", fill="red", anchor=tk.CENTER
+        )
+
+    def _show_preview(self, photo, original_size):
+        """Draws a preview centered on the canvas and records how it maps onto the original image."""
+        self.preview_canvas.delete(self._placeholder_text_id)
+        canvas_width = self._preview_max_width
+        canvas_height = self._preview_max_height
+        self.original_image_size = original_size
+        original_width, original_height = original_size
+        # Same scale for the draft and the final preview (both are made by _fit_size for this box)
+        self.preview_scale_factor = min(canvas_width / original_width, canvas_height / original_height)
+        self.preview_image_tk = photo # Keep reference
+
+        # Calculate offset to center the image on the canvas
+        self.preview_offset_x = (canvas_width - photo.width()) // 2
+        self.preview_offset_y = (canvas_height - photo.height()) // 2
+
+        # Draw image on canvas
+        self.image_on_canvas_id = self.preview_canvas.create_image(
+            self.preview_offset_x, self.preview_offset_y,
+            anchor=tk.NW, image=self.preview_image_tk
+        )
+
+        # Reset crop selection
+        self.crop_x.set("0")
+        self.crop_y.set("0")
+        self.crop_width.set(str(original_width))
+        self.crop_height.set(str(original_height))
 
     def clear_preview(self):
         """Clears the preview canvas and resets related variables."""
@@ -312,32 +373,26 @@ class ModifierTab:
             output_path = self._get_output_path("resized")
             if not output_path: return # Should not happen if in_path is set
 
-            self.status_var.set("Resizing...")
-            self.frame.update_idletasks()
+        except ValueError as e:
+            self.status_var.set(f"Error: {e}")
+            messagebox.showerror("Input Error", str(e), parent=self.frame)
+            return
 
-            result_path = image_modifier.resize_image(
+        self.status_var.set("Resizing...")
+        # Errors are raised as exceptions by the core function and reported by _on_job_error
+        get_job_executor(self.frame).submit(
+            image_modifier.resize_image,
+            kwargs=dict(
                 input_path=in_path,
                 output_path=output_path,
                 width=width,
                 height=height,
                 keep_aspect_ratio=keep_aspect
-            )
-
-            if result_path:
-                self.status_var.set(f"Success! Resized image saved as: {os.path.basename(result_path)}")
-                messagebox.showinfo("Success", f"Image resized successfully!\nSaved to: {result_path}", parent=self.frame)
-            # Errors are raised as exceptions by the core function
-
-        except ValueError as e:
-            self.status_var.set(f"Error: {e}")
-            messagebox.showerror("Input Error", str(e), parent=self.frame)
-        except Exception as e:
-            self.status_var.set(f"Error: {e}")
-            messagebox.showerror("Resize Error", f"An unexpected error occurred:\n{e}", parent=self.frame)
-            logging.error(f"Resize failed: {e}", exc_info=True)
-        finally:
-             # Re-enable button or indicate completion if needed
-             pass
+            ),
+            name=f"resize {os.path.basename(in_path)}",
+            on_success=lambda result_path: self._on_job_success(result_path, "resized"),
+            on_error=lambda e: self._on_job_error(e, "Resize")
+        )
 
 
     def run_crop(self):
@@ -355,33 +410,42 @@ class ModifierTab:
             output_path = self._get_output_path("cropped")
             if not output_path: return
 
-            self.status_var.set("Cropping...")
-            self.frame.update_idletasks()
+        except ValueError as e:
+            self.status_var.set(f"Error: {e}")
+            messagebox.showerror("Input Error", str(e), parent=self.frame)
+            return
 
-            result_path = image_modifier.crop_image(
+        self.status_var.set("Cropping...")
+        # Errors are raised as exceptions
+        get_job_executor(self.frame).submit(
+            image_modifier.crop_image,
+            kwargs=dict(
                 input_path=in_path,
                 output_path=output_path,
                 x=x,
                 y=y,
                 width=width,
                 height=height
-            )
+            ),
+            name=f"crop {os.path.basename(in_path)}",
+            on_success=lambda result_path: self._on_job_success(result_path, "cropped"),
+            on_error=lambda e: self._on_job_error(e, "Crop")
+        )
 
-            if result_path:
-                self.status_var.set(f"Success! Cropped image saved as: {os.path.basename(result_path)}")
-                messagebox.showinfo("Success", f"Image cropped successfully!\nSaved to: {result_path}", parent=self.frame)
-            # Errors are raised as exceptions
+    def _on_job_success(self, result_path, action):
+        """Reports a finished resize/crop job (runs in main thread)."""
+        if result_path:
+            self.status_var.set(f"Success! {action.capitalize()} image saved as: {os.path.basename(result_path)}")
+            messagebox.showinfo("Success", f"Image {action} successfully!\nSaved to: {result_path}", parent=self.frame)
 
-        except ValueError as e:
-            self.status_var.set(f"Error: {e}")
+    def _on_job_error(self, e, operation):
+        """Reports a failed resize/crop job (runs in main thread)."""
+        self.status_var.set(f"Error: {e}")
+        if isinstance(e, ValueError):
             messagebox.showerror("Input Error", str(e), parent=self.frame)
-        except Exception as e:
-            self.status_var.set(f"Error: {e}")
-            messagebox.showerror("Crop Error", f"An unexpected error occurred:\n{e}", parent=self.frame)
-            logging.error(f"Crop failed: {e}", exc_info=True)
-        finally:
-            # Re-enable button or indicate completion if needed
-            pass
+        else:
+            messagebox.showerror(f"{operation} Error", f"An unexpected error occurred:\n{e}", parent=self.frame)
+            logging.error(f"{operation} failed: {e}", exc_info=e)
 
 
 # Example usage for testing the tab independently
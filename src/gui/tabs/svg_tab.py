@@ -2,11 +2,21 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import os
 import logging
-from PIL import Image, ImageTk
-import threading # To run conversion in background
+import threading
+from PIL import ImageTk
 
 from utils import file_helpers
-from core import svg_converter
+from core import svg_worker
+from gui.preview_cache import get_preview_cache
+
+# How often the worker's events are drained, and how long a cooperative
+# cancel may take before the worker process is killed and restarted
+POLL_INTERVAL_MS = 50
+FORCE_CANCEL_AFTER_MS = 2000
+# Quiet time after the last <Configure> event before the final, high quality rescale
+RESIZE_SETTLE_MS = 150
+# Fraction of the canvas the preview may cover
+PREVIEW_FILL = 0.95
 
 class SvgTab:
     def __init__(self, master_frame):
@@ -14,12 +24,30 @@ class SvgTab:
         self.current_image_path = tk.StringVar()
         self.status_var = tk.StringVar(value="Ready")
         self.photo = None # To keep a reference to the PhotoImage
+        self.progress_var = tk.DoubleVar(value=0.0)
+        # Conversions run in a pre-warmed worker process (with its own stage cache,
+        # so tweaking options is fast) to keep NumPy/KMeans work off the GUI's GIL
+        self.worker = svg_worker.SvgWorkerService()
+        self.current_job = None # Job id of the running conversion, if any
+        self.cancel_requested = False
+        self.frame.bind('<Destroy>', self._on_destroy, add='+')
+        # Debounced canvas resizing: drafts while dragging, final rescale on a thread
+        self._resize_after_id = None
+        self._resize_generation = 0 # Bumped per settle; older results are dropped
+        self._resize_results = {} # generation -> (path, box, image, original_size) or the exception raised
+        self._resize_lock = threading.Lock()
 
         # Conversion Options
         self.n_colors = tk.IntVar(value=5)
         self.tolerance = tk.DoubleVar(value=0.2)
         self.opacity = tk.DoubleVar(value=1.0) # Default to 1.0
         self.simplify_tolerance = tk.DoubleVar(value=0.5)
+        self.curve_fitting = tk.BooleanVar(value=False)
+        self.curve_tolerance = tk.DoubleVar(value=1.0)
+        self.min_region_area = tk.IntVar(value=0)
+        self.gapless = tk.BooleanVar(value=False)
+        self.quantizer = tk.StringVar(value='sklearn')
+        self.output_format = tk.StringVar(value='svg')
 
         # --- Layout ---
         # Main container split left (preview/buttons) and right (options)
@@ -61,6 +89,12 @@ class SvgTab:
         self.convert_button.pack(side=tk.LEFT)
         self.convert_button.config(state='disabled') # Disable until image is selected
 
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel_conversion, state='disabled')
+        self.cancel_button.pack(side=tk.LEFT, padx=(10, 0))
+
+        self.progress_bar = ttk.Progressbar(button_frame, variable=self.progress_var, maximum=100, mode='determinate')
+        self.progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(10, 0))
+
         # Status Bar (at the bottom of the parent frame)
         status_label = ttk.Label(parent, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
         status_label.pack(side=tk.BOTTOM, fill=tk.X, ipady=2, pady=(10,0))
@@ -82,9 +116,32 @@ class SvgTab:
             scale.pack(fill=tk.X, expand=True, side=tk.RIGHT)
 
         create_option_control("Num Colors", self.n_colors, 2, 16, 1)
+
+        quantizer_frame = ttk.Frame(options_frame)
+        quantizer_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(quantizer_frame, text="Quantizer:").pack(side=tk.LEFT)
+        quantizer_combo = ttk.Combobox(quantizer_frame, textvariable=self.quantizer, state='readonly', width=12,
+                                       values=('sklearn', 'kmeans', 'median_cut', 'octree'))
+        quantizer_combo.pack(side=tk.RIGHT)
+
+        format_frame = ttk.Frame(options_frame)
+        format_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(format_frame, text="Output Format:").pack(side=tk.LEFT)
+        format_combo = ttk.Combobox(format_frame, textvariable=self.output_format, state='readonly', width=12,
+                                    values=('svg', 'svgz', 'npz'))
+        format_combo.pack(side=tk.RIGHT)
+
         create_option_control("Color Tolerance", self.tolerance, 0.01, 0.5, 0.01)
         create_option_control("Opacity", self.opacity, 0.1, 1.0, 0.05)
         create_option_control("Simplify Tolerance", self.simplify_tolerance, 0.1, 2.0, 0.1)
+        create_option_control("Min Region Area", self.min_region_area, 0, 64, 1)
+
+        curve_check = ttk.Checkbutton(options_frame, text="Fit Bezier Curves", variable=self.curve_fitting)
+        curve_check.pack(anchor=tk.W, pady=5)
+        create_option_control("Curve Tolerance", self.curve_tolerance, 0.2, 3.0, 0.1)
+
+        gapless_check = ttk.Checkbutton(options_frame, text="Gapless (Shared Edges)", variable=self.gapless)
+        gapless_check.pack(anchor=tk.W, pady=5)
 
         reset_button = ttk.Button(options_frame, text="Reset Defaults", command=self.reset_options)
         reset_button.pack(pady=15)
@@ -94,6 +151,12 @@ class SvgTab:
         self.tolerance.set(0.2)
         self.opacity.set(1.0)
         self.simplify_tolerance.set(0.5)
+        self.curve_fitting.set(False)
+        self.curve_tolerance.set(1.0)
+        self.min_region_area.set(0)
+        self.gapless.set(False)
+        self.quantizer.set('sklearn')
+        self.output_format.set('svg')
         self.status_var.set("Options reset to defaults.")
 
     def select_image(self):
@@ -109,31 +172,12 @@ class SvgTab:
             # Clear previous image and text
             self.canvas.delete("all")
 
-            image = Image.open(image_path)
-            canvas_width = self.canvas.winfo_width()
-            canvas_height = self.canvas.winfo_height()
+            canvas_width, canvas_height = self._canvas_size()
 
-            # Prevent division by zero if canvas not yet rendered
-            if canvas_width <= 1 or canvas_height <= 1:
-                 canvas_width = 300 # Default size
-                 canvas_height = 300
-
-            img_width, img_height = image.size
-            if img_width <= 0 or img_height <= 0:
-                 raise ValueError("Invalid image dimensions")
-
-            # Calculate aspect ratio preserving size
-            ratio = min(canvas_width / img_width, canvas_height / img_height)
-            new_width = max(1, int(img_width * ratio * 0.95)) # Ensure positive size, add padding
-            new_height = max(1, int(img_height * ratio * 0.95))
-
-            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            self.photo = ImageTk.PhotoImage(image) # Keep reference
-
-            # Center image on canvas
-            x = (canvas_width - new_width) // 2
-            y = (canvas_height - new_height) // 2
-            self.canvas.create_image(x, y, image=self.photo, anchor=tk.NW)
+            # Aspect ratio preserving size with some padding; resizing back to a
+            # size seen before reuses the cached preview
+            preview = get_preview_cache().get_preview(image_path, self._preview_box(canvas_width, canvas_height), upscale=True)
+            self._show_photo(preview.photo, canvas_width, canvas_height)
 
         except Exception as e:
             self.status_var.set(f"Error displaying image: {e}")
@@ -143,12 +187,36 @@ class SvgTab:
             self.canvas_text_id = self.canvas.create_text(10, 10, anchor=tk.NW, text="Error loading preview", fill="red")
 
 
+    def _canvas_size(self):
+        canvas_width = self.canvas.winfo_width()
+        canvas_height = self.canvas.winfo_height()
+        # Prevent division by zero if canvas not yet rendered
+        if canvas_width <= 1 or canvas_height <= 1:
+            return 300, 300 # Default size
+        return canvas_width, canvas_height
+
+    @staticmethod
+    def _preview_box(canvas_width, canvas_height):
+        return int(canvas_width * PREVIEW_FILL), int(canvas_height * PREVIEW_FILL)
+
+    def _show_photo(self, photo, canvas_width, canvas_height):
+        """Draws photo centered on the (cleared) canvas."""
+        self.canvas.delete("all")
+        self.photo = photo # Keep reference
+        x = (canvas_width - photo.width()) // 2
+        y = (canvas_height - photo.height()) // 2
+        self.canvas.create_image(x, y, image=self.photo, anchor=tk.NW)
+
     def on_canvas_resize(self, event):
-        # Rescale and redraw image when canvas size changes
+        # Rescale and redraw image when canvas size changes. <Configure> fires for
+        # every step of a window drag, so only a cheap draft is drawn here; the
+        # high quality resample runs once the size has settled.
         path = self.current_image_path.get()
         if path and os.path.exists(path):
-            # Debounce or delay might be needed for rapid resizing
-            self.display_image(path)
+            self._draw_resize_draft(path, event.width, event.height)
+            if self._resize_after_id is not None:
+                self.frame.after_cancel(self._resize_after_id)
+            self._resize_after_id = self.frame.after(RESIZE_SETTLE_MS, self._start_final_resize, path)
         elif self.canvas_text_id:
              # Re-center placeholder text if no image
              try:
@@ -157,30 +225,148 @@ class SvgTab:
              except tk.TclError: # Handle case where canvas/text item might be destroyed
                   pass
 
+    def _draw_resize_draft(self, path, canvas_width, canvas_height):
+        """Shows the cached preview for this size, or a fast bilinear draft of the decoded image."""
+        cache = get_preview_cache()
+        box = self._preview_box(canvas_width, canvas_height)
+        try:
+            preview = cache.peek_preview(path, box, upscale=True)
+            if preview is not None:
+                self._show_photo(preview.photo, canvas_width, canvas_height)
+                return
+            draft = cache.draft_image(path, box, upscale=True)
+        except OSError as e:
+            logging.debug(f"No resize draft for {path}: {e}")
+            return
+        if draft is not None: # Not decoded yet: keep the old image until the final rescale
+            self._show_photo(ImageTk.PhotoImage(draft), canvas_width, canvas_height)
 
-    def _conversion_thread_task(self, in_path, options):
-        """Task to run in a separate thread."""
+    def _start_final_resize(self, path):
+        """Runs the LANCZOS rescale for the settled canvas size on a background thread."""
+        self._resize_after_id = None
+        if path != self.current_image_path.get():
+            return
+        canvas_width, canvas_height = self._canvas_size()
+        box = self._preview_box(canvas_width, canvas_height)
+        if get_preview_cache().peek_preview(path, box, upscale=True) is not None:
+            return # The draft already was the final preview
+        self._resize_generation += 1
+        generation = self._resize_generation
+
+        def resample():
+            try:
+                image, original_size = get_preview_cache().preview_image(path, box, upscale=True)
+                result = (path, box, image, original_size)
+            except Exception as e:
+                result = e
+            with self._resize_lock:
+                self._resize_results[generation] = result
+
+        threading.Thread(target=resample, name="svg-preview-resize", daemon=True).start()
+        self.frame.after(POLL_INTERVAL_MS, self._poll_final_resize, generation)
+
+    def _poll_final_resize(self, generation):
+        """Picks up the background rescale (main thread, via after())."""
+        with self._resize_lock:
+            result = self._resize_results.pop(generation, None)
+            if generation != self._resize_generation:
+                # Superseded by a newer resize, which polls for itself; drop stale results
+                for stale in [g for g in self._resize_results if g < self._resize_generation]:
+                    del self._resize_results[stale]
+                return
+        if result is None:
+            self.frame.after(POLL_INTERVAL_MS, self._poll_final_resize, generation)
+            return
+        if isinstance(result, Exception):
+            logging.warning(f"Could not rescale preview: {result}")
+            return
+        path, box, image, original_size = result
+        if path != self.current_image_path.get():
+            return
+        canvas_width, canvas_height = self._canvas_size()
+        if self._preview_box(canvas_width, canvas_height) != box:
+            return # The canvas changed meanwhile; its own settle timer is pending
         try:
-            output_path = svg_converter.convert_image_to_svg(
-                image_path=in_path,
-                options=options
-            )
-            self.frame.after(0, self._on_conversion_success, output_path) # Schedule GUI update in main thread
-        except Exception as e:
-            self.frame.after(0, self._on_conversion_error, e) # Schedule GUI update in main thread
+            preview = get_preview_cache().store_preview(path, box, True, image, original_size)
+        except OSError as e: # File removed in the meantime
+            logging.warning(f"Could not rescale preview: {e}")
+            return
+        self._show_photo(preview.photo, canvas_width, canvas_height)
+
+
+    def _poll_worker(self):
+        """Drains worker events and dispatches them (runs in main thread via after())."""
+        for event in self.worker.poll():
+            kind, job_id = event[0], event[1]
+            if job_id != self.current_job:
+                continue # Ready event, or late events from a dropped job
+            if kind == svg_worker.EVENT_PROGRESS:
+                self._on_conversion_progress(event[2], event[3])
+            elif kind == svg_worker.EVENT_DONE:
+                self._on_conversion_success(event[2])
+            elif kind == svg_worker.EVENT_CANCELLED:
+                self._on_conversion_cancelled()
+            elif kind == svg_worker.EVENT_ERROR:
+                self._on_conversion_error(event[2], event[3])
+        if self.current_job is not None:
+            self.frame.after(POLL_INTERVAL_MS, self._poll_worker)
+
+    def _on_conversion_progress(self, fraction, stage):
+        """Updates the progress bar (runs in main thread)."""
+        if self.cancel_requested:
+            return # Keep showing "Cancelling..."
+        self.progress_var.set(fraction * 100)
+        self.status_var.set(f"Processing SVG... {stage} ({fraction:.0%})")
+
+    def _finish_conversion(self):
+        """Resets the controls once the worker has finished the job."""
+        self.current_job = None
+        self.cancel_requested = False
+        self.cancel_button.config(state='disabled')
+        self.convert_button.config(state='normal') # Re-enable button
 
     def _on_conversion_success(self, output_path):
         """Callback for successful conversion (runs in main thread)."""
+        self._finish_conversion()
+        self.progress_var.set(100)
         self.status_var.set(f"Success! Saved as: {os.path.basename(output_path)}")
         messagebox.showinfo("Success", f"Image converted successfully!\nSaved to: {output_path}", parent=self.frame)
-        self.convert_button.config(state='normal') # Re-enable button
 
-    def _on_conversion_error(self, error):
-        """Callback for failed conversion (runs in main thread)."""
+    def _on_conversion_cancelled(self):
+        """Callback once a cancelled conversion has actually stopped (runs in main thread)."""
+        self._finish_conversion()
+        self.progress_var.set(0)
+        self.status_var.set("Conversion cancelled.")
+
+    def _on_conversion_error(self, error_type, message):
+        """Callback for failed conversion, with the error the worker reported (runs in main thread)."""
+        error = f"{message} ({error_type})"
+        self._finish_conversion()
+        self.progress_var.set(0)
         self.status_var.set(f"Error: {error}")
         messagebox.showerror("Conversion Error", f"Failed to convert image:\n{error}", parent=self.frame)
-        logging.error(f"SVG Conversion failed: {error}", exc_info=True)
-        self.convert_button.config(state='normal') # Re-enable button
+        # The exception was raised in the worker process, so there is no traceback to attach here
+        logging.error(f"SVG Conversion failed: {error_type}: {message}")
+
+    def cancel_conversion(self):
+        """Asks the running conversion to stop at its next check point."""
+        if self.current_job is not None:
+            self.worker.cancel(self.current_job)
+            self.cancel_requested = True
+            self.cancel_button.config(state='disabled')
+            self.status_var.set("Cancelling...")
+            self.frame.after(FORCE_CANCEL_AFTER_MS, self._force_cancel, self.current_job)
+
+    def _force_cancel(self, job_id):
+        """Kills and restarts the worker if a cancelled job is still running."""
+        if self.current_job == job_id:
+            logging.info(f"SVG job {job_id} did not stop in time, restarting the worker.")
+            self.worker.restart()
+            self._on_conversion_cancelled()
+
+    def _on_destroy(self, event):
+        if event.widget is self.frame:
+            self.worker.shutdown(timeout=1.0)
 
 
     def run_conversion(self):
@@ -193,17 +379,25 @@ class SvgTab:
             'n_colors': self.n_colors.get(),
             'tolerance': self.tolerance.get(),
             'opacity': self.opacity.get(),
-            'simplify_tolerance': self.simplify_tolerance.get()
+            'simplify_tolerance': self.simplify_tolerance.get(),
+            'curve_fitting': self.curve_fitting.get(),
+            'curve_tolerance': self.curve_tolerance.get(),
+            'min_region_area': self.min_region_area.get(),
+            'contour_mode': 'topology' if self.gapless.get() else 'full',
+            'quantizer': self.quantizer.get(),
+            'output_format': self.output_format.get()
         }
 
         self.status_var.set("Processing SVG...")
+        self.progress_var.set(0)
         self.convert_button.config(state='disabled') # Disable button during processing
+        self.cancel_button.config(state='normal')
         self.frame.update_idletasks()
 
-        # Run conversion in a separate thread to avoid freezing the GUI
-        thread = threading.Thread(target=self._conversion_thread_task, args=(in_path, options))
-        thread.daemon = True # Allow program to exit even if thread is running
-        thread.start()
+        # Hand the job to the worker process; Convert stays disabled until the job
+        # has finished or been cancelled, so clicks cannot pile up work
+        self.current_job = self.worker.submit(in_path, options=options)
+        self.frame.after(POLL_INTERVAL_MS, self._poll_worker)
 
 
 # Example usage for testing the tab independently
@@ -1,9 +1,14 @@
-# import tkinter as tk # Replaced by ThemedTk
-from ttkthemes import ThemedTk # Import ThemedTk
+import tkinter as tk
 from gui.main_window import MainWindow
 
+# Headless use (servers, scripts) goes through cli.py: python -m cli --help
+
 if __name__ == "__main__":
-    # Use ThemedTk to apply a theme globally at startup
-    root = ThemedTk(theme="equilux") # Apply 'equilux' theme
+    try:
+        from ttkthemes import ThemedTk # Import ThemedTk
+        # Use ThemedTk to apply a theme globally at startup
+        root = ThemedTk(theme="equilux") # Apply 'equilux' theme
+    except ImportError:
+        root = tk.Tk() # ttkthemes is optional; fall back to the default theme
     app = MainWindow(root)
     root.mainloop()
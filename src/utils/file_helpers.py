@@ -24,6 +24,22 @@ def select_image_file(title="Select Image"):
         logging.info("Image file selection cancelled.")
     return file_path
 
+def select_image_files(title="Select Images"):
+    """Opens a dialog to select several image files. Returns a (possibly empty) list of paths."""
+    root = tk.Tk()
+    root.withdraw()
+    file_paths = filedialog.askopenfilenames(
+        title=title,
+        filetypes=[
+            ("Images", "*.png *.jpg *.jpeg *.bmp *.gif *.ico *.webp *.tiff"),
+            ("All files", "*.*")
+        ]
+    )
+    root.destroy()
+    file_paths = list(file_paths)
+    logging.info(f"{len(file_paths)} image files selected.")
+    return file_paths
+
 def select_icon_file(title="Select Icon File"):
     """Opens a dialog to select an OS-specific icon file."""
     root = tk.Tk()
@@ -0,0 +1,41 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+# The application modules are imported as in src/main.py (from core import ...)
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+
+@pytest.fixture
+def block_image(tmp_path):
+    """Factory writing an image made of random 10x10 blocks of the given RGB colors; returns its path."""
+    def make(colors, name='blocks.png', size=(160, 120), seed=0):
+        width, height = size
+        rng = np.random.default_rng(seed)
+        indices = rng.integers(0, len(colors), (height // 10, width // 10)).repeat(10, axis=0).repeat(10, axis=1)
+        pixels = np.zeros((height, width, 3), dtype=np.uint8)
+        for i, rgb in enumerate(colors):
+            pixels[indices == i] = rgb
+        path = tmp_path / name
+        Image.fromarray(pixels).save(path)
+        return str(path)
+    return make
+
+
+@pytest.fixture
+def logo_image(tmp_path):
+    """A flat-color logo: overlapping shapes in red, blue and green on a light gray background."""
+    from PIL import ImageDraw
+    image = Image.new('RGB', (200, 150), (240, 240, 240))
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((20, 20, 120, 120), fill=(200, 30, 30))
+    draw.rectangle((100, 40, 180, 130), fill=(30, 60, 200))
+    draw.polygon([(10, 140), (60, 90), (110, 140)], fill=(20, 160, 60))
+    path = tmp_path / 'logo.png'
+    image.save(path)
+    return str(path)
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+from PIL import Image
+
+from core import batch_queue
+from core.svg_converter import CancellationToken
+
+
+@pytest.fixture
+def images(tmp_path):
+    paths = []
+    for index in range(5):
+        path = tmp_path / f'image{index}.png'
+        Image.new('RGB', (40, 30), (index * 40, 0, 0)).save(path)
+        paths.append(str(path))
+    return paths
+
+
+def _resize_queue(images, state_path):
+    queue = batch_queue.BatchQueue('resize', {'width': 20, 'height': '', 'keep_aspect': True}, str(state_path))
+    queue.add_paths(images)
+    return queue
+
+
+def test_cancelled_run_resumes_only_unfinished_items(images, tmp_path):
+    state_path = tmp_path / 'queue.json'
+    queue = _resize_queue(images, state_path)
+    token = CancellationToken()
+    def cancel_after_two(index, item):
+        if item['status'] == batch_queue.ITEM_DONE and queue.counts().get(batch_queue.ITEM_DONE) == 2:
+            token.cancel()
+    counts = batch_queue.run_queue(queue, workers=1, progress_callback=cancel_after_two, cancel_token=token)
+    assert counts == {batch_queue.ITEM_DONE: 2, batch_queue.ITEM_CANCELLED: 3}
+
+    resumed = batch_queue.BatchQueue.load(str(state_path))
+    assert resumed.unfinished() == [2, 3, 4]
+    started = []
+    counts = batch_queue.run_queue(resumed, progress_callback=lambda index, item: started.append(index))
+    assert counts == {batch_queue.ITEM_DONE: 5}
+    assert sorted(set(started)) == [2, 3, 4]
+    assert all(os.path.exists(item['output']) for item in resumed.items)
+
+
+def test_interrupted_and_failed_items(images, tmp_path):
+    state_path = tmp_path / 'queue.json'
+    queue = _resize_queue(images, state_path)
+    queue.update(0, batch_queue.ITEM_DONE, output=images[0])
+    queue.update(1, batch_queue.ITEM_RUNNING) # The process died while this item was running
+    queue.update(2, batch_queue.ITEM_FAILED, error='boom')
+    queue.save()
+
+    resumed = batch_queue.BatchQueue.load(str(state_path))
+    assert resumed.unfinished() == [1, 3, 4]
+    assert resumed.unfinished(retry_failed=True) == [1, 2, 3, 4]
+    assert resumed.items[2]['error'] == 'boom'
+
+
+def test_finished_items_are_saved_in_batches(images, tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_queue, 'SAVE_EVERY_ITEMS', 2)
+    monkeypatch.setattr(batch_queue, 'SAVE_INTERVAL_SECONDS', 3600)
+    writes = []
+    replace = os.replace
+    monkeypatch.setattr(batch_queue.os, 'replace', lambda src, dst: (writes.append(dst), replace(src, dst)))
+    state_path = tmp_path / 'queue.json'
+    queue = _resize_queue(images, state_path)
+
+    counts = batch_queue.run_queue(queue, workers=2)
+    assert counts == {batch_queue.ITEM_DONE: 5}
+    # Two batches of two finished items plus the final save; 'running' is never written
+    assert len(writes) == 3
+    assert batch_queue.BatchQueue.load(str(state_path)).unfinished() == []
+
+
+def test_add_paths_skips_queued_files(images, tmp_path):
+    queue = _resize_queue(images, tmp_path / 'queue.json')
+    assert queue.add_paths(images + [os.path.dirname(images[0])]) == 0
+    assert len(queue.items) == len(images)
+
+
+def test_load_rejects_foreign_files(tmp_path):
+    state_path = tmp_path / 'queue.json'
+    state_path.write_text('{"format_version": 99}', encoding='utf-8')
+    with pytest.raises(batch_queue.BatchQueueError):
+        batch_queue.BatchQueue.load(str(state_path))
@@ -0,0 +1,67 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from PIL import Image
+
+import cli
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+
+@pytest.fixture
+def photos(tmp_path):
+    folder = tmp_path / 'photos'
+    folder.mkdir()
+    for index in range(3):
+        Image.new('RGB', (40, 30), (index * 60, 100, 0)).save(folder / f'photo{index}.png')
+    return folder
+
+
+def _lines(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_resize_streams_items_and_summary(photos, capsys):
+    assert cli.main(['resize', str(photos), '--width', '20', '--jobs', '2']) == cli.EXIT_OK
+    lines = _lines(capsys)
+    items = [line for line in lines if line['type'] == 'item']
+    assert len(items) == 3 and all(item['status'] == 'done' for item in items)
+    assert lines[-1]['type'] == 'summary' and lines[-1]['done'] == 3
+    with Image.open(items[0]['output']) as img:
+        assert img.size == (20, 15)
+
+
+def test_failed_items_set_exit_status_and_state_resumes(photos, tmp_path, capsys):
+    (photos / 'broken.png').write_bytes(b'not an image')
+    state = str(tmp_path / 'queue.json')
+    assert cli.main(['convert', str(photos / '*.png'), '--format', 'JPEG', '--state', state]) == cli.EXIT_FAILED
+    assert _lines(capsys)[-1]['failed'] == 1
+    # A rerun with the same state only retries what failed, and only when asked
+    assert cli.main(['convert', str(photos / '*.png'), '--format', 'JPEG', '--state', state]) == cli.EXIT_FAILED
+    assert [line['type'] for line in _lines(capsys)] == ['summary']
+    cli.main(['convert', str(photos / '*.png'), '--format', 'JPEG', '--state', state, '--retry-failed'])
+    assert [line['input'] for line in _lines(capsys) if line['type'] == 'item'] == [str(photos / 'broken.png')]
+
+
+def test_usage_errors_exit_with_2(photos):
+    with pytest.raises(SystemExit) as raised:
+        cli.main(['resize', str(photos)]) # Neither --width nor --height
+    assert raised.value.code == cli.EXIT_USAGE
+
+
+def test_scan_lists_catalog(photos, tmp_path, capsys):
+    assert cli.main(['scan', str(photos), '--catalog', str(tmp_path / 'catalog.db')]) == cli.EXIT_OK
+    lines = _lines(capsys)
+    assert [line['width'] for line in lines if line['type'] == 'image'] == [40, 40, 40]
+    assert lines[-1]['added'] == 3
+
+
+def test_cli_does_not_import_tk_or_numpy(photos):
+    code = ("import sys, cli; cli.main(['convert', sys.argv[1], '--format', 'JPEG']); "
+            "print(sorted(name for name in ('tkinter', 'numpy') if name in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code, str(photos)], cwd=SRC_DIR, capture_output=True, text=True,
+                            check=True)
+    assert result.stdout.splitlines()[-1] == '[]'
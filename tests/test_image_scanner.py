@@ -0,0 +1,73 @@
+import os
+
+import pytest
+from PIL import Image
+
+from core import image_scanner
+
+
+def _save(path, size=(30, 20), color=(200, 0, 0), image_format=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.new('RGB', size, color).save(path, format=image_format)
+    return path
+
+
+def _bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.mark.parametrize('extension', ['.png', '.jpg', '.gif', '.bmp', '.webp', '.tif', '.ico'])
+def test_sniff_reads_header_size(tmp_path, extension):
+    path = _save(str(tmp_path / f'image{extension}'), size=(37, 23))
+    with Image.open(path) as img:
+        expected = (img.format, img.size[0], img.size[1])
+    assert image_scanner.sniff_image(path) == expected
+
+
+def test_rescan_tracks_added_changed_and_removed_files(tmp_path):
+    root = tmp_path / 'photos'
+    kept = _save(str(root / 'kept.png'))
+    changed = _save(str(root / 'sub' / 'changed.png'))
+    removed = _save(str(root / 'removed.png'))
+    with image_scanner.ImageCatalog(':memory:') as catalog:
+        stats = catalog.scan(str(root))
+        assert (stats['seen'], stats['added']) == (3, 3)
+
+        _save(changed, size=(64, 48))
+        _bump_mtime(changed)
+        os.remove(removed)
+        added = _save(str(root / 'sub' / 'added.jpg'))
+        stats = catalog.scan(str(root))
+        assert {key: stats[key] for key in ('seen', 'added', 'updated', 'unchanged', 'removed')} == \
+            {'seen': 3, 'added': 1, 'updated': 1, 'unchanged': 1, 'removed': 1}
+
+        rows = {row['path']: row for row in catalog.images()}
+        assert sorted(rows) == sorted([kept, changed, added])
+        assert (rows[changed]['width'], rows[changed]['height']) == (64, 48)
+        assert rows[added]['format'] == 'JPEG'
+
+
+def test_unreadable_files_are_recorded_as_errors(tmp_path):
+    root = tmp_path / 'photos'
+    _save(str(root / 'good.png'))
+    (root / 'broken.png').write_bytes(b'not an image at all')
+    with image_scanner.ImageCatalog(':memory:') as catalog:
+        assert catalog.scan(str(root))['errors'] == 1
+        assert [row['path'] for row in catalog.images()] == [str(root / 'good.png')]
+        assert len(list(catalog.images(include_errors=True))) == 2
+
+
+def test_scans_stay_inside_their_root(tmp_path):
+    photos = _save(str(tmp_path / 'photos' / 'a.png'))
+    sibling = _save(str(tmp_path / 'photos2' / 'b.png')) # Shares the 'photos' prefix
+    nested = _save(str(tmp_path / 'photos' / 'sub' / 'c.png'))
+    with image_scanner.ImageCatalog(str(tmp_path / 'catalog.db')) as catalog:
+        catalog.scan(str(tmp_path / 'photos'))
+        catalog.scan(str(tmp_path / 'photos2'))
+        assert catalog.count(str(tmp_path / 'photos')) == 2
+        os.remove(nested)
+        stats = catalog.scan(str(tmp_path / 'photos'), recursive=False)
+        assert stats['removed'] == 0 # Subfolders are not rescanned, so their rows stay
+        assert catalog.scan(str(tmp_path / 'photos'))['removed'] == 1
+        assert [row['path'] for row in catalog.images()] == [photos, sibling]
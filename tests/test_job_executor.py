@@ -0,0 +1,87 @@
+import threading
+import time
+
+import pytest
+
+from gui import job_executor
+
+
+class FakeMaster:
+    """Stands in for a Tk widget: after() callbacks run when the test pumps them."""
+
+    def __init__(self):
+        self.scheduled = {}
+        self._ids = iter(range(1, 1_000_000))
+
+    def winfo_toplevel(self):
+        return self
+
+    def bind(self, sequence, callback, add=None):
+        pass
+
+    def after(self, ms, callback):
+        after_id = next(self._ids)
+        self.scheduled[after_id] = callback
+        return after_id
+
+    def after_cancel(self, after_id):
+        self.scheduled.pop(after_id, None)
+
+    def pump(self, until, deadline=10):
+        """Runs scheduled callbacks on this thread (the 'GUI thread') until until() is true."""
+        end = time.monotonic() + deadline
+        while not until():
+            assert time.monotonic() < end, "jobs did not finish in time"
+            for after_id in list(self.scheduled):
+                self.scheduled.pop(after_id)()
+            time.sleep(0.01)
+
+
+@pytest.fixture
+def executor():
+    master = FakeMaster()
+    executor = job_executor.JobExecutor(master, max_workers=2)
+    executor.pump = master.pump
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def test_outcomes_are_delivered_on_the_gui_thread(executor):
+    results, errors, threads = [], [], []
+    def on_success(result):
+        results.append(result)
+        threads.append(threading.current_thread())
+    executor.submit(sum, ([1, 2, 3],), on_success=on_success)
+    executor.submit(int, ('nope',), on_error=errors.append)
+    executor.pump(lambda: results and errors)
+    assert results == [6] and isinstance(errors[0], ValueError)
+    assert threads == [threading.current_thread()]
+    assert executor.active_jobs == []
+
+
+def test_cancelled_job_stops_and_reports(executor):
+    started, cancelled, progress = threading.Event(), [], []
+    def work(job):
+        job.report_progress(1, 3)
+        started.set()
+        while True:
+            job.check()
+            time.sleep(0.01)
+    job = executor.submit(work, with_job=True, on_progress=lambda done, total: progress.append((done, total)),
+                          on_cancelled=lambda: cancelled.append(True), on_success=pytest.fail)
+    started.wait(5)
+    job.cancel()
+    executor.pump(lambda: cancelled)
+    assert job.state == job_executor.JOB_CANCELLED
+    assert progress in ([], [(1, 3)]) # Progress dispatched together with the outcome is dropped
+
+
+def test_queued_jobs_cancelled_before_starting_never_run(executor):
+    gate, ran, cancelled = threading.Event(), [], []
+    for _ in range(2): # Occupy both workers
+        executor.submit(gate.wait, (5,))
+    job = executor.submit(ran.append, (True,), on_cancelled=lambda: cancelled.append(True))
+    job.cancel()
+    gate.set()
+    executor.pump(lambda: cancelled and not executor.active_jobs)
+    assert ran == []
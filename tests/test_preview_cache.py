@@ -0,0 +1,114 @@
+import os
+
+import pytest
+from PIL import Image, ImageFile, JpegImagePlugin
+
+from gui import preview_cache
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """Records every file Pillow opens."""
+    paths = []
+    open_image = Image.open
+    def recording_open(fp, *args, **kwargs):
+        paths.append(os.path.basename(str(fp)))
+        return open_image(fp, *args, **kwargs)
+    monkeypatch.setattr(Image, 'open', recording_open)
+    return paths
+
+
+def _save(path, size=(300, 200), color=(200, 30, 30)):
+    Image.new('RGB', size, color).save(path)
+    return str(path)
+
+
+def test_preview_fits_box_and_keeps_aspect(tmp_path):
+    cache = preview_cache.PreviewCache()
+    image, original_size = cache.preview_image(_save(tmp_path / 'wide.png'), (150, 150))
+    assert (image.size, original_size) == ((150, 100), (300, 200))
+    image, _ = cache.preview_image(_save(tmp_path / 'small.png', size=(60, 40)), (150, 150))
+    assert image.size == (60, 40) # Not enlarged unless upscale
+    assert cache.preview_image(str(tmp_path / 'small.png'), (150, 150), upscale=True)[0].size == (150, 100)
+
+
+def test_source_is_decoded_once_until_the_file_changes(tmp_path, opened):
+    cache = preview_cache.PreviewCache()
+    path = _save(tmp_path / 'photo.png')
+    cache.preview_image(path, (100, 100))
+    cache.preview_image(path, (120, 80))
+    assert cache.original_size(path) == (300, 200)
+    assert opened == ['photo.png']
+    _save(path, size=(400, 100))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.preview_image(path, (100, 100))[1] == (400, 100)
+    assert opened == ['photo.png', 'photo.png']
+
+
+
+def test_sources_beyond_the_budget_are_not_kept(tmp_path, opened):
+    cache = preview_cache.PreviewCache(max_bytes=1000)
+    path = _save(tmp_path / 'photo.png')
+    cache.preview_image(path, (100, 100))
+    cache.preview_image(path, (100, 100))
+    assert opened == ['photo.png', 'photo.png']
+
+
+def test_draft_never_decodes(tmp_path, opened):
+    cache = preview_cache.PreviewCache()
+    path = _save(tmp_path / 'photo.png')
+    assert cache.draft_image(path, (100, 100)) is None
+    assert opened == []
+    final, _ = cache.preview_image(path, (100, 100))
+    assert cache.draft_image(path, (100, 100)).size == final.size
+    assert opened == ['photo.png']
+
+
+def test_large_images_are_resampled_from_a_reduced_copy(tmp_path, monkeypatch):
+    monkeypatch.setattr(preview_cache, 'REDUCED_SOURCE_MAX_SIDE', 100)
+    cache = preview_cache.PreviewCache()
+    path = _save(tmp_path / 'photo.png', size=(400, 300))
+    reduced, original_size = cache._reduced_source(cache._file_key(path))
+    assert (reduced.size, original_size) == ((100, 75), (400, 300))
+    assert cache.preview_image(path, (80, 80))[0].size == (80, 60)
+    # Larger previews come from the full image instead of enlarging the reduced copy
+    assert cache.preview_image(path, (200, 200))[0].size == (200, 150)
+
+
+def test_quick_image_has_the_final_preview_size(tmp_path):
+    path = _save(tmp_path / 'photo.jpg', size=(1600, 1200))
+    quick, original_size = preview_cache.PreviewCache().quick_image(path, (190, 190))
+    final, _ = preview_cache.PreviewCache().preview_image(path, (190, 190))
+    assert quick.size == final.size == (190, 142)
+    assert original_size == (1600, 1200)
+
+
+@pytest.mark.parametrize('name, size', [('photo.png', (1600, 1200)), ('photo.jpg', (300, 200))])
+def test_no_quick_image_when_it_costs_a_full_decode(tmp_path, monkeypatch, name, size):
+    path = _save(tmp_path / name, size=size)
+    monkeypatch.setattr(ImageFile.ImageFile, 'load', lambda image: pytest.fail('quick_image decoded the file'))
+    assert preview_cache.PreviewCache().quick_image(path, (190, 190)) is None
+
+
+def test_quick_image_uses_the_decoded_source(tmp_path):
+    cache = preview_cache.PreviewCache()
+    path = _save(tmp_path / 'photo.png', size=(1600, 1200))
+    final, _ = cache.preview_image(path, (190, 190))
+    quick, original_size = cache.quick_image(path, (190, 190))
+    assert quick.size == final.size and original_size == (1600, 1200)
+
+
+def test_quick_jpeg_is_decoded_at_reduced_scale(tmp_path, monkeypatch):
+    path = _save(tmp_path / 'photo.jpg', size=(1600, 1200))
+    decoded = []
+    draft = JpegImagePlugin.JpegImageFile.draft
+    def recording_draft(image, mode, size):
+        result = draft(image, mode, size)
+        decoded.append(image.size)
+        return result
+    monkeypatch.setattr(JpegImagePlugin.JpegImageFile, 'draft', recording_draft)
+    cache = preview_cache.PreviewCache()
+    cache.quick_image(path, (190, 190))
+    assert decoded == [(200, 150)] # 1/8 scale, not below the preview size
+    assert cache.draft_image(path, (190, 190)) is None # The draft decode is not cached as the source
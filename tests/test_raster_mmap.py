@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from core import raster_mmap, svg_converter, svg_regions
+from core.svg_pipeline import StageCache
+
+
+def _noisy_blocks(seed=0):
+    rng = np.random.default_rng(seed)
+    colors = np.array([(220, 40, 40), (40, 200, 60), (40, 60, 220), (240, 240, 240)])
+    blocks = np.kron(rng.integers(0, 4, (9, 12)), np.ones((10, 10), dtype=int))
+    blocks[rng.random(blocks.shape) < 0.03] = 3
+    return colors[blocks].astype(np.uint8)
+
+
+@pytest.mark.parametrize('extension, mode', [('.bmp', 'RGB'), ('.tif', 'RGB'), ('.ppm', 'RGB'), ('.pgm', 'L'),
+                                             ('.tif', 'L')])
+def test_uncompressed_files_map_to_decoded_pixels(tmp_path, extension, mode):
+    pixels = _noisy_blocks()
+    path = str(tmp_path / f'image{extension}')
+    Image.fromarray(pixels).convert(mode).save(path)
+    mapped = raster_mmap.open_mapped(path)
+    assert mapped is not None and raster_mmap.is_file_backed(mapped)
+    with Image.open(path) as img:
+        assert np.array_equal(mapped, np.asarray(img))
+
+
+def test_npy_maps_and_compressed_files_do_not(tmp_path):
+    pixels = _noisy_blocks()
+    np.save(tmp_path / 'image.npy', pixels)
+    assert np.array_equal(raster_mmap.open_mapped(str(tmp_path / 'image.npy')), pixels)
+    Image.fromarray(pixels).save(tmp_path / 'image.png')
+    assert raster_mmap.open_mapped(str(tmp_path / 'image.png')) is None
+
+
+@pytest.mark.parametrize('morphology', [None, 'open', 'close'])
+def test_chunked_label_map_matches_whole_image(monkeypatch, morphology):
+    img = _noisy_blocks()
+    centers = svg_converter._to_mask_space(
+        np.array([(220, 40, 40), (40, 200, 60), (40, 60, 220), (240, 240, 240)]) / 255.0, False)
+    whole = svg_regions.build_label_map(svg_converter._hsv_rows(img, 0, len(img)), centers, 0.2, morphology)
+    monkeypatch.setattr(svg_converter, 'LOW_MEMORY_CHUNK_PIXELS', img.shape[1] * 7) # 7-row chunks
+    chunked = svg_converter._build_label_map_chunked(img, centers, 0.2, morphology)
+    assert np.array_equal(chunked, whole)
+
+
+def test_memory_mapped_conversion_matches_in_memory_labels(tmp_path):
+    path = str(tmp_path / 'image.bmp')
+    Image.fromarray(_noisy_blocks()).save(path)
+
+    def paths(**options):
+        opts = svg_converter._resolve_options(dict(options, n_colors=4, morphology='open'))
+        _, (_, _, color_paths, _) = svg_converter._build_paths(path, opts, StageCache())
+        return sorted((hex_color, sorted(path_list)) for hex_color, path_list in color_paths)
+
+    assert paths(memory_map=True) == paths()
@@ -0,0 +1,33 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from core import shared_arrays, svg_converter
+
+
+def test_descriptor_attaches_to_the_same_memory():
+    with shared_arrays.SharedArray.from_array(np.arange(12, dtype=np.int32).reshape(3, 4)) as shared:
+        descriptor = pickle.loads(pickle.dumps(shared.descriptor))
+        with shared_arrays.attach(descriptor) as attached:
+            assert np.array_equal(attached.array, shared.array)
+            attached.array[1, 1] = -1
+        assert shared.array[1, 1] == -1
+
+
+def test_unlinked_segment_cannot_be_attached():
+    shared = shared_arrays.SharedArray((4,), np.uint8)
+    descriptor = shared.descriptor
+    shared.unlink()
+    with pytest.raises(shared_arrays.SharedArrayError):
+        shared_arrays.attach(descriptor)
+
+
+def test_label_workers_match_in_process_labels(monkeypatch):
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 256, (60, 50, 3)).astype(np.uint8)
+    centers = svg_converter._to_mask_space(np.array([(1.0, 0.0, 0.0), (0.0, 0.0, 1.0), (1.0, 1.0, 1.0)]), False)
+    monkeypatch.setattr(svg_converter, 'LOW_MEMORY_CHUNK_PIXELS', img.shape[1] * 16) # Several chunks
+    expected = svg_converter._build_label_map_chunked(img, centers, 0.3, 'open', claim_all=True)
+    parallel = svg_converter._build_label_map_chunked(img, centers, 0.3, 'open', claim_all=True, workers=2)
+    assert np.array_equal(parallel, expected)
@@ -0,0 +1,61 @@
+import os
+
+from core import svg_converter
+from core.svg_pipeline import StageCache
+
+RGBW = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 255)]
+
+
+class RecordingCache(StageCache):
+    """StageCache that records the name of every stage it had to compute."""
+
+    def __init__(self):
+        super().__init__()
+        self.computed = []
+
+    def get_or_compute(self, key, compute):
+        def recorded():
+            self.computed.append(key[0])
+            return compute()
+        return super().get_or_compute(key, recorded)
+
+    def run(self, image_path, tmp_path, **options):
+        self.computed = []
+        svg_converter.convert_image_to_svg(image_path, str(tmp_path / 'out.svg'), dict(options), cache=self)
+        return sorted(self.computed)
+
+
+def test_repeated_conversion_is_served_from_cache(block_image, tmp_path):
+    image_path = block_image(RGBW)
+    cache = RecordingCache()
+    assert cache.run(image_path, tmp_path, n_colors=4) == sorted(
+        ['decode', 'preprocess', 'palette', 'masks', 'contours', 'paths', 'document'])
+    assert cache.run(image_path, tmp_path, n_colors=4) == []
+
+
+def test_changed_parameter_invalidates_only_downstream_stages(block_image, tmp_path):
+    image_path = block_image(RGBW)
+    cache = RecordingCache()
+    cache.run(image_path, tmp_path, n_colors=4)
+    assert cache.run(image_path, tmp_path, n_colors=4, opacity=0.5) == ['document']
+    assert cache.run(image_path, tmp_path, n_colors=4, simplify_tolerance=2.0) == ['contours', 'document', 'paths']
+    assert cache.run(image_path, tmp_path, n_colors=4, tolerance=0.3) == ['contours', 'document', 'masks', 'paths']
+    assert cache.run(image_path, tmp_path, n_colors=3) == ['contours', 'document', 'masks', 'palette', 'paths']
+
+
+def test_rewritten_source_invalidates_decode(block_image, tmp_path):
+    image_path = block_image(RGBW)
+    cache = RecordingCache()
+    cache.run(image_path, tmp_path, n_colors=4)
+    block_image(RGBW, seed=1)
+    stat = os.stat(image_path)
+    os.utime(image_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert 'decode' in cache.run(image_path, tmp_path, n_colors=4)
+
+
+def test_cache_respects_memory_budget():
+    cache = StageCache(max_bytes=1000)
+    for index in range(10):
+        cache.put(('stage', index), b'x' * 300)
+    assert cache.nbytes <= 1000
+    assert ('stage', 9) in cache and ('stage', 0) not in cache
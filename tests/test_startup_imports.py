@@ -0,0 +1,32 @@
+import importlib
+import os
+import subprocess
+import sys
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+HEAVY_PACKAGES = ('numpy', 'scipy', 'sklearn', 'skimage', 'svgwrite', 'imageio')
+
+
+def _imported_after(statement, candidates):
+    """Runs statement in a fresh interpreter and returns which candidate modules it loaded."""
+    code = f"import sys; {statement}; print(','.join(m for m in {candidates!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, '-c', code], cwd=SRC_DIR, capture_output=True, text=True, check=True)
+    return [name for name in result.stdout.strip().split(',') if name]
+
+
+@pytest.mark.parametrize('module', ['gui.main_window', 'gui.tabs.converter_tab', 'gui.preview_cache',
+                                    'gui.job_executor', 'core.svg_pipeline'])
+def test_startup_modules_do_not_import_heavy_packages(module):
+    assert _imported_after(f"import {module}", HEAVY_PACKAGES) == []
+
+
+def test_svg_converter_defers_io_and_svg_writer():
+    assert _imported_after("from core import svg_converter", ('skimage.io', 'imageio', 'svgwrite', 'sklearn')) == []
+
+
+def test_every_lazy_tab_resolves():
+    from gui import main_window
+    for _, module_name, class_name in main_window.TABS:
+        assert hasattr(importlib.import_module(f'gui.tabs.{module_name}'), class_name)
@@ -0,0 +1,49 @@
+import os
+import threading
+
+from core import svg_batch
+
+RGBW = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 255)]
+
+
+def _exit_at_startup(conn, options, memory_limit_bytes, log_level):
+    """Stands in for _batch_worker_main: dies like a worker whose imports fail."""
+    os._exit(3)
+
+
+def _run_with_deadline(seconds, fn, *args, **kwargs):
+    """Runs fn on a thread so a hanging batch fails the test instead of blocking it."""
+    outcome = {}
+    thread = threading.Thread(target=lambda: outcome.update(result=fn(*args, **kwargs)), daemon=True)
+    thread.start()
+    thread.join(seconds)
+    assert not thread.is_alive(), f"convert_batch_to_svg did not return within {seconds} s"
+    return outcome['result']
+
+
+def test_batch_converts_every_image(tmp_path, block_image):
+    images = [block_image(RGBW, name=f'{i}.png', seed=i) for i in range(3)]
+    records = _run_with_deadline(120, svg_batch.convert_batch_to_svg, images, output_dir=str(tmp_path / 'out'),
+                                 options={'n_colors': 4}, jobs=2)
+    assert [record['status'] for record in records] == [svg_batch.STATUS_OK] * 3
+    assert all(os.path.exists(record['output']) for record in records)
+
+
+def test_images_with_the_same_name_get_separate_outputs(tmp_path, block_image):
+    images = []
+    for folder in ('a', 'b'):
+        (tmp_path / folder).mkdir()
+        images.append(block_image(RGBW, name=f'{folder}/logo.png', seed=len(images)))
+    records = _run_with_deadline(120, svg_batch.convert_batch_to_svg, images, output_dir=str(tmp_path / 'out'),
+                                 options={'n_colors': 4}, jobs=1)
+    assert [os.path.basename(record['output']) for record in records] == ['logo.svg', 'logo_1.svg']
+    assert all(os.path.exists(record['output']) for record in records)
+
+
+def test_workers_dying_at_startup_do_not_respawn_forever(tmp_path, block_image, monkeypatch):
+    # Regression: workers that died before taking a job were replaced without limit, so the batch hung
+    monkeypatch.setattr(svg_batch, '_batch_worker_main', _exit_at_startup)
+    images = [block_image(RGBW, name=f'{i}.png', seed=i) for i in range(3)]
+    records = _run_with_deadline(60, svg_batch.convert_batch_to_svg, images, output_dir=str(tmp_path / 'out'), jobs=2)
+    assert [record['status'] for record in records] == [svg_batch.STATUS_CRASHED] * 3
+    assert all('exit code 3' in record['error'] for record in records)
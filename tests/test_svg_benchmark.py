@@ -0,0 +1,58 @@
+import importlib.util
+import itertools
+import json
+import os
+
+import pytest
+
+BENCHMARK_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks',
+                              'svg_benchmark.py')
+
+
+@pytest.fixture(scope='module')
+def benchmark():
+    spec = importlib.util.spec_from_file_location('svg_benchmark', BENCHMARK_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _result(seconds=1.0, paths=10, output_bytes=1000, peak_rss_mb=100.0):
+    return {'seconds': seconds, 'paths': paths, 'output_bytes': output_bytes, 'peak_rss_mb': peak_rss_mb}
+
+
+def test_compare_flags_regressions(benchmark):
+    baseline = {case: _result() for case in ('ok', 'slow', 'fast', 'memory', 'output', 'failed')}
+    results = {
+        'ok': _result(seconds=1.1),
+        'slow': _result(seconds=1.5),
+        'fast': _result(seconds=0.5),
+        'memory': _result(peak_rss_mb=130.0),
+        'output': _result(seconds=5.0, paths=11), # Changed output outranks timing
+        'failed': {'error': 'boom'},
+        'new': _result(),
+    }
+    verdicts = {case: verdict for case, verdict, _ in benchmark.compare(results, baseline)}
+    assert verdicts == {'ok': 'ok', 'slow': 'slower', 'fast': 'faster', 'memory': 'more-memory',
+                        'output': 'output-changed', 'failed': 'failed', 'new': 'new'}
+
+
+def test_baseline_covers_the_default_suite(benchmark):
+    with open(benchmark.BASELINE_PATH, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    expected = {
+        benchmark.case_id(kind, size, {'n_colors': n, 'tolerance': t, 'simplify_tolerance': s})
+        for kind, size, n, t, s in itertools.product(
+            benchmark.IMAGE_KINDS, benchmark.DEFAULT_SIZES, benchmark.DEFAULT_N_COLORS,
+            benchmark.DEFAULT_TOLERANCES, benchmark.DEFAULT_SIMPLIFY_TOLERANCES)
+    }
+    assert set(baseline) == expected
+
+
+@pytest.mark.parametrize('kind', ['logo', 'gradient', 'photo'])
+def test_test_images_are_deterministic(benchmark, tmp_path, kind):
+    first, second = str(tmp_path / 'a.png'), str(tmp_path / 'b.png')
+    assert benchmark.make_test_image(first, kind, 0.01) == (115, 86)
+    benchmark.make_test_image(second, kind, 0.01)
+    with open(first, 'rb') as a, open(second, 'rb') as b:
+        assert a.read() == b.read()
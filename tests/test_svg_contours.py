@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from PIL import Image
+from scipy import ndimage
+
+from core import svg_converter
+
+
+def _contour_set(contours):
+    # The per-component trace starts each ring elsewhere, so compare rings as point sets
+    return sorted(sorted(map(tuple, np.round(contour, 3).tolist())) for contour in contours)
+
+
+def _islands(shape, density, seed):
+    rng = np.random.default_rng(seed)
+    mask = ndimage.binary_dilation(rng.random(shape) < density, iterations=2)
+    mask[40:80, 40:80] = True
+    mask[55:65, 55:65] = False # A hole
+    mask[80, 80] = True # Touches the square only diagonally
+    return mask
+
+
+@pytest.mark.parametrize('shape, density', [((150, 200), 0.002), ((300, 260), 0.01)], ids=['sparse', 'dense'])
+def test_component_contours_match_full_mask(shape, density):
+    mask = _islands(shape, density, seed=0)
+    full = svg_converter._trace_mask(mask, 0.0, 'full')
+    components = svg_converter._trace_mask(mask, 0.0, 'components')
+    assert len(components) == len(full)
+    assert _contour_set(components) == _contour_set(full)
+
+
+def test_component_contours_of_touching_image_edges():
+    mask = np.zeros((70, 90), dtype=bool)
+    mask[:, :5] = True
+    mask[-3:, :] = True
+    mask[10:20, 85:] = True
+    assert _contour_set(svg_converter._trace_mask(mask, 0.0, 'components')) == \
+        _contour_set(svg_converter._trace_mask(mask, 0.0, 'full'))
+
+
+def test_simplified_component_contours_differ_by_a_few_points_at_most(logo_image):
+    pixels = np.asarray(Image.open(logo_image).convert('RGB'))
+    masks = [(pixels == color).all(axis=-1) for color in np.unique(pixels.reshape(-1, 3), axis=0)]
+    masks.append(_islands((300, 260), 0.01, seed=0))
+    for mask in masks:
+        full = svg_converter._trace_mask(mask, 0.5, 'full')
+        components = svg_converter._trace_mask(mask, 0.5, 'components')
+        assert len(components) == len(full)
+        full_points = sum(len(contour) for contour in full)
+        assert abs(sum(len(contour) for contour in components) - full_points) <= max(2, 0.02 * full_points)
@@ -0,0 +1,98 @@
+import re
+
+import numpy as np
+import pytest
+
+from core import svg_converter, svg_regions
+
+RGBW = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 255)]
+RED_WHITES_BLACK = [(255, 0, 0), (255, 255, 255), (0, 0, 0), (250, 250, 250)]
+MODES = {'default': {}, 'low_memory': {'low_memory': True}, 'kmeans': {'quantizer': 'kmeans'}}
+
+
+def _hex(rgb):
+    return '#{:02x}{:02x}{:02x}'.format(*rgb)
+
+
+def _fills(svg_path):
+    with open(svg_path, 'r', encoding='utf-8') as f:
+        return set(re.findall(r'fill="(#[0-9a-f]{6})"', f.read()))
+
+
+@pytest.mark.parametrize('mode', sorted(MODES))
+@pytest.mark.parametrize('colors', [RGBW, RED_WHITES_BLACK], ids=['rgbw', 'red-whites-black'])
+def test_every_palette_color_becomes_a_path(tmp_path, block_image, mode, colors):
+    # Regression: k-means round-off ([1, -0, 0]) gave red a hue of 1.0 and white/black
+    # an arbitrary hue, so the default masks dropped those colors entirely
+    image_path = block_image(colors)
+    output = svg_converter.convert_image_to_svg(image_path, str(tmp_path / 'out.svg'),
+                                                options=dict(MODES[mode], n_colors=len(colors)))
+    assert _fills(output) == {_hex(rgb) for rgb in colors}
+
+
+def test_mask_space_clips_round_off():
+    centers = np.array([[1.0, -1e-17, 0.0], [-3e-14, 1.5e-14, 1.5e-14]])
+    hsv = svg_converter._to_mask_space(centers, is_grayscale=False)
+    assert hsv[0, 0] == 0.0 # Pure red, not hue 1.0
+    assert np.all((hsv >= 0) & (hsv <= 1))
+
+
+def test_color_distance_wraps_hue():
+    hue = np.array([[0.98, 0.5]], dtype=np.float32)
+    full = np.ones_like(hue)
+    distance, scratch = np.empty_like(hue), np.empty_like(hue)
+    svg_regions.color_distance([hue, full, full], np.array([0.02, 1.0, 1.0]), distance, scratch)
+    assert distance[0, 0] == pytest.approx(0.04, abs=1e-6)
+    assert distance[0, 1] == pytest.approx(0.48, abs=1e-6)
+
+
+def test_color_distance_ignores_hue_of_achromatic_centers():
+    # White pixels have hue 0; a near-white center can carry any hue
+    hue, saturation, value = (np.array([[0.0]], dtype=np.float32), np.array([[0.0]], dtype=np.float32),
+                              np.array([[1.0]], dtype=np.float32))
+    distance, scratch = np.empty_like(hue), np.empty_like(hue)
+    svg_regions.color_distance([hue, saturation, value], np.array([0.6, 0.01, 0.99]), distance, scratch)
+    assert distance[0, 0] == pytest.approx(0.01, abs=1e-6)
+    # Near-black: only the value counts (rgb2hsv gives round-off blacks a saturation of 1)
+    svg_regions.color_distance([hue, saturation, value * 0], np.array([0.5, 1.0, 1e-14]), distance, scratch)
+    assert distance[0, 0] == pytest.approx(0.0, abs=1e-6)
+
+
+def _path_set(svg_path):
+    with open(svg_path, 'r', encoding='utf-8') as f:
+        return sorted(re.findall(r'<path d="([^"]*)"[^>]*fill="(#[0-9a-f]{6})"', f.read()))
+
+
+@pytest.mark.parametrize('extra', [{}, {'contour_mode': 'components'}, {'min_region_area': 20}],
+                         ids=['full', 'components', 'despeckle'])
+@pytest.mark.parametrize('fixture', ['rgbw', 'red-whites-black', 'logo'])
+def test_low_memory_matches_default_paths(tmp_path, block_image, logo_image, fixture, extra):
+    image_path = {'rgbw': lambda: block_image(RGBW), 'red-whites-black': lambda: block_image(RED_WHITES_BLACK),
+                  'logo': lambda: logo_image}[fixture]()
+    options = dict(extra, n_colors=4)
+    default = svg_converter.convert_image_to_svg(image_path, str(tmp_path / 'default.svg'), options=options)
+    low_memory = svg_converter.convert_image_to_svg(image_path, str(tmp_path / 'low_memory.svg'),
+                                                    options=dict(options, low_memory=True))
+    assert _path_set(default) == _path_set(low_memory)
+
+
+def test_progress_is_monotonic_and_completes(block_image, tmp_path):
+    reports = []
+    svg_converter.convert_image_to_svg(block_image(RGBW), str(tmp_path / 'out.svg'), {'n_colors': 4},
+                                       progress_callback=lambda fraction, stage: reports.append((fraction, stage)))
+    fractions = [fraction for fraction, _ in reports]
+    assert fractions == sorted(fractions) and fractions[-1] == pytest.approx(1.0)
+    assert {stage for _, stage in reports} >= {'decode', 'palette', 'contours', 'write'}
+
+
+@pytest.mark.parametrize('stage', ['palette', 'contours', 'document'])
+def test_cancelling_stops_the_conversion(block_image, tmp_path, stage):
+    token = svg_converter.CancellationToken()
+    def cancel_at(fraction, current):
+        if current == stage:
+            token.cancel()
+    output_path = tmp_path / 'out.svg'
+    with pytest.raises(svg_converter.SvgConversionCancelled):
+        svg_converter.convert_image_to_svg(block_image(RGBW), str(output_path), {'n_colors': 4},
+                                           progress_callback=cancel_at, cancel_token=token)
+    assert not output_path.exists()
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from skimage import draw, measure
+
+from core import svg_curves
+
+
+def _traced(mask):
+    padded = np.pad(mask, 1).astype(float)
+    return max(measure.find_contours(padded, 0.5, fully_connected='low'), key=len) - 1
+
+
+def _distance_to_curve(points, beziers):
+    samples = np.concatenate([svg_curves._evaluate(bezier, np.linspace(0, 1, 200)) for bezier in beziers])
+    return np.sqrt(((points[:, None, :] - samples[None, :, :]) ** 2).sum(axis=2)).min(axis=1)
+
+
+@pytest.mark.parametrize('max_error', [0.5, 1.0, 2.0])
+def test_fitted_curve_stays_within_tolerance(max_error):
+    mask = np.zeros((80, 100), dtype=bool)
+    mask[draw.ellipse(40, 50, 30, 42)] = True
+    contour = _traced(mask)
+    beziers, closed = svg_curves.fit_contour(contour, max_error=max_error)
+    assert closed
+    assert len(beziers) < len(contour) // 4
+    assert _distance_to_curve(contour, beziers).max() <= max_error + 0.05
+    for current, following in zip(beziers, beziers[1:] + beziers[:1]): # A closed, connected ring
+        assert np.allclose(current[3], following[0])
+
+
+def test_corners_are_kept_as_segment_ends():
+    mask = np.zeros((40, 60), dtype=bool)
+    mask[10:30, 15:45] = True
+    contour = _traced(mask)
+    beziers, _ = svg_curves.fit_contour(contour, max_error=1.0)
+    assert len(beziers) == 4
+    ends = [tuple(np.round(bezier[3], 2)) for bezier in beziers]
+    # Marching squares cuts each corner at 45 degrees; one point of every cut is the segment end
+    for cut in [{(9.5, 15.0), (10.0, 14.5)}, {(9.5, 44.0), (10.0, 44.5)},
+                {(29.5, 15.0), (29.0, 14.5)}, {(29.5, 44.0), (29.0, 44.5)}]:
+        assert len(cut & set(ends)) == 1
+    assert _distance_to_curve(contour, beziers).max() <= 1.05
+
+
+def test_straight_runs_are_written_as_lines():
+    chain = np.column_stack((np.zeros(20), np.arange(20.0)))
+    beziers, closed = svg_curves.fit_contour(chain, max_error=0.5, closed=False)
+    assert svg_curves.beziers_to_svg_path(beziers, closed) == "M 0.00,0.00 L 19.00,0.00"
+
+
+def test_open_chain_keeps_its_end_points():
+    chain = np.array([[0.0, 0.0], [1.0, 2.0], [2.0, 3.0], [4.0, 3.5], [6.0, 3.0]])
+    beziers, closed = svg_curves.fit_contour(chain, max_error=0.5, closed=False)
+    assert not closed
+    assert np.allclose(beziers[0][0], chain[0]) and np.allclose(beziers[-1][3], chain[-1])
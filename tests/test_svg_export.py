@@ -0,0 +1,49 @@
+import gzip
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pytest
+
+from core import svg_converter, svg_export
+
+
+def _svg_paths(document):
+    root = ET.fromstring(document)
+    return [(element.get('fill'), element.get('d')) for element in root.iter() if element.tag.endswith('path')]
+
+
+@pytest.fixture(params=[{}, {'curve_fitting': True}], ids=['polygons', 'curves'])
+def conversions(request, logo_image, tmp_path):
+    options = dict(request.param, n_colors=4)
+    outputs = {}
+    for output_format in svg_export.OUTPUT_FORMATS:
+        # The format follows the extension when no output_format is given
+        output_path = str(tmp_path / f'logo{svg_export.OUTPUT_EXTENSIONS[output_format]}')
+        outputs[output_format] = svg_converter.convert_image_to_svg(logo_image, output_path, options)
+    return outputs
+
+
+def test_svgz_holds_the_same_document(conversions):
+    with open(conversions['svg'], encoding='utf-8') as f:
+        expected = _svg_paths(f.read())
+    with gzip.open(conversions['svgz'], 'rt', encoding='utf-8') as f:
+        assert _svg_paths(f.read()) == expected
+
+
+def test_npz_round_trips_every_path(conversions):
+    with open(conversions['svg'], encoding='utf-8') as f:
+        expected = _svg_paths(f.read())
+    archive = svg_export.load_npz(conversions['npz'])
+    decoded = [('#%02x%02x%02x' % rgb, svg_export.path_data_from_ops(ops, points))
+               for rgb, ops, points in archive['paths']]
+    assert decoded == expected
+    assert archive['opacity'] == 1.0
+
+
+def test_npz_rejects_other_versions(conversions, tmp_path):
+    with np.load(conversions['npz']) as data:
+        arrays = dict(data)
+    arrays['format_version'] = np.array(svg_export.NPZ_FORMAT_VERSION + 1)
+    np.savez(tmp_path / 'future.npz', **arrays)
+    with pytest.raises(svg_export.SvgExportError):
+        svg_export.load_npz(str(tmp_path / 'future.npz'))
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from core import svg_converter
+from core.svg_instrumentation import Instrumentation, JsonLinesSink
+from core.svg_pipeline import StageCache
+
+RGBW = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 255)]
+STAGES = ['decode', 'preprocess', 'palette', 'masks', 'contours', 'paths', 'document', 'write']
+
+
+def test_every_stage_that_runs_is_recorded(block_image, tmp_path):
+    image_path = block_image(RGBW)
+    sink_path = tmp_path / 'stats.jsonl'
+    received = []
+    instrumentation = Instrumentation(sinks=[received.append, JsonLinesSink(str(sink_path))], track_memory=True)
+    output_path = svg_converter.convert_image_to_svg(image_path, str(tmp_path / 'out.svg'), {'n_colors': 4},
+                                                     instrumentation=instrumentation)
+    stats = instrumentation.stats
+    assert received == [stats]
+    assert [stage.name for stage in stats.stages] == STAGES
+    assert all(stage.peak_bytes is not None for stage in stats.stages)
+    assert stats.counts['colors'] == 4 and stats.counts['paths'] > 0
+    assert stats.output_path == output_path and stats.error is None
+    record = json.loads(sink_path.read_text(encoding='utf-8'))
+    assert [stage['name'] for stage in record['stages']] == STAGES
+
+
+def test_cached_stages_are_skipped_but_counts_kept(block_image, tmp_path):
+    image_path = block_image(RGBW)
+    cache = StageCache()
+    first, second = Instrumentation(), Instrumentation()
+    svg_converter.convert_image_to_svg(image_path, str(tmp_path / 'a.svg'), {'n_colors': 4}, cache=cache,
+                                       instrumentation=first)
+    svg_converter.convert_image_to_svg(image_path, str(tmp_path / 'b.svg'), {'n_colors': 4, 'opacity': 0.5},
+                                       cache=cache, instrumentation=second)
+    assert [stage.name for stage in second.stats.stages] == ['document', 'write']
+    assert second.stats.counts == first.stats.counts
+
+
+def test_failed_conversion_is_reported(tmp_path):
+    image_path = tmp_path / 'broken.png'
+    image_path.write_bytes(b'not an image')
+    received = []
+    with pytest.raises(svg_converter.SvgConversionError):
+        svg_converter.convert_image_to_svg(str(image_path), instrumentation=Instrumentation([received.append]))
+    assert len(received) == 1 and received[0].error
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from core import svg_converter, svg_quantizers
+from core.svg_pipeline import StageCache
+
+RGBW = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 255)]
+RGBW_FILLS = {'#ff0000', '#00ff00', '#0000ff', '#ffffff'}
+
+
+def _fills(image_path, **options):
+    opts = svg_converter._resolve_options(options)
+    _, (_, _, color_paths, _) = svg_converter._build_paths(image_path, opts, StageCache())
+    return {hex_color for hex_color, _ in color_paths}
+
+
+@pytest.mark.parametrize('quantizer', sorted(svg_quantizers.QUANTIZERS))
+def test_every_engine_recovers_flat_palette(block_image, quantizer):
+    assert _fills(block_image(RGBW), n_colors=4, quantizer=quantizer) == RGBW_FILLS
+
+
+@pytest.mark.parametrize('quantizer', sorted(svg_quantizers.QUANTIZERS))
+def test_every_engine_finds_noisy_palette(tmp_path, quantizer):
+    rng = np.random.default_rng(0)
+    colors = np.array([(200, 30, 30), (30, 160, 60), (40, 60, 200), (230, 230, 220)])
+    blocks = np.kron(rng.integers(0, 4, (12, 16)), np.ones((10, 10), dtype=int))
+    pixels = np.clip(colors[blocks] + rng.integers(-6, 7, blocks.shape + (3,)), 0, 255).astype(np.uint8)
+    image_path = tmp_path / 'noisy.png'
+    Image.fromarray(pixels).save(image_path)
+    fills = np.array([[int(hex_color[i:i + 2], 16) for i in (1, 3, 5)]
+                      for hex_color in _fills(str(image_path), n_colors=4, quantizer=quantizer)])
+    error = np.abs(fills[:, None, :] - colors[None, :, :]).max(axis=2) # fill x true color
+    assert sorted(error.argmin(axis=0)) == [0, 1, 2, 3] # Each true color has its own fill
+    assert error.min(axis=0).max() <= 20 # Median cut averages its boxes loosely
+
+
+def test_numpy_kmeans_is_deterministic_and_warm_starts():
+    rng = np.random.default_rng(0)
+    centers = np.array([[0.1, 0.1, 0.1], [0.5, 0.8, 0.2], [0.9, 0.3, 0.6]])
+    pixels = (centers[rng.integers(0, 3, 3000)] + rng.normal(0, 0.02, (3000, 3))).astype(np.float32)
+    first = svg_quantizers.numpy_kmeans(None, pixels, None, 3)
+    assert np.array_equal(first, svg_quantizers.numpy_kmeans(None, pixels, None, 3))
+    assert np.abs(np.sort(first, axis=0) - np.sort(centers, axis=0)).max() < 0.01
+    warm = svg_quantizers.numpy_kmeans(None, pixels, None, 3, init=first)
+    assert np.allclose(warm, first, atol=1e-3)
+
+
+def test_registered_engine_is_used(block_image, monkeypatch):
+    monkeypatch.setattr(svg_quantizers, 'QUANTIZERS', dict(svg_quantizers.QUANTIZERS))
+    calls = []
+    def two_colors(img, pixels, sample_weight, n_colors, progress=None):
+        calls.append(n_colors)
+        return np.array([[1.0, 0.0, 0.0], [0.0, 0.0, 1.0]])
+    svg_quantizers.register_quantizer('two_colors', two_colors)
+    assert _fills(block_image(RGBW), n_colors=4, quantizer='two_colors') == {'#ff0000', '#0000ff'}
+    assert calls == [4]
+
+
+def test_unknown_engine_is_rejected(block_image):
+    with pytest.raises(svg_converter.SvgConversionError, match='Unknown quantizer'):
+        _fills(block_image(RGBW), quantizer='nope')
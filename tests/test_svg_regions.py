@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from PIL import Image
+from skimage import measure
+
+from core import svg_converter, svg_regions
+from core.svg_pipeline import StageCache
+
+
+def _smallest_region(labels):
+    components = measure.label(labels, background=-1, connectivity=1)
+    return np.bincount(components.ravel())[1:].min()
+
+
+def test_specks_merge_into_surrounding_region():
+    labels = np.zeros((40, 40), dtype=np.uint8)
+    labels[:, 20:] = 1
+    labels[5, 5] = 1 # Speck inside color 0
+    labels[30:32, 30:32] = 0 # Speck inside color 1
+    labels[10, 30] = svg_regions.NO_COLOR # Pixel outside every tolerance box
+    merged = svg_regions.merge_small_regions(labels.copy(), min_area=8)
+    expected = np.zeros((40, 40), dtype=np.uint8)
+    expected[:, 20:] = 1
+    assert np.array_equal(merged, expected)
+
+
+@pytest.mark.parametrize('left, expected', [(12, 0), (15, 1)], ids=['left-of-boundary', 'right-of-boundary'])
+def test_speck_joins_neighbour_with_longest_border(left, expected):
+    # A 4x3 speck touching the boundary between colors 0 and 1 from one side:
+    # it shares 4 px of border with the other color and 10 px with its own side
+    labels = np.zeros((30, 30), dtype=np.uint8)
+    labels[:, 15:] = 1
+    labels[10:14, left:left + 3] = 2
+    merged = svg_regions.merge_small_regions(labels, min_area=20)
+    assert np.all(merged[10:14, left:left + 3] == expected)
+
+
+def test_despeckled_conversion_has_no_small_regions(tmp_path):
+    rng = np.random.default_rng(0)
+    colors = np.array([(220, 40, 40), (40, 200, 60), (40, 60, 220)])
+    blocks = np.kron(rng.integers(0, 3, (6, 8)), np.ones((20, 20), dtype=int))
+    blocks[rng.random(blocks.shape) < 0.02] = rng.integers(0, 3) # Salt-and-pepper specks
+    image_path = str(tmp_path / 'specks.png')
+    Image.fromarray(colors[blocks].astype(np.uint8)).save(image_path)
+
+    def paths(**options):
+        opts = svg_converter._resolve_options(dict(options, n_colors=3))
+        _, (_, _, _, counts) = svg_converter._build_paths(image_path, opts, StageCache())
+        return counts['paths']
+
+    assert paths(min_region_area=16) < paths() // 2
+    assert paths(min_region_area=16, morphology='open') <= paths(min_region_area=16)
+
+
+def test_label_map_despeckle_leaves_no_region_below_min_area():
+    rng = np.random.default_rng(1)
+    labels = rng.integers(0, 3, (60, 80)).astype(np.uint8)
+    merged = svg_regions.merge_small_regions(labels, min_area=10)
+    assert _smallest_region(merged) >= 10
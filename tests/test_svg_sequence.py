@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+from core import svg_converter, svg_quantizers
+from core.svg_instrumentation import Instrumentation
+
+COLORS = np.array([(220, 40, 40), (40, 200, 60), (40, 60, 220), (240, 240, 240)], dtype=np.uint8)
+
+
+def _frames(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [COLORS[np.kron(rng.integers(0, 4, (6, 8)), np.ones((10, 10), dtype=int))] for _ in range(count)]
+
+
+def test_unchanged_frames_reuse_the_previous_svg(tmp_path):
+    first, second, third = _frames(3)
+    frames = [first, second, second, third]
+    converted = []
+    outputs = svg_converter.convert_sequence_to_svg(frames, str(tmp_path / 'frames'), {'n_colors': 4},
+                                                    instrumentation=Instrumentation([converted.append]))
+    assert [os.path.basename(path) for path in outputs] == [f'frame_{i:04d}.svg' for i in range(4)]
+    assert len(converted) == 3 # The repeated frame is copied, not vectorized
+    with open(outputs[1], 'rb') as a, open(outputs[2], 'rb') as b:
+        assert a.read() == b.read()
+
+
+def test_animated_file_is_split_into_frames(tmp_path):
+    frames = [Image.fromarray(frame) for frame in _frames(3)]
+    source = str(tmp_path / 'anim.gif')
+    frames[0].save(source, save_all=True, append_images=frames[1:], duration=100)
+    outputs = svg_converter.convert_sequence_to_svg(source, options={'n_colors': 4, 'output_format': 'npz'})
+    assert len(outputs) == 3 and all(path.endswith('.npz') for path in outputs)
+
+
+def test_palette_is_warm_started_from_previous_frame(tmp_path, monkeypatch):
+    inits = []
+    def recording_kmeans(img, pixels, sample_weight, n_colors, progress=None, init=None):
+        inits.append(None if init is None else np.array(init))
+        return svg_quantizers.numpy_kmeans(img, pixels, sample_weight, n_colors, progress, init=init)
+    recording_kmeans.supports_init = True
+    monkeypatch.setitem(svg_quantizers.QUANTIZERS, 'kmeans', recording_kmeans)
+
+    svg_converter.convert_sequence_to_svg(_frames(3), str(tmp_path / 'warm'), {'n_colors': 4, 'quantizer': 'kmeans'})
+    assert inits[0] is None and all(init is not None for init in inits[1:]) and len(inits) == 3
+    inits.clear()
+    svg_converter.convert_sequence_to_svg(_frames(3), str(tmp_path / 'cold'),
+                                          {'n_colors': 4, 'quantizer': 'kmeans', 'warm_start': False})
+    assert inits == [None, None, None]
@@ -0,0 +1,74 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from core import svg_converter, svg_topology, svg_tuner
+from core.svg_pipeline import StageCache
+
+RGBK = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (0, 0, 0)]
+
+
+def _on_border(points, shape):
+    height, width = shape
+    rows, cols = points[:, 0], points[:, 1]
+    return bool(np.all((rows == 0) | (rows == height) | (cols == 0) | (cols == width)))
+
+
+def test_every_edge_is_shared_by_its_two_regions():
+    label_map = np.random.default_rng(0).integers(0, 3, (30, 40))
+    graph = svg_topology.build_boundary_graph(label_map)
+    uses = Counter(ref for rings in graph.rings.values() for ring in rings for ref in ring)
+    for index, points in enumerate(graph.edges):
+        if _on_border(points, label_map.shape):
+            assert uses[(index, False)] + uses[(index, True)] == 1
+        else: # Once in each direction: one region on either side
+            assert uses[(index, False)] == 1 and uses[(index, True)] == 1
+
+
+def _signed_area(points):
+    return 0.5 * float(np.dot(points[:, 0], np.roll(points[:, 1], 1)) - np.dot(points[:, 1], np.roll(points[:, 0], 1)))
+
+
+def test_region_areas_tile_the_image():
+    label_map = np.random.default_rng(1).integers(0, 4, (25, 35))
+    graph = svg_topology.build_boundary_graph(label_map)
+    geometries = svg_topology.simplify_edges(graph, 0.0)
+    areas = [sum(_signed_area(svg_topology._ring_polygon(ring, geometries)) for ring in rings)
+             for rings in graph.rings.values()]
+    assert sum(abs(area) for area in areas) == pytest.approx(label_map.size)
+
+
+def test_diagonal_neighbours_stay_separate_regions():
+    graph = svg_topology.build_boundary_graph(np.array([[0, 1], [1, 0]]))
+    assert len(graph.rings[0]) == 2
+    assert len(graph.rings[1]) == 2
+
+
+def _coverage(width, height, color_paths):
+    counts = np.zeros((height, width), dtype=np.int64)
+    for _, path_list in color_paths:
+        for path_data in path_list:
+            counts += svg_tuner.fill_polygons(svg_tuner._flatten_path(path_data), height, width)
+    return counts
+
+
+@pytest.mark.parametrize('options', [
+    {'simplify_tolerance': 0.5},
+    {'simplify_tolerance': 2.0},
+    {'curve_fitting': True},
+], ids=['simplify-0.5', 'simplify-2', 'curves'])
+def test_topology_output_has_no_gaps_or_overlaps(block_image, options):
+    image_path = block_image(RGBK)
+    opts = svg_converter._resolve_options(dict(options, n_colors=4, contour_mode='topology'))
+    _, (width, height, color_paths, counts) = svg_converter._build_paths(image_path, opts, StageCache())
+    assert counts['paths'] == 4
+    assert np.all(_coverage(width, height, color_paths) == 1)
+
+
+def test_topology_polygons_reproduce_flat_colors(block_image):
+    image_path = block_image(RGBK)
+    opts = svg_converter._resolve_options({'n_colors': 4, 'contour_mode': 'topology'})
+    _, (width, height, color_paths, _) = svg_converter._build_paths(image_path, opts, StageCache())
+    rendered = svg_tuner.rasterize_paths(width, height, color_paths, opts['opacity'])
+    assert svg_tuner.fidelity(svg_tuner.load_reference(image_path), rendered)['mean_color_error'] == 0.0
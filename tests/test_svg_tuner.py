@@ -0,0 +1,42 @@
+import pytest
+
+from core import svg_tuner
+
+RGBW = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 255)]
+
+
+@pytest.mark.parametrize('max_color_error, expected_trials', [(1000.0, 6), (-1.0, 2)], ids=['all-pass', 'all-fail'])
+def test_progress_reaches_total(block_image, max_color_error, expected_trials):
+    # Regression: total counted the simplify tolerances skipped after a failing trial,
+    # so a progress bar never filled when any palette stopped early
+    calls = []
+    result = svg_tuner.tune_svg_options(block_image(RGBW), n_colors=(2, 4), tolerances=(0.2,),
+                                        simplify_tolerances=(0.5, 1.0, 2.0), max_color_error=max_color_error,
+                                        progress_callback=lambda done, total, trial: calls.append((done, total)))
+    assert len(result['trials']) == expected_trials
+    assert calls[-1] == (expected_trials, expected_trials)
+    assert all(done <= total for done, total in calls)
+
+
+def test_tuner_picks_most_faithful_trial_when_none_passes(block_image):
+    result = svg_tuner.tune_svg_options(block_image(RGBW), n_colors=(2, 4), tolerances=(0.2,),
+                                        simplify_tolerances=(0.5,), max_color_error=-1.0)
+    assert not result['met_target']
+    best = min(result['trials'], key=lambda trial: trial['mean_color_error'])
+    assert result['options'] == best['options']
+    assert result['options']['n_colors'] == 4
+
+
+def test_trials_are_scored_on_a_reduced_grid(logo_image, monkeypatch):
+    tune = lambda: svg_tuner.tune_svg_options(logo_image, n_colors=(4,), tolerances=(0.2,), simplify_tolerances=(0.5,))
+    full_error = tune()['trials'][0]['mean_color_error']
+    monkeypatch.setattr(svg_tuner, 'SCORE_MAX_PIXELS', 100 * 75) # The 200x150 logo at half size
+    shapes = []
+    fidelity = svg_tuner.fidelity
+    def recording_fidelity(reference, rendered):
+        shapes.append((reference.shape, rendered.shape))
+        return fidelity(reference, rendered)
+    monkeypatch.setattr(svg_tuner, 'fidelity', recording_fidelity)
+    reduced_error = tune()['trials'][0]['mean_color_error']
+    assert shapes == [((75, 100, 3), (75, 100, 3))]
+    assert reduced_error == pytest.approx(full_error, abs=1.0)
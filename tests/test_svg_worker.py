@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from core import svg_worker
+
+RGBW = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 255)]
+
+
+def _wait_for(service, job_ids, deadline=120):
+    """Polls until every job has its final event; returns {job_id: event}."""
+    finals = {}
+    end = time.monotonic() + deadline
+    while set(finals) != set(job_ids):
+        assert time.monotonic() < end, "SVG worker did not finish in time"
+        for event in service.poll(timeout=0.1):
+            if event[0] in (svg_worker.EVENT_DONE, svg_worker.EVENT_CANCELLED, svg_worker.EVENT_ERROR):
+                finals[event[1]] = event
+    return finals
+
+
+@pytest.fixture
+def service():
+    service = svg_worker.SvgWorkerService()
+    yield service
+    service.shutdown()
+
+
+def test_worker_converts_jobs_and_reports_errors(service, block_image, tmp_path):
+    image_path = block_image(RGBW)
+    first = service.submit(image_path, str(tmp_path / 'first.svg'), {'n_colors': 4})
+    missing = service.submit(str(tmp_path / 'missing.png'), None, {'n_colors': 4})
+    second = service.submit(image_path, str(tmp_path / 'second.svg'), {'n_colors': 4, 'opacity': 0.5})
+    finals = _wait_for(service, [first, missing, second])
+    assert finals[first] == (svg_worker.EVENT_DONE, first, str(tmp_path / 'first.svg'))
+    assert finals[second][0] == svg_worker.EVENT_DONE
+    assert finals[missing][:3] == (svg_worker.EVENT_ERROR, missing, 'FileNotFoundError')
+
+
+def test_dead_worker_fails_pending_jobs_and_restarts(service, block_image, tmp_path):
+    _wait_for(service, [service.submit(block_image(RGBW), str(tmp_path / 'warm.svg'), {'n_colors': 4})])
+    job = service.submit(block_image(RGBW), str(tmp_path / 'lost.svg'), {'n_colors': 4})
+    service._process.kill()
+    service._process.join()
+    finals = _wait_for(service, [job])
+    assert finals[job][:3] == (svg_worker.EVENT_ERROR, job, 'SvgWorkerError')
+    # The next submit starts a fresh worker
+    job = service.submit(block_image(RGBW), str(tmp_path / 'again.svg'), {'n_colors': 4})
+    assert _wait_for(service, [job])[job][0] == svg_worker.EVENT_DONE
+
+
+def test_submit_after_an_unnoticed_death_still_fails_the_lost_jobs(service, block_image, tmp_path):
+    lost = service.submit(block_image(RGBW), str(tmp_path / 'lost.svg'), {'n_colors': 4})
+    service._process.kill()
+    service._process.join()
+    # No poll() in between: submit restarts the worker itself
+    job = service.submit(block_image(RGBW), str(tmp_path / 'next.svg'), {'n_colors': 4})
+    finals = _wait_for(service, [lost, job])
+    assert finals[lost][:3] == (svg_worker.EVENT_ERROR, lost, 'SvgWorkerError')
+    assert finals[job][0] == svg_worker.EVENT_DONE